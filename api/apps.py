@@ -6,4 +6,5 @@ class ApiConfig(AppConfig):
     name = 'api'
 
     def ready(self):
-        import api.extensions
\ No newline at end of file
+        import api.extensions
+        import api.signals  # Invalidación de la caché de tokens
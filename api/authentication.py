@@ -1,7 +1,130 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth.models import User
-from issues.models import Profile  # Ajusta la importación según tu estructura
+from issues.tokens import find_token, hash_token, last_used
+
+
+class TokenCache:
+    """
+    Caché LRU con caducidad de hash de token -> usuario, local a cada proceso.
+
+    Guarda los valores de las columnas, no las instancias: cada acierto construye
+    un objeto nuevo para que una petición no vea los cambios que otra haga sobre
+    request.user.
+
+    Las invalidaciones explícitas (invalidate_key / invalidate_user) borran la
+    entrada local y cambian una marca de generación en la caché compartida; el
+    resto de procesos vacían su caché al ver una marca distinta. La caducidad
+    (ttl) acota el tiempo que un dato puede seguir en memoria en cualquier caso.
+    """
+    GENERATION_KEY = 'api:token-cache:generation'
+
+    def __init__(self, max_size, ttl, cache_alias='shared', clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.cache_alias = cache_alias
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generation = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key):
+        self._sync_generation()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key, user_id, value):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl, user_id, value)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_key(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+        self._bump_generation()
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+        self._bump_generation()
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def _remove(self, key):
+        _expires, user_id, _value = self._entries.pop(key)
+        keys = self._keys_by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    def _sync_generation(self):
+        generation = caches[self.cache_alias].get(self.GENERATION_KEY)
+        if generation != self._generation:
+            # Otro proceso invalidó algún token: no se sabe cuál, se vacía todo
+            if self._generation is not None:
+                self.clear()
+            self._generation = generation
+
+    def _bump_generation(self):
+        generation = uuid.uuid4().hex
+        caches[self.cache_alias].set(self.GENERATION_KEY, generation, None)
+        # Este proceso ya ha borrado lo que debía: no necesita vaciarse
+        self._generation = generation
+
+
+token_cache = TokenCache(
+    max_size=getattr(settings, 'API_TOKEN_CACHE_SIZE', 1000),
+    ttl=getattr(settings, 'API_TOKEN_CACHE_TTL', 300),
+)
+
+# Columnas del usuario que se guardan en la caché
+_USER_FIELDS = [field.attname for field in User._meta.concrete_fields]
 
 
 class CustomAuthorizationHeaderTokenAuthentication(BaseAuthentication):
@@ -19,19 +142,27 @@ class CustomAuthorizationHeaderTokenAuthentication(BaseAuthentication):
         return self.authenticate_credentials(token)
 
     def authenticate_credentials(self, token):
-        try:
-            # Encuentra el perfil con el token correspondiente
-            profile = Profile.objects.get(api_token=token)
-            user = profile.user
+        # La caché se indexa por el hash: no guarda tokens en claro
+        key = hash_token(token)
+        cached = token_cache.get(key)
+        if cached is None:
+            api_token = find_token(token)
+            if api_token is None:
+                raise AuthenticationFailed('Token inválido')
+            token_id, user = api_token.pk, api_token.user
+            token_cache.set(key, user.pk, (token_id, tuple(getattr(user, name) for name in _USER_FIELDS)))
+        else:
+            token_id, user_values = cached[1]
+            # Instancia nueva en cada petición: nunca se comparte request.user
+            user = User.from_db('default', _USER_FIELDS, user_values)
 
-            # Verifica si el usuario está activo
-            if not user.is_active:
-                raise AuthenticationFailed('Usuario inactivo o eliminado')
+        # Verifica si el usuario está activo
+        if not user.is_active:
+            raise AuthenticationFailed('Usuario inactivo o eliminado')
 
-            return (user, token)
-        except Profile.DoesNotExist:
-            raise AuthenticationFailed('Token inválido')
+        last_used.touch(token_id)
+        return (user, token)
 
     # Añade este método
     def get_scheme_name(self):
-        return 'ApiToken'
\ No newline at end of file
+        return 'ApiToken'
@@ -0,0 +1,88 @@
+import calendar
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    GET condicional para list y retrieve: las respuestas llevan ETag (fuerte) y,
+    si la vista lo sabe calcular, Last-Modified, y se responde 304 a
+    If-None-Match / If-Modified-Since sin llegar a serializar el cuerpo.
+
+    Los validadores salen de get_list_version() / get_object_version(), que
+    deben resolverse con consultas baratas (agregados, columnas sueltas). El
+    ETag combina esa versión con la URL completa y el formato de salida, porque
+    ?fields=, el cursor o el renderer cambian la representación.
+
+    Por defecto la versión es un hash de las columnas de las filas, adecuado
+    para tablas pequeñas como los catálogos.
+    """
+
+    def list(self, request, *args, **kwargs):
+        version, last_modified = self.get_list_version()
+        return self.conditional_response(version, last_modified, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            version, last_modified = self.get_object_version()
+        except (TypeError, ValueError, ValidationError):
+            # Clave mal formada: que get_object() responda 404
+            version, last_modified = None, None
+        return self.conditional_response(version, last_modified, super().retrieve, request, *args, **kwargs)
+
+    def get_list_version(self):
+        """(versión, última modificación o None) del listado filtrado."""
+        return self._digest(self._rows(self.filter_queryset(self.get_queryset()))), None
+
+    def get_object_version(self):
+        """(versión, última modificación o None) del objeto, o (None, None) si no existe."""
+        rows = self._rows(self.get_lookup_queryset())
+        return (self._digest(rows), None) if rows else (None, None)
+
+    def get_lookup_queryset(self):
+        """Queryset filtrado por la clave de la URL, como hace get_object()."""
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return self.get_queryset().filter(**{self.lookup_field: lookup})
+
+    @staticmethod
+    def _rows(queryset):
+        columns = [field.attname for field in queryset.model._meta.concrete_fields]
+        return list(queryset.order_by('pk').values_list(*columns))
+
+    @staticmethod
+    def _digest(value):
+        return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()
+
+    def get_etag(self, version):
+        renderer = getattr(self.request, 'accepted_media_type', '') or ''
+        return quote_etag(self._digest(f'{version}|{self.request.get_full_path()}|{renderer}'))
+
+    def conditional_response(self, version, last_modified, handler, request, *args, **kwargs):
+        if version is None:
+            # Sin validadores (p. ej. objeto inexistente): respuesta normal
+            return handler(request, *args, **kwargs)
+
+        etag = self.get_etag(version)
+        timestamp = calendar.timegm(last_modified.utctimetuple()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            if response.status_code != 304:
+                return response
+            # Response de DRF para que pase por finalize_response como el resto
+            response = Response(status=304)
+        else:
+            response = handler(request, *args, **kwargs)
+            if not 200 <= response.status_code < 300:
+                return response
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        # Se puede guardar, pero hay que revalidar siempre (evita la caché heurística)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -1,6 +1,7 @@
 import django_filters
 from django.contrib.auth.models import User
 from django.db.models import Q
+from rest_framework.filters import OrderingFilter
 from issues.models import Issue, Status, Priorities, Severities, Types
 
 
@@ -21,4 +22,28 @@ class IssueFilter(django_filters.FilterSet):
             'status_name', 'priority_name', 'severity_name',
             'assigned_to', 'created_by',
             'assigned_to_username', 'created_by_username',
-        ]
\ No newline at end of file
+        ]
+
+
+class IssueOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter que además admite ordenar por 'rank' cuando el queryset viene
+    anotado con la relevancia de la búsqueda de texto (issues.search), y en ese
+    caso la usa como orden por defecto.
+    """
+
+    def get_valid_fields(self, queryset, view, context={}):
+        valid_fields = super().get_valid_fields(queryset, view, context)
+        if 'rank' in queryset.query.annotations:
+            valid_fields = [*valid_fields, ('rank', 'rank')]
+        return valid_fields
+
+    def get_ordering(self, request, queryset, view):
+        if not request.query_params.get(self.ordering_param) and 'rank' in queryset.query.annotations:
+            return ['-rank']
+        return super().get_ordering(request, queryset, view)
+
+
+def fuzzy_requested(query_params):
+    """Indica si la petición pide búsqueda tolerante a errores (?fuzzy=1)."""
+    return query_params.get('fuzzy', '').lower() in ('1', 'true', 'yes')
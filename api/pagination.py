@@ -0,0 +1,251 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    # isoformat conserva los microsegundos; DjangoJSONEncoder los trunca a
+    # milisegundos y el cursor dejaría de apuntar a una fila exacta
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} no se puede codificar en un cursor')
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginación por cursor opaco basada en keyset: cada página se obtiene con un
+    WHERE sobre los valores de ordenación de la última fila entregada, de forma
+    que la página N cuesta lo mismo que la primera.
+
+    La ordenación se toma del OrderingFilter de la vista si lo tiene (respetando
+    ?ordering=) o, si no, de ``ordering`` (o de '-rank' en resultados de búsqueda). Siempre se añade la clave primaria como
+    desempate para que el orden sea total. Los NULL se tratan como el valor más
+    pequeño en ambas direcciones, independientemente del motor de base de datos.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+    ordering = ('-id',)
+    tiebreaker = 'id'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering_fields = self.get_ordering(request, queryset, view)
+        self.model = queryset.model
+
+        reverse, position = self.decode_cursor(request)
+        ordering = self._reversed(self.ordering_fields) if reverse else self.ordering_fields
+
+        queryset = queryset.order_by(*[self._order_expression(term) for term in ordering])
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = position is not None if not reverse else has_more
+        return results
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Ordenación de la página: la del OrderingFilter de la vista si existe, la
+        de la paginación en otro caso, terminada siempre en la clave primaria.
+        """
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering and 'rank' in queryset.query.annotations:
+            # Resultados de búsqueda: por relevancia
+            ordering = ['-rank']
+        ordering = list(ordering or self.ordering)
+
+        names = [term.lstrip('-') for term in ordering]
+        if self.tiebreaker not in names and 'pk' not in names:
+            direction = '-' if ordering[0].startswith('-') else ''
+            ordering.append(f'{direction}{self.tiebreaker}')
+        return ordering
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                    'example': f'http://api.example.org/accounts/?{self.cursor_query_param}=cD00ODY%3D',
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                    'example': f'http://api.example.org/accounts/?{self.cursor_query_param}=cj0xJnA9NDg3',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor opaco devuelto en next/previous',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Número de resultados por página (máximo {self.max_page_size})',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # --- Cursor ---------------------------------------------------------------
+
+    def encode_cursor(self, instance, reverse):
+        payload = {
+            'o': self.ordering_fields,
+            'p': [self._value(instance, term.lstrip('-')) for term in self.ordering_fields],
+        }
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, default=_encode_value, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return False, None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+            payload = json.loads(raw)
+            ordering, position = payload['o'], payload['p']
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # Un cursor solo es válido para la ordenación con la que se generó
+        if ordering != self.ordering_fields or len(position) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return bool(payload.get('r')), position
+
+    # --- Keyset ---------------------------------------------------------------
+
+    def _attname(self, name):
+        try:
+            return self.model._meta.get_field(name).attname
+        except FieldDoesNotExist:
+            # Anotaciones (p. ej. 'rank') y la clave primaria
+            return self.model._meta.pk.attname if name == 'pk' else name
+
+    def _value(self, instance, name):
+        return getattr(instance, self._attname(name))
+
+    def _order_expression(self, term):
+        column = F(self._attname(term.lstrip('-')))
+        if term.startswith('-'):
+            return column.desc(nulls_last=True)
+        return column.asc(nulls_first=True)
+
+    @staticmethod
+    def _reversed(ordering):
+        return [term[1:] if term.startswith('-') else f'-{term}' for term in ordering]
+
+    def _after(self, term, value):
+        """Filas estrictamente posteriores a ``value`` en la columna ``term``."""
+        column = self._attname(term.lstrip('-'))
+        if term.startswith('-'):
+            if value is None:
+                return Q(pk__in=[])
+            return Q(**{f'{column}__lt': value}) | Q(**{f'{column}__isnull': True})
+        if value is None:
+            return Q(**{f'{column}__isnull': False})
+        return Q(**{f'{column}__gt': value})
+
+    def _equal(self, term, value):
+        column = self._attname(term.lstrip('-'))
+        if value is None:
+            return Q(**{f'{column}__isnull': True})
+        return Q(**{column: value})
+
+    def _keyset_filter(self, ordering, position):
+        # (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        condition = Q(pk__in=[])
+        prefix = Q()
+        for term, value in zip(ordering, position):
+            condition |= prefix & self._after(term, value)
+            prefix &= self._equal(term, value)
+        return condition
+
+
+class IssueCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', '-id')
+
+
+class CommentCursorPagination(KeysetCursorPagination):
+    ordering = ('-published_at', '-id')
+
+
+class LatestCommentsPagination(CommentCursorPagination):
+    # Mantiene el parámetro histórico ?limit= del endpoint de comentarios recientes
+    page_size_query_param = 'limit'
+    page_size = 10
+
+
+class UserCursorPagination(KeysetCursorPagination):
+    ordering = ('id',)
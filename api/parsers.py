@@ -0,0 +1,151 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+_WHITESPACE = ' \t\r\n'
+_decoder = json.JSONDecoder()
+
+
+class _JSONStream:
+    """Lector incremental de JSON: mantiene en memoria solo el valor en curso."""
+
+    def __init__(self, stream, encoding, read_size):
+        self.stream = stream
+        self.read_size = read_size
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        data = self.stream.read(self.read_size)
+        if not data:
+            self.eof = True
+        text = self.decoder.decode(data or b'', final=not data)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+
+    def peek(self):
+        """Siguiente carácter significativo sin consumirlo ('' al final)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self.fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ParseError(f"JSON mal formado: se esperaba '{char}'")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.eof:
+                    raise ParseError("JSON mal formado")
+                self.fill()
+                continue
+            # Un número al final del buffer puede estar cortado: se lee más
+            if end == len(self.buffer) and not self.eof and self.buffer[self.pos] not in '{["':
+                self.fill()
+                continue
+            self.pos = end
+            return obj
+
+    def array_items(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self.pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ParseError("JSON mal formado: se esperaba ',' o ']'")
+
+    def end(self):
+        if self.peek() != '':
+            raise ParseError("JSON mal formado: contenido tras el final")
+
+
+def iter_json_array(stream, key, encoding='utf-8', read_size=64 * 1024):
+    """
+    Recorre los elementos de un array JSON sin cargar el cuerpo entero: el
+    documento puede ser el propio array o un objeto con el array en ``key``
+    (el resto de claves se leen y se descartan).
+    """
+    reader = _JSONStream(stream, encoding, read_size)
+    if reader.peek() == '[':
+        yield from reader.array_items()
+        reader.end()
+        return
+
+    reader.expect('{')
+    found = False
+    while reader.peek() != '}':
+        name = reader.value()
+        reader.expect(':')
+        if name == key and not found:
+            found = True
+            yield from reader.array_items()
+        else:
+            reader.value()
+        if reader.peek() != ',':
+            break
+        reader.pos += 1
+    reader.expect('}')
+    reader.end()
+    if not found:
+        raise ParseError(f"Falta la lista '{key}'")
+
+
+def iter_json_lines(stream, encoding='utf-8'):
+    """Elementos de un cuerpo NDJSON (un documento JSON por línea)."""
+    for number, line in enumerate(stream, start=1):
+        line = line.decode(encoding).strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            raise ParseError(f"JSON mal formado en la línea {number}")
+
+
+class StreamingJSONArrayParser(BaseParser):
+    """
+    Parser para altas masivas: en lugar de un dict devuelve un iterador sobre
+    los elementos de ``array_key`` que va leyendo el cuerpo a medida que se
+    consume. No pasa por request.body, así que no aplica
+    DATA_UPLOAD_MAX_MEMORY_SIZE; el límite lo pone quien consume el iterador.
+    """
+    media_type = 'application/json'
+    array_key = 'items'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return iter_json_array(stream, self.array_key, encoding)
+
+
+class NDJSONParser(BaseParser):
+    """Iterador sobre un cuerpo NDJSON, un elemento por línea."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        return iter_json_lines(stream, encoding)
+
+
+class IssueBulkJSONParser(StreamingJSONArrayParser):
+    """{"issues": [...]} de /api/issues/bulk-create/, leído en streaming."""
+    array_key = 'issues'
@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.db.models import Prefetch
+
+from issues.models import Attachment, Comment
+from .serializers import IssueSerializer
+
+
+# Columnas propias de Issue que necesita cada campo de IssueSerializer
+ISSUE_FIELD_COLUMNS = {
+    'id': ['id'],
+    'subject': ['subject'],
+    'description': ['description'],
+    'created_at': ['created_at'],
+    'due_date': ['due_date'],
+    'status': ['status__nombre'],
+    'priority': ['priority__nombre'],
+    'severity': ['severity__nombre'],
+    'issue_type': ['issue_type__nombre'],
+    'created_by': ['created_by__username'],
+    'assigned_to': ['assigned_to__username'],
+}
+
+# Relaciones ForeignKey que se resuelven con un JOIN
+ISSUE_FIELD_JOINS = {
+    'status': 'status',
+    'priority': 'priority',
+    'severity': 'severity',
+    'issue_type': 'issue_type',
+    'created_by': 'created_by',
+    'assigned_to': 'assigned_to',
+}
+
+
+def _issue_prefetches():
+    """
+    Prefetch de las relaciones M2M e inversas, cada una en una sola consulta
+    y trayendo solo las columnas que pintan los serializers anidados.
+    """
+    return {
+        'watchers': Prefetch(
+            'watchers',
+            queryset=User.objects.only('id', 'username'),
+        ),
+        'attachment': Prefetch(
+            'attachment',
+            queryset=Attachment.objects.only(
+                'id', 'issue_id', 'file', 'name', 'size', 'sha256', 'state', 'error', 'uploaded_at', 'variants'
+            ),
+        ),
+        'comments': Prefetch(
+            'comments',
+            queryset=Comment.objects.select_related('user').only('id', 'issue_id', 'text', 'user__username'),
+        ),
+    }
+
+
+def plan_issue_queryset(queryset, fields=None):
+    """
+    Ajusta un queryset de Issue a los campos que se van a serializar con
+    IssueSerializer, de forma que el número de consultas no dependa del número
+    de filas: select_related para las FK, Prefetch para watchers, attachment y
+    comments y only() con las columnas imprescindibles.
+
+    Si no se indican campos se planifica para todos los de IssueSerializer.
+    """
+    if fields is None:
+        fields = IssueSerializer.Meta.fields
+    fields = set(fields)
+
+    # created_at se carga siempre: es la clave por defecto del cursor de paginación
+    columns = ['id', 'created_at']
+    joins = []
+    for name in IssueSerializer.Meta.fields:
+        if name not in fields:
+            continue
+        columns.extend(ISSUE_FIELD_COLUMNS.get(name, []))
+        if name in ISSUE_FIELD_JOINS:
+            joins.append(ISSUE_FIELD_JOINS[name])
+
+    prefetches = [
+        prefetch for name, prefetch in _issue_prefetches().items() if name in fields
+    ]
+
+    queryset = queryset.select_related(*joins) if joins else queryset.select_related(None)
+    return queryset.prefetch_related(*prefetches).only(*columns)
@@ -0,0 +1,17 @@
+from rest_framework import serializers
+
+from issues.models import ApiToken
+
+
+class ApiTokenSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ApiToken
+        fields = ['id', 'name', 'prefix', 'created_at', 'last_used_at']
+        read_only_fields = ['prefix', 'created_at', 'last_used_at']
+
+
+class ApiTokenCreatedSerializer(ApiTokenSerializer):
+    token = serializers.CharField(read_only=True, help_text="Token en claro. Solo se devuelve al crearlo.")
+
+    class Meta(ApiTokenSerializer.Meta):
+        fields = ApiTokenSerializer.Meta.fields + ['token']
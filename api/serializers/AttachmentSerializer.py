@@ -1,11 +1,37 @@
 from django.contrib.auth.models import User
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from issues.models import Attachment
+from issues.variants import variant_urls
+
+
+class ImageVariantSerializer(serializers.Serializer):
+    width = serializers.IntegerField()
+    height = serializers.IntegerField()
+    webp = serializers.URLField(required=False)
+    jpeg = serializers.URLField(required=False)
+
+
+IMAGE_VARIANTS_SCHEMA = serializers.DictField(
+    child=ImageVariantSerializer(),
+    help_text="Miniaturas por tamaño máximo en px (p. ej. '256'); vacío si no es una imagen o aún no se han generado",
+)
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
+    variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Attachment
-        fields = ['id', 'file', 'uploaded_at']
-        read_only_fields = ['uploaded_at']
\ No newline at end of file
+        fields = ['id', 'file', 'name', 'size', 'sha256', 'state', 'error', 'uploaded_at', 'variants']
+        read_only_fields = ['name', 'size', 'sha256', 'state', 'error', 'uploaded_at', 'variants']
+        extra_kwargs = {
+            'sha256': {
+                'help_text': "SHA-256 del contenido; vacío si se subió sin calcularlo (subidas directas o por partes)"
+            },
+        }
+
+    @extend_schema_field(IMAGE_VARIANTS_SCHEMA)
+    def get_variants(self, obj):
+        return variant_urls(obj.file, obj.variants, self.context.get('request'))
@@ -0,0 +1,22 @@
+from rest_framework import serializers
+
+from issues.models import CatalogDeletion
+
+
+class CatalogDeletionSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField(help_text="Fracción de issues reasignados (0 a 1)")
+
+    class Meta:
+        model = CatalogDeletion
+        fields = [
+            'id', 'catalog', 'object_id', 'nombre', 'replacement_id', 'state',
+            'total', 'processed', 'progress', 'error', 'created_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj) -> float:
+        if obj.state == CatalogDeletion.DONE:
+            return 1.0
+        if not obj.total:
+            return 0.0
+        return round(min(obj.processed / obj.total, 1.0), 4)
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+from .PrioritiesSerializer import PrioritiesSerializer
+from .SeveritiesSerializer import SeveritiesSerializer
+from .StatusSerializer import StatusSerializer
+from .TypesSerializer import TypesSerializer
+
+
+class CatalogsSerializer(serializers.Serializer):
+    version = serializers.CharField(help_text="Versión global de los catálogos; cambia con cualquier alta, edición o baja")
+    statuses = StatusSerializer(many=True)
+    priorities = PrioritiesSerializer(many=True)
+    types = TypesSerializer(many=True)
+    severities = SeveritiesSerializer(many=True)
@@ -0,0 +1,64 @@
+import mimetypes
+
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+
+from issues.direct_uploads import upload_target
+from issues.models import DirectUpload
+from .AttachmentSerializer import AttachmentSerializer
+
+
+class DirectUploadRequestSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255, help_text="Nombre del archivo")
+    size = serializers.IntegerField(min_value=1, help_text="Tamaño en bytes")
+    md5 = serializers.RegexField(r'^[0-9a-fA-F]{32}$', help_text="MD5 del contenido, en hexadecimal")
+    content_type = serializers.CharField(
+        max_length=100, required=False,
+        help_text="Tipo MIME (por defecto, el que corresponde a la extensión del nombre)"
+    )
+
+    def validate_size(self, value):
+        limit = getattr(settings, 'DIRECT_UPLOAD_MAX_SIZE', 100 * 1024 * 1024)
+        if value > limit:
+            raise serializers.ValidationError(f"Como máximo {limit} bytes.")
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get('content_type'):
+            attrs['content_type'] = mimetypes.guess_type(attrs['name'])[0] or 'application/octet-stream'
+        return attrs
+
+
+class AvatarUploadRequestSerializer(DirectUploadRequestSerializer):
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not attrs['content_type'].startswith('image/'):
+            raise serializers.ValidationError({'content_type': "El avatar debe ser una imagen."})
+        return attrs
+
+
+class DirectUploadTargetSerializer(serializers.Serializer):
+    method = serializers.CharField()
+    url = serializers.URLField()
+    headers = serializers.DictField(child=serializers.CharField(), help_text="Cabeceras que hay que enviar tal cual")
+    expires_at = serializers.DateTimeField()
+
+
+class DirectUploadSerializer(serializers.ModelSerializer):
+    attachment = AttachmentSerializer(read_only=True)
+    upload = serializers.SerializerMethodField(
+        help_text="Petición con la que subir el archivo; null si ya no está pendiente o la URL ha caducado"
+    )
+
+    class Meta:
+        model = DirectUpload
+        fields = [
+            'id', 'target', 'attachment', 'name', 'size', 'md5', 'content_type',
+            'state', 'error', 'upload', 'created_at', 'expires_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    @extend_schema_field(DirectUploadTargetSerializer(allow_null=True))
+    def get_upload(self, obj):
+        return upload_target(obj)
@@ -1,8 +1,11 @@
-from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import serializers
 from issues.models import (
-    Issue, Status, Priorities, Severities, Types, Attachment
+    Issue, Status, Priorities, Severities, Types
 )
+from issues.attachments import AttachmentBatch
+from issues.catalogs import get_registry
+from issues.watchers import add_watchers, resolve_usernames, split_usernames
 
 
 class IssueUpdateSerializer(serializers.ModelSerializer):
@@ -61,6 +64,14 @@ class IssueUpdateSerializer(serializers.ModelSerializer):
         return super().to_internal_value(data)
 
     def update(self, instance, validated_data):
+        files = validated_data.pop('files', [])
+        # Igual que en create: los archivos se guardan en paralelo con el resto
+        with transaction.atomic(), AttachmentBatch(files) as attachments:
+            self.update_issue(instance, validated_data)
+            attachments.save(instance)
+        return instance
+
+    def update_issue(self, instance, validated_data):
         # Extraemos los mismos campos que en create…
         status_name = validated_data.pop('status_name', None)
         priority_name = validated_data.pop('priority_name', None)
@@ -68,37 +79,22 @@ class IssueUpdateSerializer(serializers.ModelSerializer):
         issue_type_name = validated_data.pop('issue_type_name', None)
         assigned_username = validated_data.pop('assigned_to_username', None)
         watchers_usernames = validated_data.pop('watchers_usernames', [])
-        files = validated_data.pop('files', [])
 
-        # Si vienen, resolvemos o levantamos error
-        if status_name is not None:
-            try:
-                instance.status = Status.objects.get(nombre=status_name)
-            except Status.DoesNotExist:
-                raise serializers.ValidationError({
-                    'status_name': f"El status '{status_name}' no existe."
-                })
-        if priority_name is not None:
-            try:
-                instance.priority = Priorities.objects.get(nombre=priority_name)
-            except Priorities.DoesNotExist:
-                raise serializers.ValidationError({
-                    'priority_name': f"La prioridad '{priority_name}' no existe."
-                })
-        if severity_name is not None:
-            try:
-                instance.severity = Severities.objects.get(nombre=severity_name)
-            except Severities.DoesNotExist:
-                raise serializers.ValidationError({
-                    'severity_name': f"La severidad '{severity_name}' no existe."
-                })
-        if issue_type_name is not None:
-            try:
-                instance.issue_type = Types.objects.get(nombre=issue_type_name)
-            except Types.DoesNotExist:
-                raise serializers.ValidationError({
-                    'issue_type_name': f"El tipo de issue '{issue_type_name}' no existe."
-                })
+        # Si vienen, resolvemos (con el registro de catálogos) o levantamos error
+        registry = get_registry()
+        catalog_fields = [
+            ('status', Status, status_name, 'status_name', "El status '{}' no existe."),
+            ('priority', Priorities, priority_name, 'priority_name', "La prioridad '{}' no existe."),
+            ('severity', Severities, severity_name, 'severity_name', "La severidad '{}' no existe."),
+            ('issue_type', Types, issue_type_name, 'issue_type_name', "El tipo de issue '{}' no existe."),
+        ]
+        for attr, model, name, param, message in catalog_fields:
+            if name is None:
+                continue
+            obj = registry.by_name(model, name)
+            if obj is None:
+                raise serializers.ValidationError({param: message.format(name)})
+            setattr(instance, attr, obj)
 
         # Cambios de subject/description sólo si vienen
         if 'subject' in validated_data:
@@ -110,31 +106,25 @@ class IssueUpdateSerializer(serializers.ModelSerializer):
         if 'due_date' in validated_data:
             instance.due_date = validated_data['due_date']  # Ya será None si vino vacío
 
-        # Asignar assigned_to si se pasó
+        # Asignado y watchers con una sola consulta, antes de guardar nada
+        watchers_usernames = split_usernames(watchers_usernames)
+        users, missing = resolve_usernames(
+            [assigned_username, *watchers_usernames] if assigned_username else watchers_usernames
+        )
         if assigned_username:
-            try:
-                instance.assigned_to = User.objects.get(username=assigned_username)
-            except User.DoesNotExist:
+            if assigned_username in missing:
                 raise serializers.ValidationError({
                     'assigned_to_username': f"El usuario '{assigned_username}' no existe."
                 })
+            instance.assigned_to_id = users[assigned_username]
+        if missing:
+            raise serializers.ValidationError({
+                'watchers_usernames': f"El usuario '{missing[0]}' no existe."
+            })
 
         instance.save()
 
-        # Watchers (igual que en create)
-        if len(watchers_usernames) == 1 and isinstance(watchers_usernames[0], str) and ',' in watchers_usernames[0]:
-            watchers_usernames = [u.strip() for u in watchers_usernames[0].split(',') if u.strip()]
-        for username in watchers_usernames:
-            try:
-                watcher = User.objects.get(username=username)
-                instance.watchers.add(watcher)
-            except User.DoesNotExist:
-                raise serializers.ValidationError({
-                    'watchers_usernames': f"El usuario '{username}' no existe."
-                })
-
-        # Archivos nuevos
-        for f in files:
-            Attachment.objects.create(issue=instance, file=f)
+        # Watchers (igual que en create): se añaden a los que ya hay
+        add_watchers([instance.pk], [users[username] for username in watchers_usernames])
 
         return instance
\ No newline at end of file
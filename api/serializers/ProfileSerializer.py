@@ -1,13 +1,21 @@
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from api.serializers import UserSerializer
 from issues.models import Profile
+from issues.variants import variant_urls
+from .AttachmentSerializer import IMAGE_VARIANTS_SCHEMA
 
 
 
 class ProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
+    avatar_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
-        fields = ['id', 'user', 'biography', 'avatar']
\ No newline at end of file
+        fields = ['id', 'user', 'biography', 'avatar', 'avatar_variants']
+
+    @extend_schema_field(IMAGE_VARIANTS_SCHEMA)
+    def get_avatar_variants(self, obj):
+        return variant_urls(obj.avatar, obj.avatar_variants, self.context.get('request'))
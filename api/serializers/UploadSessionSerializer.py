@@ -0,0 +1,62 @@
+import mimetypes
+
+from django.conf import settings
+from rest_framework import serializers
+
+from issues.chunked_uploads import MIN_CHUNK_SIZE
+from issues.models import UploadPart, UploadSession
+from .AttachmentSerializer import AttachmentSerializer
+
+
+class UploadSessionRequestSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255, help_text="Nombre del archivo")
+    size = serializers.IntegerField(min_value=1, help_text="Tamaño total en bytes")
+    content_type = serializers.CharField(
+        max_length=100, required=False,
+        help_text="Tipo MIME (por defecto, el que corresponde a la extensión del nombre)"
+    )
+    chunk_size = serializers.IntegerField(
+        required=False, min_value=MIN_CHUNK_SIZE,
+        help_text="Tamaño de cada parte en bytes, salvo la última (por defecto 8 MB)"
+    )
+
+    def validate_size(self, value):
+        limit = getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 5 * 1024 * 1024 * 1024)
+        if value > limit:
+            raise serializers.ValidationError(f"Como máximo {limit} bytes.")
+        return value
+
+    def validate_chunk_size(self, value):
+        limit = getattr(settings, 'CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024)
+        if value > limit:
+            raise serializers.ValidationError(f"Como máximo {limit} bytes por parte.")
+        return value
+
+    def validate(self, attrs):
+        if not attrs.get('content_type'):
+            attrs['content_type'] = mimetypes.guess_type(attrs['name'])[0] or 'application/octet-stream'
+        return attrs
+
+
+class UploadPartSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadPart
+        fields = ['number', 'size', 'md5', 'uploaded_at']
+        read_only_fields = fields
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    attachment = AttachmentSerializer(read_only=True)
+    total_chunks = serializers.IntegerField(read_only=True, help_text="Número de partes")
+    received = serializers.SerializerMethodField(help_text="Números de las partes ya recibidas")
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'attachment', 'name', 'size', 'content_type', 'chunk_size', 'total_chunks', 'received',
+            'state', 'error', 'created_at', 'expires_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_received(self, obj) -> list[int]:
+        return sorted(part.number for part in obj.parts.all())
@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from rest_framework import serializers
+from issues.bulk import reassign_user_issues
+from issues.catalogs import get_registry
+from issues.models import Status
+
+
+class UserReassignSerializer(serializers.Serializer):
+    target_username = serializers.CharField(help_text="Usuario que recibe los issues")
+    status_names = serializers.ListField(
+        child=serializers.CharField(), required=False, allow_empty=False,
+        help_text="Solo los issues con alguno de estos status (por defecto, todos)"
+    )
+    include_watchers = serializers.BooleanField(
+        default=True, help_text="Mover también las suscripciones como watcher"
+    )
+
+    def validate_target_username(self, value):
+        target = User.objects.filter(username=value).only('pk').first()
+        if target is None:
+            raise serializers.ValidationError(f"El usuario '{value}' no existe.")
+        if target.pk == self.context['source'].pk:
+            raise serializers.ValidationError("El usuario destino debe ser distinto del de origen.")
+        return target
+
+    def validate_status_names(self, value):
+        registry = get_registry()
+        statuses = []
+        for name in dict.fromkeys(value):
+            obj = registry.by_name(Status, name)
+            if obj is None:
+                raise serializers.ValidationError(f"El status '{name}' no existe.")
+            statuses.append(obj)
+        return statuses
+
+    def create(self, validated_data):
+        statuses = validated_data.get('status_names')
+        return reassign_user_issues(
+            self.context['source'].pk,
+            validated_data['target_username'].pk,
+            status_ids=[status.pk for status in statuses] if statuses else None,
+            watchers=validated_data['include_watchers'],
+        )
+
+
+class UserReassignResultSerializer(serializers.Serializer):
+    assigned = serializers.IntegerField(help_text="Issues reasignados")
+    watchers = serializers.IntegerField(help_text="Suscripciones como watcher movidas")
@@ -11,10 +11,11 @@ class UserSerializer(serializers.ModelSerializer):
 
 class ExtendedUserSerializer(serializers.ModelSerializer):
     profile_id = serializers.IntegerField(source='profile.id', read_only=True)
-    watched_issues_count = serializers.SerializerMethodField()
-    assigned_issues_count = serializers.SerializerMethodField()
-    created_issues_count = serializers.SerializerMethodField()
-    comments_count = serializers.SerializerMethodField()
+    # Contadores precalculados (UserStats): usar con select_related('profile', 'stats')
+    watched_issues_count = serializers.IntegerField(source='stats.watched_issues_count', read_only=True, default=0)
+    assigned_issues_count = serializers.IntegerField(source='stats.assigned_issues_count', read_only=True, default=0)
+    created_issues_count = serializers.IntegerField(source='stats.created_issues_count', read_only=True, default=0)
+    comments_count = serializers.IntegerField(source='stats.comments_count', read_only=True, default=0)
 
     class Meta:
         model = User
@@ -23,15 +24,3 @@ class ExtendedUserSerializer(serializers.ModelSerializer):
             'watched_issues_count', 'assigned_issues_count',
             'created_issues_count', 'comments_count'
         ]
-
-    def get_watched_issues_count(self, obj) -> int:
-        return obj.watched_issues.count()
-
-    def get_assigned_issues_count(self, obj) -> int:
-        return Issue.objects.filter(assigned_to=obj).count()
-
-    def get_created_issues_count(self, obj) -> int:
-        return obj.created_issues.count()
-
-    def get_comments_count(self, obj) -> int:
-        return obj.comments.count()
\ No newline at end of file
@@ -1,15 +1,22 @@
 
 from .UserSerializer import UserSerializer, ExtendedUserSerializer
+from .UserReassignSerializer import UserReassignSerializer
 from .AttachmentSerializer import AttachmentSerializer
 from .CommentSerializer import CommentSerializer
-from .issue_serializer import IssueSerializer
+from .issue_serializer import IssueSerializer, requested_issue_fields
 from .ProfileSerializer import ProfileSerializer
 from .StatusSerializer import StatusSerializer
 from .PrioritiesSerializer import PrioritiesSerializer
 from .TypesSerializer import TypesSerializer
 from .SeveritiesSerializer import SeveritiesSerializer
+from .CatalogsSerializer import CatalogsSerializer
+from .CatalogDeletionSerializer import CatalogDeletionSerializer
+from .DirectUploadSerializer import DirectUploadSerializer, DirectUploadRequestSerializer, AvatarUploadRequestSerializer
+from .UploadSessionSerializer import UploadSessionSerializer, UploadSessionRequestSerializer, UploadPartSerializer
+from .ApiTokenSerializer import ApiTokenSerializer, ApiTokenCreatedSerializer
 from .ProfileSerializer import ProfileSerializer
-from .issueBulk_serializer import IssueBulkItemSerializer, IssueBulkCreateSerializer
+from .issueBulk_serializer import IssueBulkItemSerializer, IssueBulkCreateSerializer, IssueBulkUpdateSerializer, \
+    IssueBulkWatchersSerializer
 from .issue_create_Serializer import IssueCreateSerializer
 from .CommentUpdateSerializer import CommentUpdateSerializer
 from .IssueUpdateSerializer import IssueUpdateSerializer
@@ -20,13 +27,27 @@ __all__ = [
     'PrioritiesSerializer',
     'TypesSerializer',
     'SeveritiesSerializer',
+    'CatalogsSerializer',
+    'CatalogDeletionSerializer',
+    'DirectUploadSerializer',
+    'DirectUploadRequestSerializer',
+    'AvatarUploadRequestSerializer',
+    'UploadSessionSerializer',
+    'UploadSessionRequestSerializer',
+    'UploadPartSerializer',
+    'ApiTokenSerializer',
+    'ApiTokenCreatedSerializer',
     'IssueSerializer',
+    'requested_issue_fields',
     'UserSerializer',
     'ExtendedUserSerializer',
+    'UserReassignSerializer',
     'AttachmentSerializer',
     'CommentSerializer',
     'IssueBulkItemSerializer',
     'IssueBulkCreateSerializer',
+    'IssueBulkUpdateSerializer',
+    'IssueBulkWatchersSerializer',
     'IssueCreateSerializer'
     'CommentUpdateSerializer',
     'IssueCreateSerializer',
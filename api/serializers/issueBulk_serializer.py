@@ -1,10 +1,26 @@
-from django.contrib.auth.models import User
+from django.conf import settings
+from django.db import transaction
 from drf_spectacular.utils import extend_schema_serializer
 from rest_framework import serializers
-from issues.models import Issue, Status, Priorities, Severities, Types
+from issues.models import Issue
+from issues.bulk import BulkValidationError, BulkIssueImporter, bulk_update_issues
+from issues.watchers import add_watchers, remove_watchers, resolve_usernames, split_usernames
+from ..filters import IssueFilter
 
 class IssueBulkItemSerializer(serializers.Serializer):
     subject     = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True)
+    due_date    = serializers.DateField(required=False, allow_null=True)
+    status_name = serializers.CharField(required=False, allow_blank=True)
+    priority_name = serializers.CharField(required=False, allow_blank=True)
+    severity_name = serializers.CharField(required=False, allow_blank=True)
+    issue_type_name = serializers.CharField(required=False, allow_blank=True)
+    assigned_to_username = serializers.CharField(required=False, allow_blank=True)
+    watchers_usernames = serializers.ListField(
+        child=serializers.CharField(allow_blank=True),
+        required=False,
+        allow_empty=True
+    )
 
 class IssueBulkResponseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,6 +28,27 @@ class IssueBulkResponseSerializer(serializers.ModelSerializer):
         fields = ['id', 'subject']
 
 
+def validate_bulk_items(items):
+    """
+    Valida los elementos de uno en uno a medida que se leen (con una sola
+    instancia del serializer) y los devuelve ya validados.
+    """
+    item_serializer = IssueBulkItemSerializer()
+    for index, item in enumerate(items):
+        try:
+            yield item_serializer.run_validation(item)
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'issues': {index: exc.detail}})
+
+
+def import_bulk_issues(user, items):
+    """Crea los issues de ``items`` (ya validados). Devuelve [(id, subject), ...]."""
+    try:
+        return BulkIssueImporter(user).run(items)
+    except BulkValidationError as exc:
+        raise serializers.ValidationError({'issues': exc.errors})
+
+
 @extend_schema_serializer(exclude_fields=['status', 'priority', 'severity', 'issue_type', 'created_by', 'assigned_to'])
 class IssueBulkCreateSerializer(serializers.Serializer):
     issues = IssueBulkItemSerializer(many=True)
@@ -19,33 +56,114 @@ class IssueBulkCreateSerializer(serializers.Serializer):
     def create(self, validated_data):
         #Para probarlo sin token
         user = self.context['request'].user
-        items = validated_data['issues']
-
-        #todo : Aqui iran los valores por defecto
-
-        #default_status   = Status.objects.get(nombre='Nuevo')
-        #default_priority = Priorities.objects.get(nombre='Normal')
-        #default_severity = Severities.objects.get(nombre='Medio')
-        #default_type     = Types.objects.get(nombre='Tarea')
-
-        to_create = []
-        for it in items:
-            to_create.append(
-                Issue(
-                    subject     = it['subject'],
-                    description = "Bulk created issue",
-                    status      = Status.objects.get(nombre='New'),
-                    priority    = Priorities.objects.get(nombre='Medium'),
-                    severity    = Severities.objects.get(nombre='Normal'),
-                    issue_type  = Types.objects.get(nombre='Bug'),
-                    created_by  = user,
-                )
-            )
-
-        # Creación masiva
-        Issue.objects.bulk_create(to_create)
-
-        # Recargar del DB para devolver IDs, timestamps, etc.
-        return Issue.objects.filter(
-            id__in=[i.id for i in to_create]
-        )
+        return import_bulk_issues(user, validated_data['issues'])
+
+
+class IssueBulkChangesSerializer(serializers.Serializer):
+    status_name = serializers.CharField(required=False)
+    priority_name = serializers.CharField(required=False)
+    severity_name = serializers.CharField(required=False)
+    issue_type_name = serializers.CharField(required=False)
+    assigned_to_username = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True,
+        help_text="Vacío o null para desasignar"
+    )
+    due_date = serializers.DateField(required=False, allow_null=True)
+    add_watchers_usernames = serializers.ListField(child=serializers.CharField(), required=False)
+    remove_watchers_usernames = serializers.ListField(child=serializers.CharField(), required=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Indica al menos un cambio.")
+        return attrs
+
+
+class IssueBulkUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False,
+        help_text="Issues a modificar"
+    )
+    filter = serializers.DictField(
+        child=serializers.CharField(), required=False,
+        help_text="Alternativa a 'ids': mismos filtros que el listado de issues (status_name, assigned_to_username...)"
+    )
+    changes = IssueBulkChangesSerializer()
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Indica 'ids' o 'filter', pero no los dos.")
+        max_items = getattr(settings, 'ISSUE_BULK_MAX_ITEMS', 100_000)
+
+        if 'filter' in attrs:
+            unknown = set(attrs['filter']) - set(IssueFilter.base_filters)
+            if not attrs['filter'] or unknown:
+                # Un filtro vacío o mal escrito seleccionaría todos los issues
+                raise serializers.ValidationError({'filter': f"Filtros no válidos: {sorted(unknown) or 'vacío'}"})
+            filterset = IssueFilter(data=attrs['filter'], queryset=Issue.objects.all())
+            if not filterset.is_valid():
+                raise serializers.ValidationError({'filter': filterset.errors})
+            attrs['ids'] = list(filterset.qs.order_by('pk').values_list('pk', flat=True)[:max_items + 1])
+
+        if len(attrs['ids']) > max_items:
+            raise serializers.ValidationError(f"Como máximo {max_items} issues por petición.")
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            updated = bulk_update_issues(validated_data['ids'], validated_data['changes'])
+        except BulkValidationError as exc:
+            raise serializers.ValidationError({'changes': exc.errors})
+        # Un resultado por id pedido, en el mismo orden
+        return [
+            {'id': pk, 'result': 'updated' if pk in updated else 'not_found'}
+            for pk in dict.fromkeys(validated_data['ids'])
+        ]
+
+
+class IssueBulkUpdateResultSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    result = serializers.ChoiceField(choices=['updated', 'not_found'])
+
+
+class IssueBulkWatchersSerializer(serializers.Serializer):
+    issue_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False,
+        help_text="Issues a los que se aplica el cambio"
+    )
+    add_usernames = serializers.ListField(child=serializers.CharField(), required=False)
+    remove_usernames = serializers.ListField(child=serializers.CharField(), required=False)
+
+    def validate(self, attrs):
+        if not attrs.get('add_usernames') and not attrs.get('remove_usernames'):
+            raise serializers.ValidationError("Indica 'add_usernames' o 'remove_usernames'.")
+        max_items = getattr(settings, 'ISSUE_BULK_MAX_ITEMS', 100_000)
+        if len(attrs['issue_ids']) > max_items:
+            raise serializers.ValidationError(f"Como máximo {max_items} issues por petición.")
+
+        add = split_usernames(attrs.get('add_usernames') or [])
+        remove = split_usernames(attrs.get('remove_usernames') or [])
+        users, missing = resolve_usernames(add + remove)
+        if missing:
+            raise serializers.ValidationError({'usernames': f"El usuario '{missing[0]}' no existe."})
+        attrs['add_ids'] = [users[name] for name in add]
+        attrs['remove_ids'] = [users[name] for name in remove]
+        return attrs
+
+    def create(self, validated_data):
+        issue_ids = list(dict.fromkeys(validated_data['issue_ids']))
+        existing = set(Issue.objects.filter(pk__in=issue_ids).values_list('pk', flat=True))
+        ids = [pk for pk in issue_ids if pk in existing]
+        with transaction.atomic():
+            added = add_watchers(ids, validated_data['add_ids'])
+            removed = remove_watchers(ids, validated_data['remove_ids'])
+        return {
+            'added': added,
+            'removed': removed,
+            'not_found': [pk for pk in issue_ids if pk not in existing],
+        }
+
+
+class IssueBulkWatchersResultSerializer(serializers.Serializer):
+    added = serializers.IntegerField(help_text="Pares issue-usuario añadidos")
+    removed = serializers.IntegerField(help_text="Pares issue-usuario quitados")
+    not_found = serializers.ListField(child=serializers.IntegerField(), help_text="Ids que no existen")
@@ -1,8 +1,11 @@
-from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import serializers
 from issues.models import (
-    Issue, Status, Priorities, Severities, Types, Attachment
+    Issue, Status, Priorities, Severities, Types
 )
+from issues.attachments import AttachmentBatch
+from issues.catalogs import get_registry
+from issues.watchers import add_watchers, resolve_usernames, split_usernames
 
 class IssueCreateSerializer(serializers.ModelSerializer):
     subject = serializers.CharField(required=True)
@@ -33,44 +36,63 @@ class IssueCreateSerializer(serializers.ModelSerializer):
         ]
 
     def create(self, validated_data):
-        # Extraemos y eliminamos los campos "name" / "usernames" / "files"
+        files = validated_data.pop('files', [])
+        # Los archivos empiezan a guardarse ya, en paralelo con el trabajo en la
+        # base de datos; si algo falla se borran y la transacción deshace el issue
+        with transaction.atomic(), AttachmentBatch(files) as attachments:
+            issue = self.create_issue(validated_data)
+            attachments.save(issue)
+        return issue
+
+    def create_issue(self, validated_data):
+        # Extraemos y eliminamos los campos "name" / "usernames"
         status_name = validated_data.pop('status_name', None) or 'New'
         priority_name = validated_data.pop('priority_name', None) or 'Medium'
         severity_name = validated_data.pop('severity_name', None) or 'Normal'
         issue_type_name = validated_data.pop('issue_type_name', None) or 'Bug'
         assigned_username = validated_data.pop('assigned_to_username', None)
         watchers_usernames = validated_data.pop('watchers_usernames', [])
-        files = validated_data.pop('files', [])
 
-        # Resolvemos o creamos instancias relacionales
-        try:
-            status_obj = Status.objects.get(nombre=status_name)
-        except Status.DoesNotExist:
+        # Resolvemos las instancias relacionales con el registro de catálogos (sin consultas)
+        registry = get_registry()
+        status_obj = registry.by_name(Status, status_name)
+        if status_obj is None:
             raise serializers.ValidationError({
                 'status_name': f"El status '{status_name}' no existe."
             })
 
-        try:
-            priority_obj = Priorities.objects.get(nombre=priority_name)
-        except Priorities.DoesNotExist:
+        priority_obj = registry.by_name(Priorities, priority_name)
+        if priority_obj is None:
             raise serializers.ValidationError({
                 'priority_name': f"La prioridad '{priority_name}' no existe."
             })
 
-        try:
-            severity_obj = Severities.objects.get(nombre=severity_name)
-        except Severities.DoesNotExist:
+        severity_obj = registry.by_name(Severities, severity_name)
+        if severity_obj is None:
             raise serializers.ValidationError({
                 'severity_name': f"La severidad '{severity_name}' no existe."
             })
 
-        try:
-            type_obj = Types.objects.get(nombre=issue_type_name)
-        except Types.DoesNotExist:
+        type_obj = registry.by_name(Types, issue_type_name)
+        if type_obj is None:
             raise serializers.ValidationError({
                 'issue_type_name': f"El tipo de issue '{issue_type_name}' no existe."
             })
 
+        # Asignado y watchers con una sola consulta, antes de crear nada
+        watchers_usernames = split_usernames(watchers_usernames)
+        users, missing = resolve_usernames(
+            [assigned_username, *watchers_usernames] if assigned_username else watchers_usernames
+        )
+        if assigned_username and assigned_username in missing:
+            raise serializers.ValidationError({
+                'assigned_to_username': f"El usuario '{assigned_username}' no existe."
+            })
+        if missing:
+            raise serializers.ValidationError({
+                'watchers_usernames': f"El usuario '{missing[0]}' no existe."
+            })
+
         # Creamos el Issue
         issue = Issue.objects.create(
             subject=validated_data['subject'],
@@ -81,36 +103,10 @@ class IssueCreateSerializer(serializers.ModelSerializer):
             issue_type=type_obj,
             created_by=self.context['request'].user,
             # assigned_to puede quedarse en null si no viene
+            assigned_to_id=users.get(assigned_username) if assigned_username else None,
         )
 
-        # Asignar "assigned_to" si se pasó username
-        if assigned_username:
-            try:
-                user = User.objects.get(username=assigned_username)
-                issue.assigned_to = user
-                issue.save()
-            except User.DoesNotExist:
-                raise serializers.ValidationError({
-                    'assigned_to_username': f"El usuario '{assigned_username}' no existe."
-                })
-
-        # Asignar watchers
-        if len(watchers_usernames) == 1 and isinstance(watchers_usernames[0], str) and ',' in watchers_usernames[0]:
-            watchers_usernames = [
-                u.strip() for u in watchers_usernames[0].split(',') if u.strip()
-            ]
-
-        for username in watchers_usernames:
-            try:
-                watcher = User.objects.get(username=username)
-                issue.watchers.add(watcher)
-            except User.DoesNotExist:
-                raise serializers.ValidationError({
-                    'watchers_usernames': f"El usuario '{username}' no existe."
-                })
-
-        # Adjuntar ficheros
-        for f in files:
-            Attachment.objects.create(issue=issue, file=f)
+        # Watchers: un único INSERT
+        add_watchers([issue.pk], [users[username] for username in watchers_usernames])
 
         return issue
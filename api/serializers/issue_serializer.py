@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from issues.models import Issue, Comment, Attachment, Status, Priorities, Severities, Types
+from issues.models import Issue, Comment, Status, Priorities, Severities, Types
 from django.contrib.auth.models import User
+from .AttachmentSerializer import AttachmentSerializer
 
 class IssueCommentSerializer(serializers.ModelSerializer):
     user = serializers.CharField(source='user.username', read_only=True)
@@ -10,10 +11,40 @@ class IssueCommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'text', 'user']
 
 
-class AttachmentSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Attachment
-        fields = ['id', 'file', 'uploaded_at']
+# Relaciones pesadas: con ?fields= o ?expand= solo se incluyen si se piden
+ISSUE_EXPANDABLE_FIELDS = ('watchers', 'attachment', 'comments')
+
+
+def requested_issue_fields(query_params):
+    """
+    Interpreta ?fields= y ?expand= (listas separadas por comas).
+
+    - Sin ninguno de los dos se devuelven todos los campos (None).
+    - ?fields= limita la respuesta a esos campos; 'id' siempre se incluye.
+    - ?expand= añade relaciones pesadas; si no hay ?fields= se parte de los
+      campos simples del issue.
+    """
+    fields_param = query_params.get('fields')
+    expand_param = query_params.get('expand')
+    if fields_param is None and expand_param is None:
+        return None
+
+    def split(value):
+        return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+    all_fields = IssueSerializer.Meta.fields
+    expand = split(expand_param)
+    if fields_param is None:
+        fields = {name for name in all_fields if name not in ISSUE_EXPANDABLE_FIELDS}
+    else:
+        fields = split(fields_param)
+
+    unknown = (fields | expand) - set(all_fields)
+    if unknown:
+        raise serializers.ValidationError({
+            'fields': f"Campos desconocidos: {', '.join(sorted(unknown))}."
+        })
+    return [name for name in all_fields if name == 'id' or name in fields or name in expand]
 
 
 class IssueSerializer(serializers.ModelSerializer):
@@ -37,3 +68,9 @@ class IssueSerializer(serializers.ModelSerializer):
             'created_by', 'assigned_to', 'watchers',
             'attachment', 'comments',
         ]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
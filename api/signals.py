@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from issues.models import ApiToken
+from .authentication import token_cache
+
+
+# --- Caché de tokens (api.authentication.token_cache) ----------------------------
+
+@receiver(post_delete, sender=ApiToken)
+def invalidate_revoked_token(sender, instance, **kwargs):
+    """Un token revocado deja de valer al instante en todos los workers."""
+    transaction.on_commit(lambda: token_cache.invalidate_key(instance.secret_hash))
+
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user(sender, instance, created, update_fields=None, **kwargs):
+    # Un usuario nuevo no está en caché, y el login solo actualiza last_login:
+    # ninguno de los dos merece vaciar la caché de todos los workers
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    transaction.on_commit(lambda: token_cache.invalidate_user(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    transaction.on_commit(lambda: token_cache.invalidate_user(instance.pk))
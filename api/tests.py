@@ -1,3 +1,97 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from issues.models import Issue, Status
+from issues.tokens import issue_token
+
+
+class KeysetCursorPaginationTests(TestCase):
+    """Recorridos completos por next/previous de api.pagination.KeysetCursorPagination."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice')
+        cls.other = User.objects.create(username='bob')
+        status = Status.objects.first()
+        assignees = [None, cls.user, cls.other]
+        for i in range(23):
+            Issue.objects.create(
+                subject=f'login error {i}' if i % 2 else f'login {i}', description='desc',
+                status=status, created_by=cls.user, assigned_to=assignees[i % 3],
+            )
+        # Empates en created_at: el desempate por id debe mantener el orden total
+        tied = list(Issue.objects.order_by('pk').values_list('pk', flat=True)[5:12])
+        Issue.objects.filter(pk__in=tied).update(created_at=timezone.now() - timedelta(days=1))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def pages(self, url):
+        """Páginas (listas de ids) siguiendo ``next``; devuelve también el último cuerpo."""
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            pages.append([row['id'] for row in body['results']])
+            url = body['next']
+        return pages, body
+
+    def assert_round_trip(self, url, expected):
+        pages, last = self.pages(url)
+        ids = [pk for page in pages for pk in page]
+        self.assertEqual(ids, expected)
+        self.assertTrue(all(len(page) <= 4 for page in pages))
+
+        # Hacia atrás desde la última página se recorren las mismas páginas
+        backwards = [pages[-1]]
+        url = last['previous']
+        while url:
+            body = self.client.get(url).json()
+            backwards.append([row['id'] for row in body['results']])
+            url = body['previous']
+        self.assertEqual(backwards[::-1], pages)
+
+    def test_default_ordering_with_ties(self):
+        expected = list(Issue.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assert_round_trip('/api/issues/?page_size=4', expected)
+
+    def test_nullable_ordering(self):
+        # Los NULL cuentan como el valor más pequeño en ambas direcciones
+        rows = list(Issue.objects.values_list('pk', 'assigned_to_id'))
+        ascending = [pk for pk, _a in sorted(rows, key=lambda row: (row[1] is not None, row[1] or 0, row[0]))]
+        self.assert_round_trip('/api/issues/?page_size=4&ordering=assigned_to', ascending)
+        self.assert_round_trip('/api/issues/?page_size=4&ordering=-assigned_to', ascending[::-1])
+
+    def test_search_by_rank(self):
+        expected = [row['id'] for row in self.client.get('/api/issues/search/error/?page_size=100').json()['results']]
+        self.assertEqual(len(expected), Issue.objects.filter(subject__contains='error').count())
+        self.assert_round_trip('/api/issues/search/error/?page_size=4', expected)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/issues/?cursor=nope').status_code, 404)
+        # Un cursor solo vale para la ordenación con la que se generó
+        cursor = self.client.get('/api/issues/?page_size=4').json()['next']
+        self.assertEqual(self.client.get(f'{cursor}&ordering=assigned_to').status_code, 404)
+
+
+class TokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+        self.client = APIClient()
+
+    def test_issued_token_authenticates(self):
+        _api_token, token = issue_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=token)
+        self.assertEqual(self.client.get('/api/issues/').status_code, 200)
 
-# Create your tests here.
+    def test_unknown_token_is_rejected(self):
+        _api_token, token = issue_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=token[:-1] + ('0' if token[-1] != '0' else '1'))
+        self.assertIn(self.client.get('/api/issues/').status_code, (401, 403))
@@ -2,7 +2,9 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
 from .views import (
-    IssueViewSet, StatusViewSet, ProfileViewSet, SeverityViewSet, CommentViewSet, TypesViewSet, PrioritiesViewSet, UserViewSet
+    IssueViewSet, StatusViewSet, ProfileViewSet, SeverityViewSet, CommentViewSet, TypesViewSet, PrioritiesViewSet, UserViewSet,
+    CatalogsView, CatalogDeletionViewSet, DirectUploadViewSet, UploadSessionViewSet,
+    TokenCacheStatsView, ApiTokenViewSet,
 )
 
 router = DefaultRouter()
@@ -13,10 +15,16 @@ router.register(r'severities', SeverityViewSet)
 router.register(r'types', TypesViewSet)
 router.register(r'priorities', PrioritiesViewSet)
 router.register(r'users', UserViewSet)
+router.register(r'tokens', ApiTokenViewSet, basename='apitoken')
+router.register(r'catalog-deletions', CatalogDeletionViewSet)
+router.register(r'uploads', DirectUploadViewSet, basename='directupload')
+router.register(r'upload-sessions', UploadSessionViewSet, basename='uploadsession')
 
 router.register(r'comments', CommentViewSet)
 
 
 urlpatterns = [
+    path('catalogs/', CatalogsView.as_view(), name='catalogs'),
+    path('auth/token-cache/', TokenCacheStatsView.as_view(), name='token-cache-stats'),
     path('', include(router.urls)),
 ]
@@ -6,6 +6,12 @@ from .comments_views import CommentViewSet
 from .types_view import TypesViewSet
 from .priorities_view import PrioritiesViewSet
 from .user_views import UserViewSet
+from .catalogs_views import CatalogsView
+from .catalog_deletion_views import CatalogDeletionViewSet
+from .direct_upload_views import DirectUploadViewSet
+from .upload_session_views import UploadSessionViewSet
+from .auth_views import TokenCacheStatsView
+from .token_views import ApiTokenViewSet
 
 __all__ = [
     'IssueViewSet',
@@ -15,5 +21,11 @@ __all__ = [
     'CommentViewSet',
     'TypesViewSet',
     'PrioritiesViewSet',
-    'UserViewSet'
+    'UserViewSet',
+    'CatalogsView',
+    'CatalogDeletionViewSet',
+    'DirectUploadViewSet',
+    'UploadSessionViewSet',
+    'TokenCacheStatsView',
+    'ApiTokenViewSet',
 ]
\ No newline at end of file
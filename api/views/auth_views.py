@@ -0,0 +1,32 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import extend_schema, OpenApiExample
+
+from ..authentication import token_cache
+
+
+class TokenCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Estadísticas de la caché de tokens",
+        description="Contadores de la caché de autenticación por token del proceso que atiende la petición "
+                    "(cada worker tiene la suya). Solo para administradores.",
+        tags=["Auth"],
+        responses={200: dict},
+        examples=[
+            OpenApiExample(
+                'TokenCacheStats',
+                response_only=True,
+                value={
+                    "size": 42, "max_size": 1000, "ttl": 300,
+                    "hits": 18230, "misses": 57, "hit_ratio": 0.9969,
+                    "evictions": 0, "invalidations": 3,
+                },
+            ),
+        ],
+    )
+    def get(self, request):
+        return Response(token_cache.stats())
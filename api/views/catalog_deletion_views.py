@@ -0,0 +1,60 @@
+from rest_framework import mixins, viewsets, status
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
+
+from issues.models import CatalogDeletion
+from ..serializers import CatalogDeletionSerializer
+
+
+def catalog_deletion_response(job, request):
+    """
+    Respuesta del DELETE de un catálogo: 204 si ya se ha borrado, 202 con el
+    trabajo (y su URL en Location) si sigue en segundo plano, 500 si falló.
+    """
+    if job.state == CatalogDeletion.DONE:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    data = CatalogDeletionSerializer(job).data
+    if job.state == CatalogDeletion.FAILED:
+        return Response(data, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    location = reverse('catalogdeletion-detail', args=[job.pk], request=request)
+    return Response(data, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar borrados de catálogos",
+        description="Borrados de statuses, priorities, types y severities, del más reciente al más antiguo.",
+        tags=["Catalogs"],
+        responses=CatalogDeletionSerializer(many=True),
+    ),
+    retrieve=extend_schema(
+        summary="Progreso de un borrado de catálogo",
+        description="Estado de un borrado lanzado con DELETE sobre un catálogo: issues reasignados ('processed') "
+                    "sobre el total y 'state' (pending, running, done o failed). La entrada del catálogo solo "
+                    "desaparece cuando el estado es 'done'.",
+        tags=["Catalogs"],
+        parameters=[OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del borrado")],
+        responses=CatalogDeletionSerializer,
+        examples=[
+            OpenApiExample(
+                'CatalogDeletionRunning',
+                response_only=True,
+                value={
+                    "id": 3, "catalog": "status", "object_id": 7, "nombre": "Blocked", "replacement_id": 1,
+                    "state": "running", "total": 500000, "processed": 212000, "progress": 0.424,
+                    "error": "", "created_at": "2025-05-02T10:00:00Z", "finished_at": None,
+                },
+            ),
+        ],
+    ),
+)
+class CatalogDeletionViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet
+):
+    queryset = CatalogDeletion.objects.order_by('-pk')
+    serializer_class = CatalogDeletionSerializer
+    filterset_fields = ['catalog', 'state']
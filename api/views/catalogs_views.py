@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
+
+from issues.catalogs import get_registry
+from issues.models import Status, Priorities, Types, Severities
+from ..serializers import CatalogsSerializer
+
+# Un año: la respuesta de una versión concreta no cambia nunca
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class CatalogsView(APIView):
+    """
+    Los cuatro catálogos en una sola respuesta, servida desde el registro de
+    catálogos (sin consultas) y pensada para guardarse en la caché del cliente.
+    """
+
+    @extend_schema(
+        summary="Obtener todos los catálogos",
+        description="Devuelve statuses, priorities, types y severities junto con la versión global de los "
+                    "catálogos. La respuesta lleva un ETag derivado de la versión y se puede reutilizar "
+                    "durante CATALOGS_MAX_AGE segundos. Si se pide con ?version=<versión actual> se marca "
+                    "como inmutable (un año): al cambiar cualquier catálogo cambia la versión y, con ella, "
+                    "la URL.",
+        tags=["Catalogs"],
+        parameters=[
+            OpenApiParameter('version', OpenApiTypes.STR, OpenApiParameter.QUERY,
+                             description="Versión conocida por el cliente"),
+        ],
+        responses=CatalogsSerializer,
+        examples=[
+            OpenApiExample(
+                'CatalogsExample',
+                response_only=True,
+                value={
+                    "version": "4f1c0a9e2b7d4c35a1f0e6d2b9c87a13",
+                    "statuses": [{"id": 1, "nombre": "New", "slug": "new", "color": "#70728F"}],
+                    "priorities": [{"id": 2, "nombre": "Medium", "color": "#4B8E36"}],
+                    "types": [{"id": 1, "nombre": "Bug", "color": "#E44057"}],
+                    "severities": [{"id": 3, "nombre": "Normal", "color": "#A8E440"}],
+                },
+            ),
+        ],
+    )
+    def get(self, request):
+        registry = get_registry()
+        etag = quote_etag(registry.version)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is not None and response.status_code != 304:
+            return response
+        if response is None:
+            serializer = CatalogsSerializer({
+                'version': registry.version,
+                'statuses': registry.all(Status),
+                'priorities': registry.all(Priorities),
+                'types': registry.all(Types),
+                'severities': registry.all(Severities),
+            })
+            response = Response(serializer.data)
+        else:
+            response = Response(status=304)
+
+        response['ETag'] = etag
+        if request.query_params.get('version') == registry.version:
+            patch_cache_control(response, private=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+        else:
+            patch_cache_control(response, private=True, max_age=settings.CATALOGS_MAX_AGE)
+        return response
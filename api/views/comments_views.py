@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 
 from issues.models import Comment, Issue
 from api.serializers import CommentSerializer, CommentUpdateSerializer
+from api.pagination import CommentCursorPagination, LatestCommentsPagination
 
 from drf_spectacular.utils import (
     extend_schema_view, extend_schema,
@@ -94,6 +95,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'put', 'delete']
     queryset = Comment.objects.all().order_by('-published_at')
     permission_classes = [IsAuthenticated]
+    pagination_class = CommentCursorPagination
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -112,7 +114,7 @@ class CommentViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def get_queryset(self):
-        queryset = Comment.objects.all().order_by('-published_at')
+        queryset = Comment.objects.all().select_related('user').order_by('-published_at')
         issue_id = self.request.query_params.get('issue')
         if issue_id is not None:
             queryset = queryset.filter(issue__id=issue_id)
@@ -141,20 +143,19 @@ class CommentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='my-comments')
     def user_comments(self, request):
-        comments = Comment.objects.filter(user=request.user).order_by('-published_at')
-        serializer = self.get_serializer(comments, many=True)
-        return Response({
-            'count': comments.count(),
-            'results': serializer.data
-        })
+        comments = Comment.objects.filter(user=request.user).select_related('user')
+        page = self.paginate_queryset(comments)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['count'] = comments.count()
+        return response
 
 
-    @action(detail=False, methods=['get'], url_path='latest')
+    @action(detail=False, methods=['get'], url_path='latest', pagination_class=LatestCommentsPagination)
     def latest_comments(self, request):
-        limit = int(request.query_params.get('limit', 10))
-        comments = Comment.objects.all().order_by('-published_at')[:limit]
-        serializer = self.get_serializer(comments, many=True)
-        return Response({
-            'count': len(serializer.data),
-            'results': serializer.data
-        })
+        comments = Comment.objects.all().select_related('user')
+        page = self.paginate_queryset(comments)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['count'] = len(serializer.data)
+        return response
@@ -0,0 +1,108 @@
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
+
+from issues.direct_uploads import DirectUploadError, finalize_upload, start_upload
+from issues.models import DirectUpload
+from ..serializers import DirectUploadSerializer
+
+
+# Estado tras confirmar la subida -> código de la respuesta
+FINALIZE_STATUS = {
+    DirectUpload.DONE: status.HTTP_200_OK,
+    DirectUpload.PENDING: status.HTTP_409_CONFLICT,
+    DirectUpload.FAILED: status.HTTP_400_BAD_REQUEST,
+}
+
+DIRECT_UPLOAD_EXAMPLE = OpenApiExample(
+    'DirectUploadPending',
+    response_only=True,
+    value={
+        "id": 12, "target": "attachment",
+        "attachment": {
+            "id": 40, "file": None, "name": "informe.pdf", "size": 482133, "state": "awaiting",
+            "error": "", "uploaded_at": "2025-05-02T10:00:00Z",
+        },
+        "name": "informe.pdf", "size": 482133, "md5": "9e107d9d372bb6826bd81d3542a419d6",
+        "content_type": "application/pdf", "state": "pending", "error": "",
+        "upload": {
+            "method": "PUT",
+            "url": "https://bucket.s3.eu-west-1.amazonaws.com/media/attachments/3f2a.../informe.pdf?X-Amz-...",
+            "headers": {
+                "Content-Type": "application/pdf", "Content-MD5": "nhB9nTcrtoJr2B01QqQZ1g==",
+                "x-amz-acl": "public-read",
+            },
+            "expires_at": "2025-05-02T10:15:00Z",
+        },
+        "created_at": "2025-05-02T10:00:00Z", "expires_at": "2025-05-02T10:15:00Z", "finished_at": None,
+    },
+)
+
+
+def start_upload_response(request, serializer, target, issue=None):
+    """
+    Crea la subida directa con los datos ya validados de ``serializer`` y
+    responde 201 con la URL prefirmada (y la del recurso en Location), o 501 si
+    el almacenamiento no admite subidas directas.
+    """
+    data = serializer.validated_data
+    try:
+        upload = start_upload(
+            request.user, target, data['name'], data['size'], data['md5'], data['content_type'], issue=issue
+        )
+    except DirectUploadError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    location = reverse('directupload-detail', args=[upload.pk], request=request)
+    return Response(
+        DirectUploadSerializer(upload).data, status=status.HTTP_201_CREATED, headers={'Location': location}
+    )
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar subidas directas",
+        description="Subidas directas al almacenamiento del usuario actual, de la más reciente a la más antigua.",
+        tags=["Uploads"],
+        responses=DirectUploadSerializer(many=True),
+    ),
+    retrieve=extend_schema(
+        summary="Estado de una subida directa",
+        description="Devuelve una subida directa del usuario actual. Mientras está 'pending' incluye en 'upload' "
+                    "una URL prefirmada nueva (válida hasta 'expires_at').",
+        tags=["Uploads"],
+        parameters=[OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID de la subida")],
+        responses=DirectUploadSerializer,
+        examples=[DIRECT_UPLOAD_EXAMPLE],
+    ),
+    finalize=extend_schema(
+        summary="Confirmar una subida directa",
+        description="Se llama después de subir el archivo a la URL prefirmada. Comprueba en el almacenamiento que "
+                    "el tamaño y el MD5 son los declarados y enlaza el archivo con el attachment o el avatar. "
+                    "Responde 200 si la subida queda 'done', 409 si el archivo aún no está en el almacenamiento "
+                    "(se puede repetir) y 400 si no coincide, en cuyo caso la subida queda 'failed', se descarta "
+                    "el archivo y hay que empezar de nuevo.",
+        tags=["Uploads"],
+        parameters=[OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID de la subida")],
+        request=None,
+        responses={200: DirectUploadSerializer, 400: DirectUploadSerializer, 409: DirectUploadSerializer},
+    ),
+)
+class DirectUploadViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet
+):
+    queryset = DirectUpload.objects.select_related('attachment').order_by('-pk')
+    serializer_class = DirectUploadSerializer
+    filterset_fields = ['target', 'state']
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        upload = finalize_upload(self.get_object().pk)
+        return Response(self.get_serializer(upload).data, status=FINALIZE_STATUS[upload.state])
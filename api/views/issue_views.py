@@ -1,8 +1,10 @@
 from absl.testing.parameterized import parameters
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Max
 from django.http import QueryDict
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
@@ -13,12 +15,28 @@ from drf_spectacular.utils import (
     OpenApiParameter, OpenApiTypes, OpenApiExample
 )
 
-from issues.models import Issue, Attachment
-from ..filters import IssueFilter
+from issues.attachments import AttachmentBatch, attach_blob
+from issues.direct_uploads import clean_upload_name
+from issues.models import Issue, Attachment, DirectUpload
+from issues.upload_handlers import stream_uploads
+from issues.models import Trigram
+from issues.search import search_issues
+from issues.trigrams import fuzzy_search
+from ..conditional import ConditionalGetMixin
+from ..filters import IssueFilter, IssueOrderingFilter, fuzzy_requested
+from ..pagination import IssueCursorPagination
+from ..parsers import IssueBulkJSONParser, NDJSONParser
+from ..querysets import plan_issue_queryset
 from ..serializers import IssueSerializer, AttachmentSerializer, IssueBulkCreateSerializer, IssueCreateSerializer, \
-    IssueUpdateSerializer
+    IssueUpdateSerializer, DirectUploadRequestSerializer, DirectUploadSerializer, UploadSessionRequestSerializer, \
+    UploadSessionSerializer, requested_issue_fields
 from ..serializers.IssueUpdateSerializer import IssueUpdateSerializer
-from ..serializers.issueBulk_serializer import IssueBulkResponseSerializer
+from .direct_upload_views import DIRECT_UPLOAD_EXAMPLE, start_upload_response
+from .upload_session_views import UPLOAD_SESSION_EXAMPLE, start_session_response
+from ..serializers.issueBulk_serializer import (
+    IssueBulkItemSerializer, IssueBulkResponseSerializer, IssueBulkUpdateResultSerializer, IssueBulkUpdateSerializer,
+    IssueBulkWatchersResultSerializer, IssueBulkWatchersSerializer, import_bulk_issues, validate_bulk_items
+)
 
 
 class AttachmentUploadSerializer(serializers.Serializer):
@@ -30,6 +48,11 @@ class AttachmentUploadSerializer(serializers.Serializer):
     )
 
 
+class AttachmentByHashSerializer(serializers.Serializer):
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', help_text="SHA-256 del contenido, en hexadecimal")
+    name = serializers.CharField(max_length=255, help_text="Nombre del archivo")
+
+
 def normalize_request_data(request_data, request_files=None):
     """
     Normaliza los datos de request para manejar tanto JSON como form-data
@@ -84,6 +107,14 @@ def normalize_request_data(request_data, request_files=None):
     return clean_data
 
 
+ISSUE_FIELDS_PARAMETERS = [
+    OpenApiParameter('fields', OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Campos a devolver separados por comas (p. ej. id,subject,status,assigned_to)"),
+    OpenApiParameter('expand', OpenApiTypes.STR, OpenApiParameter.QUERY,
+                     description="Relaciones a incluir separadas por comas: watchers, attachment, comments"),
+]
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="Listar issues",
@@ -106,6 +137,7 @@ def normalize_request_data(request_data, request_files=None):
                              description="Filter by creator user ID"),
             OpenApiParameter('created_by_username', OpenApiTypes.STR, OpenApiParameter.QUERY,
                              description="Filter by creator username"),
+            *ISSUE_FIELDS_PARAMETERS,
         ],
         examples=[
             OpenApiExample(
@@ -138,6 +170,7 @@ def normalize_request_data(request_data, request_files=None):
         tags=["Issues"],
         parameters=[
             OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del issue"),
+            *ISSUE_FIELDS_PARAMETERS,
         ],
         responses=IssueSerializer,
         examples=[
@@ -408,21 +441,8 @@ def normalize_request_data(request_data, request_files=None):
         ],
         responses={204: None},
     ),
-    add_attachment=extend_schema(
-        summary="Añadir archivos a un issue",
-        description="Adjunta uno o varios archivos a un issue existente.",
-        tags=["Issues"],
-        request=AttachmentUploadSerializer,
-        responses=AttachmentSerializer(many=True),
-        examples=[
-            OpenApiExample(
-                'Ejemplo Request Add Attachment',
-                value={"file": ["<file1>", "<file2>"]},
-                request_only=True
-            )
-        ]
-    ),
     remove_attachment=extend_schema(
+        methods=['DELETE'],
         summary="Eliminar un archivo adjunto",
         description="Elimina un attachment específico de un issue.",
         tags=["Issues"],
@@ -433,18 +453,19 @@ def normalize_request_data(request_data, request_files=None):
         responses={204: None}
     ),
 )
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'put', 'delete', 'patch']
     queryset = Issue.objects.all()
     parser_classes = [MultiPartParser, FormParser, JSONParser]
 
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IssueOrderingFilter]
     filterset_class = IssueFilter
     ordering_fields = [
         'created_at', 'updated_at', 'priority', 'status', 'severity',
         'issue_type', 'created_by', 'assigned_to'
     ]
     ordering = ['-created_at']
+    pagination_class = IssueCursorPagination
 
     serializer_class = IssueSerializer
 
@@ -455,21 +476,73 @@ class IssueViewSet(viewsets.ModelViewSet):
             return IssueUpdateSerializer
         elif self.action == 'bulk_create':
             return IssueBulkCreateSerializer
+        elif self.action == 'bulk_update':
+            return IssueBulkUpdateSerializer
+        elif self.action == 'bulk_watchers':
+            return IssueBulkWatchersSerializer
         return IssueSerializer
 
+    # Acciones masivas: no usan el queryset ni los filtros de la vista
+    bulk_actions = ('bulk_create', 'bulk_update', 'bulk_watchers')
+
+    # Acciones que responden con IssueSerializer a partir del queryset de la vista
+    planned_actions = ('list', 'retrieve', 'search', 'destroy')
+
+    def get_requested_fields(self):
+        """Campos pedidos con ?fields= / ?expand= (None si se devuelven todos)."""
+        if self.action not in self.planned_actions:
+            return None
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = requested_issue_fields(self.request.query_params)
+        return self._requested_fields
+
     def get_queryset(self):
         qs = super().get_queryset()
-        if self.action == 'bulk_create':
+        if self.action in self.bulk_actions:
             return qs.none()
+        if self.action in self.planned_actions:
+            return plan_issue_queryset(qs, self.get_requested_fields())
         return qs
 
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields is not None and self.get_serializer_class() is IssueSerializer:
+            kwargs['fields'] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    def get_issue_response_data(self, issue):
+        """
+        Serializa un issue recién creado o modificado recargándolo con el plan de
+        consultas, en lugar de resolver cada relación por separado.
+        """
+        planned = plan_issue_queryset(Issue.objects.filter(pk=issue.pk)).get()
+        return IssueSerializer(planned).data
+
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
 
+    def get_list_version(self):
+        # El número de filas detecta los borrados, que no dejan rastro en updated_at;
+        # por eso el listado no lleva Last-Modified
+        stats = self.filter_queryset(self.get_queryset()).aggregate(
+            count=Count('pk'), last_modified=Max('updated_at'), last_id=Max('pk')
+        )
+        last_modified = stats['last_modified'].isoformat() if stats['last_modified'] else ''
+        return f"{stats['count']}:{stats['last_id']}:{last_modified}", None
+
+    def get_object_version(self):
+        updated_at = self.get_lookup_queryset().values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None, None
+        return f"{self.kwargs[self.lookup_url_kwarg or self.lookup_field]}:{updated_at.isoformat()}", updated_at
+
     def create(self, request, *args, **kwargs):
+        # Con S3 los archivos de 'files' se suben según llegan
+        stream_uploads(request, Attachment._meta.get_field('file'))
+
         # Normalizar datos usando la función auxiliar
         clean_data = normalize_request_data(request.data, request.FILES)
 
@@ -481,58 +554,51 @@ class IssueViewSet(viewsets.ModelViewSet):
         issue = create_serializer.save(created_by=request.user)
 
         # Devolver respuesta
-        response_serializer = IssueSerializer(issue)
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        return Response(self.get_issue_response_data(issue), status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        # Con S3 los archivos de 'files' se suben según llegan
+        stream_uploads(request, Attachment._meta.get_field('file'))
+
         # Normalizar datos usando la función auxiliar
         clean_data = normalize_request_data(request.data, request.FILES)
 
         # Actualizar issue
-        partial = kwargs.pop('partial', False)
-        instance = self.get_object()
         update_serializer = self.get_serializer(instance, data=clean_data, partial=partial)
         update_serializer.is_valid(raise_exception=True)
 
-        # Guardar cambios
+        # Guardar cambios (los archivos de 'files' los adjunta el serializer)
         issue = update_serializer.save()
 
-        # Manejar archivos si existen
-        if request.FILES:
-            for f in request.FILES.getlist('files'):
-                Attachment.objects.create(issue=issue, file=f)
-
         # Devolver respuesta
-        response_serializer = IssueSerializer(issue)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(self.get_issue_response_data(issue), status=status.HTTP_200_OK)
 
     def partial_update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', True)
+        instance = self.get_object()
+        # Con S3 los archivos de 'files' se suben según llegan
+        stream_uploads(request, Attachment._meta.get_field('file'))
+
         # Normalizar datos usando la función auxiliar
         clean_data = normalize_request_data(request.data, request.FILES)
 
         # Actualizar parcialmente
-        partial = kwargs.pop('partial', True)
-        instance = self.get_object()
         update_serializer = self.get_serializer(instance, data=clean_data, partial=partial)
         update_serializer.is_valid(raise_exception=True)
 
-        # Guardar cambios
+        # Guardar cambios (los archivos de 'files' los adjunta el serializer)
         issue = update_serializer.save()
 
-        # Manejar archivos si existen
-        if request.FILES:
-            for f in request.FILES.getlist('files'):
-                Attachment.objects.create(issue=issue, file=f)
-
         # Devolver respuesta
-        response_serializer = IssueSerializer(issue)
-        return Response(response_serializer.data, status=status.HTTP_200_OK)
+        return Response(self.get_issue_response_data(issue), status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
 
         # Guardar datos antes de eliminar
-        response_data = IssueSerializer(instance).data
+        response_data = self.get_serializer(instance).data
 
         self.perform_destroy(instance)
 
@@ -541,10 +607,18 @@ class IssueViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Permite crear muchos issues a la vez",
-        description="Crea múltiples issues sin aplicar filtros ni paginación.",
+        description="Crea múltiples issues sin aplicar filtros ni paginación. El cuerpo se lee y se valida "
+                    "en streaming y los issues se insertan por bloques (ISSUE_BULK_CHUNK_SIZE) en una sola "
+                    "transacción, hasta ISSUE_BULK_MAX_ITEMS por petición. Cada elemento puede indicar su "
+                    "status, prioridad, severidad, tipo, asignado y watchers por nombre. También acepta "
+                    "application/x-ndjson, un elemento por línea. Si algún elemento no es válido no se crea "
+                    "ninguno. Devuelve el id y el subject de cada issue creado, en el mismo orden.",
         tags=["Issues"],
-        request=IssueBulkCreateSerializer,
-        responses={201: IssueSerializer(many=True)},
+        request={
+            'application/json': IssueBulkCreateSerializer,
+            'application/x-ndjson': IssueBulkItemSerializer,
+        },
+        responses={201: IssueBulkResponseSerializer(many=True)},
         filters=False,
         examples=[
             OpenApiExample(
@@ -554,7 +628,12 @@ class IssueViewSet(viewsets.ModelViewSet):
                 value={
                     "issues": [
                         {"subject": "Error al guardar perfil"},
-                        {"subject": "Mejorar rendimiento API"}
+                        {
+                            "subject": "Mejorar rendimiento API",
+                            "priority_name": "High",
+                            "assigned_to_username": "david",
+                            "watchers_usernames": ["victor"]
+                        }
                     ]
                 },
                 request_only=True,
@@ -576,30 +655,155 @@ class IssueViewSet(viewsets.ModelViewSet):
         detail=False,
         methods=['post'],
         url_path='bulk-create',
-        parser_classes=[JSONParser],
+        parser_classes=[IssueBulkJSONParser, NDJSONParser],
         filter_backends=[],
         pagination_class=None,
         serializer_class=IssueBulkResponseSerializer
     )
     def bulk_create(self, request):
-        in_serializer = IssueBulkCreateSerializer(data=request.data, context={'request': request})
-        in_serializer.is_valid(raise_exception=True)
-        created_qs = in_serializer.save()
+        data = request.data
+        if isinstance(data, dict):
+            # Cuerpo vacío: la validación normal explica qué falta
+            in_serializer = IssueBulkCreateSerializer(data=data, context={'request': request})
+            in_serializer.is_valid(raise_exception=True)
+            created = in_serializer.save()
+        else:
+            # Iterador del parser: se valida e inserta a medida que se lee el cuerpo
+            created = import_bulk_issues(request.user, validate_bulk_items(data))
+
+        # Ids y subjects ya están en memoria: no se vuelve a consultar
+        return Response([{'id': pk, 'subject': subject} for pk, subject in created], status=status.HTTP_201_CREATED)
 
-        out_serializer = IssueSerializer(created_qs, many=True)
-        return Response(out_serializer.data, status=status.HTTP_201_CREATED)
+    @extend_schema(
+        summary="Modificar muchos issues a la vez",
+        description="Aplica el mismo cambio (catálogos, asignado, fecha límite, watchers añadidos o quitados) a una "
+                    "lista de ids o a los issues que cumplan un filtro, con unas pocas sentencias UPDATE/INSERT/"
+                    "DELETE por bloque en una sola transacción. Devuelve un resultado por id: 'updated' o "
+                    "'not_found'. Si algún nombre no existe no se modifica nada.",
+        tags=["Issues"],
+        request=IssueBulkUpdateSerializer,
+        responses={200: IssueBulkUpdateResultSerializer(many=True)},
+        filters=False,
+        examples=[
+            OpenApiExample(
+                name="Bulk Update Request",
+                summary="Cambiar status y asignado de tres issues",
+                value={
+                    "ids": [10, 11, 99],
+                    "changes": {
+                        "status_name": "In Progress",
+                        "assigned_to_username": "david",
+                        "add_watchers_usernames": ["victor"]
+                    }
+                },
+                request_only=True,
+            ),
+            OpenApiExample(
+                name="Bulk Update By Filter",
+                summary="Subir la prioridad de todos los issues asignados a david",
+                value={
+                    "filter": {"assigned_to_username": "david"},
+                    "changes": {"priority_name": "High"}
+                },
+                request_only=True,
+            ),
+            OpenApiExample(
+                name="Bulk Update Response",
+                summary="Resultado por id",
+                value=[
+                    {"id": 10, "result": "updated"},
+                    {"id": 11, "result": "updated"},
+                    {"id": 99, "result": "not_found"}
+                ],
+                response_only=True,
+                status_codes=["200"],
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=['patch'],
+        url_path='bulk',
+        parser_classes=[JSONParser],
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def bulk_update(self, request):
+        serializer = IssueBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Añadir o quitar watchers en muchos issues",
+        description="Añade los usuarios de 'add_usernames' y quita los de 'remove_usernames' como watchers de todos "
+                    "los issues de 'issue_ids'. Los nombres se resuelven con una sola consulta y las filas se "
+                    "insertan y borran por bloques; los pares que ya existían no cuentan como añadidos. Si algún "
+                    "usuario no existe no se modifica nada.",
+        tags=["Issues"],
+        request=IssueBulkWatchersSerializer,
+        responses={200: IssueBulkWatchersResultSerializer},
+        filters=False,
+        examples=[
+            OpenApiExample(
+                name="Bulk Watchers Request",
+                summary="Añadir dos watchers y quitar uno en tres issues",
+                value={
+                    "issue_ids": [10, 11, 99],
+                    "add_usernames": ["david", "victor"],
+                    "remove_usernames": ["maria"]
+                },
+                request_only=True,
+            ),
+            OpenApiExample(
+                name="Bulk Watchers Response",
+                summary="Filas añadidas y quitadas",
+                value={"added": 3, "removed": 2, "not_found": [99]},
+                response_only=True,
+                status_codes=["200"],
+            ),
+        ],
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk-watchers',
+        parser_classes=[JSONParser],
+        filter_backends=[],
+        pagination_class=None,
+    )
+    def bulk_watchers(self, request):
+        serializer = IssueBulkWatchersSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
 
     @extend_schema(
         summary="Buscar issues por texto",
-        description="Devuelve todos los issues cuyo subject o description contienen el término dado.",
+        description="Búsqueda de texto completo sobre subject, description y comentarios, ordenada por relevancia "
+                    "('rank') salvo que se indique otra ordenación. Admite frases entre comillas "
+                    "(\"login error\") y prefijos (log*); todos los términos deben aparecer. "
+                    "Con fuzzy=1 busca por similitud de trigramas en el subject, tolerando errores "
+                    "tipográficos ('login eror' encuentra 'Login error').",
         tags=["Issues"],
         parameters=[
             OpenApiParameter(
                 name="term",
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.PATH,
-                description="Texto a buscar en subject o description",
-            )
+                description="Texto a buscar en subject, description o comentarios",
+            ),
+            OpenApiParameter(
+                name="ordering",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description="Ordenación; por defecto '-rank' (más relevantes primero)",
+            ),
+            OpenApiParameter(
+                name="fuzzy",
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="Búsqueda aproximada por trigramas sobre el subject",
+            ),
+            *ISSUE_FIELDS_PARAMETERS,
         ],
         responses=IssueSerializer(many=True),
         examples=[
@@ -659,10 +863,11 @@ class IssueViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'], url_path=r'search/(?P<term>[^/.]+)')
     def search(self, request, term=None):
-        qs = self.get_queryset().filter(
-            Q(subject__icontains=term) |
-            Q(description__icontains=term)
-        )
+        if fuzzy_requested(request.query_params):
+            qs = fuzzy_search(self.get_queryset(), Trigram.SUBJECT, term)
+        else:
+            qs = search_issues(self.get_queryset(), term)
+        qs = self.filter_queryset(qs)
         page = self.paginate_queryset(qs)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -671,7 +876,7 @@ class IssueViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     def filter_queryset(self, queryset):
-        if self.action == 'bulk_create':
+        if self.action in self.bulk_actions:
             return queryset
         return super().filter_queryset(queryset)
 
@@ -723,6 +928,7 @@ class IssueViewSet(viewsets.ModelViewSet):
             )
 
     @extend_schema(
+        methods=['DELETE'],
         summary="Eliminar attachment de un issue",
         description="Elimina un attachment específico de un issue.",
         tags=["Issues"],
@@ -752,9 +958,7 @@ class IssueViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
 
-            # Eliminar el archivo del storage y el registro de la base de datos
-            if attachment.file:
-                attachment.file.delete(save=False)
+            # El archivo y sus miniaturas se borran del storage tras el commit (issues.storage_gc)
             attachment.delete()
 
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -770,6 +974,24 @@ class IssueViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @extend_schema(
+        summary="Estado de un attachment",
+        description="Devuelve un attachment del issue. Mientras 'state' es 'pending' el archivo se está subiendo "
+                    "al almacenamiento y 'file' es null; pasa a 'stored' al terminar o a 'failed' (con 'error') "
+                    "si la subida falla.",
+        tags=["Issues"],
+        parameters=[
+            OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del issue"),
+            OpenApiParameter('attachment_id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del attachment"),
+        ],
+        responses={200: AttachmentSerializer, 404: {"description": "Issue o attachment no encontrado"}},
+    )
+    @remove_attachment.mapping.get
+    def attachment_detail(self, request, pk=None, attachment_id=None):
+        issue = self.get_object()
+        attachment = get_object_or_404(Attachment, pk=attachment_id, issue=issue)
+        return Response(AttachmentSerializer(attachment).data)
+
     @extend_schema(
         summary="Remover asignación de un issue",
         description="Elimina la asignación (assigned_to) de un issue, dejándolo sin asignar.",
@@ -835,8 +1057,10 @@ class IssueViewSet(viewsets.ModelViewSet):
             )
 
     @extend_schema(
+        methods=['DELETE'],
         summary="Eliminar todos los attachments de un issue",
-        description="Elimina todos los attachments de un issue de una vez.",
+        description="Elimina todos los attachments de un issue de una vez. Sus archivos se borran del "
+                    "almacenamiento por lotes después de responder.",
         tags=["Issues"],
         parameters=[
             OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del issue"),
@@ -853,12 +1077,8 @@ class IssueViewSet(viewsets.ModelViewSet):
         try:
             issue = self.get_object()
 
-            # Eliminar todos los archivos del storage
-            for attachment in issue.attachment.all():
-                if attachment.file:
-                    attachment.file.delete(save=False)
-
-            # Eliminar todos los registros de la base de datos
+            # Se borran los registros; sus archivos se borran del storage por lotes
+            # tras el commit (issues.storage_gc)
             issue.attachment.all().delete()
 
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -867,4 +1087,129 @@ class IssueViewSet(viewsets.ModelViewSet):
             return Response(
                 {"detail": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+    @extend_schema(
+        summary="Añadir archivos a un issue",
+        description="Adjunta uno o varios archivos a un issue existente. Responde en cuanto los archivos están "
+                    "recibidos, con los attachments en estado 'pending'; la subida al almacenamiento sigue en "
+                    "segundo plano y su estado se consulta en /api/issues/{id}/attachments/{attachment_id}/. "
+                    "Con almacenamiento S3 los archivos se envían al bucket a medida que llegan y los attachments "
+                    "se devuelven ya en 'stored'.",
+        tags=["Issues"],
+        request=AttachmentUploadSerializer,
+        responses={202: AttachmentSerializer(many=True)},
+        examples=[
+            OpenApiExample(
+                'Ejemplo Request Add Attachment',
+                value={"file": ["<file1>", "<file2>"]},
+                request_only=True
+            )
+        ]
+    )
+    @remove_all_attachments.mapping.post
+    def add_attachment(self, request, pk=None):
+        """Adjuntar archivos a un issue; se suben según llegan (S3) o en segundo plano"""
+        issue = self.get_object()
+        stream_uploads(request, Attachment._meta.get_field('file'))
+        serializer = AttachmentUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic(), AttachmentBatch(serializer.validated_data['file']) as batch:
+            attachments = batch.save(issue)
+        return Response(AttachmentSerializer(attachments, many=True).data, status=status.HTTP_202_ACCEPTED)
+
+    @extend_schema(
+        summary="Adjuntar un archivo ya subido por su SHA-256",
+        description="Antes de enviar un archivo, el cliente puede calcular su SHA-256 y probar aquí: si ese contenido "
+                    "ya está en el almacenamiento (otro attachment lo subió antes) se crea el attachment ya en "
+                    "'stored' sin enviar los bytes. Si responde 404, hay que subirlo por cualquiera de las otras vías.",
+        tags=["Issues"],
+        parameters=[
+            OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del issue"),
+        ],
+        request=AttachmentByHashSerializer,
+        responses={201: AttachmentSerializer, 404: {"description": "No hay ningún archivo con ese contenido"}},
+        examples=[
+            OpenApiExample(
+                'Ejemplo Request Attachment By Hash',
+                value={
+                    "sha256": "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855",
+                    "name": "captura.png",
+                },
+                request_only=True
+            )
+        ]
+    )
+    @action(detail=True, methods=['post'], url_path='attachment-by-hash', parser_classes=[JSONParser])
+    def attach_by_hash(self, request, pk=None):
+        """Adjuntar un archivo que ya está en el almacenamiento, sin volver a subirlo"""
+        issue = self.get_object()
+        serializer = AttachmentByHashSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        attachment = attach_blob(
+            issue, serializer.validated_data['sha256'].lower(), clean_upload_name(serializer.validated_data['name'])
+        )
+        if attachment is None:
+            return Response(
+                {"detail": "No hay ningún archivo con ese contenido; hay que subirlo."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(AttachmentSerializer(attachment).data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        summary="Preparar la subida directa de un archivo",
+        description="Alternativa a enviar el archivo en multipart: crea el attachment en estado 'awaiting' y "
+                    "devuelve en 'upload' una URL prefirmada con la que el cliente sube el archivo directamente al "
+                    "almacenamiento (PUT con las cabeceras indicadas). Después hay que confirmarla con "
+                    "POST /api/uploads/{upload_id}/finalize/. Responde 501 si el almacenamiento no es S3.",
+        tags=["Issues"],
+        parameters=[
+            OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del issue"),
+        ],
+        request=DirectUploadRequestSerializer,
+        responses={201: DirectUploadSerializer, 501: {"description": "El almacenamiento no admite subidas directas"}},
+        examples=[
+            OpenApiExample(
+                'Ejemplo Request Attachment Upload',
+                value={"name": "informe.pdf", "size": 482133, "md5": "9e107d9d372bb6826bd81d3542a419d6"},
+                request_only=True
+            ),
+            DIRECT_UPLOAD_EXAMPLE,
+        ]
+    )
+    @action(detail=True, methods=['post'], url_path='attachment-uploads', parser_classes=[JSONParser])
+    def start_attachment_upload(self, request, pk=None):
+        """Preparar la subida directa al almacenamiento de un attachment"""
+        issue = self.get_object()
+        serializer = DirectUploadRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return start_upload_response(request, serializer, DirectUpload.ATTACHMENT, issue=issue)
+
+    @extend_schema(
+        summary="Abrir una subida por partes",
+        description="Para archivos grandes o conexiones inestables: crea el attachment en estado 'awaiting' y una "
+                    "sesión a la que se envían las partes con PUT /api/upload-sessions/{session_id}/chunks/{n}/ "
+                    "(reintentables y en cualquier orden) y que se cierra con "
+                    "POST /api/upload-sessions/{session_id}/complete/. Las sesiones sin actividad caducan y sus "
+                    "partes se descartan. Responde 501 si el almacenamiento no es S3.",
+        tags=["Issues"],
+        parameters=[
+            OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del issue"),
+        ],
+        request=UploadSessionRequestSerializer,
+        responses={201: UploadSessionSerializer, 501: {"description": "El almacenamiento no admite subidas por partes"}},
+        examples=[
+            OpenApiExample(
+                'Ejemplo Request Upload Session',
+                value={"name": "logs.tar.gz", "size": 524288000},
+                request_only=True
+            ),
+            UPLOAD_SESSION_EXAMPLE,
+        ]
+    )
+    @action(detail=True, methods=['post'], url_path='attachment-sessions', parser_classes=[JSONParser])
+    def start_attachment_session(self, request, pk=None):
+        """Abrir una sesión de subida por partes de un attachment"""
+        issue = self.get_object()
+        serializer = UploadSessionRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return start_session_response(request, serializer, issue)
@@ -5,8 +5,11 @@ from drf_spectacular.utils import (
 )
 
 from rest_framework.response import Response
-from issues.models import Priorities, Issue
-from ..serializers import PrioritiesSerializer
+from issues.models import Priorities
+from issues.catalog_deletion import start_deletion
+from ..conditional import ConditionalGetMixin
+from .catalog_deletion_views import catalog_deletion_response
+from ..serializers import CatalogDeletionSerializer, PrioritiesSerializer
 
 DEFAULT_PRIORITY_NAME = "medium"
 
@@ -177,10 +180,15 @@ DEFAULT_PRIORITY_NAME = "medium"
     ),
     destroy=extend_schema(
         summary="Eliminar una prioridad",
-        description="Elimina una prioridad dado su id.",
+        description="Elimina una prioridad dado su id, reasignando sus issues a la prioridad por defecto.",
         tags=['Priorities'],
         responses = {
             204: OpenApiResponse(description="Eliminado correctamente"),
+            202: OpenApiResponse(
+                response=CatalogDeletionSerializer,
+                description="Muchos issues afectados: se reasignan en segundo plano y el progreso se consulta "
+                            "en la URL de la cabecera Location",
+            ),
             404: OpenApiResponse(
                 description="No encontrado",
                 examples=[
@@ -215,7 +223,7 @@ DEFAULT_PRIORITY_NAME = "medium"
         ],
     ),
 )
-class PrioritiesViewSet(viewsets.ModelViewSet):
+class PrioritiesViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'put', 'delete']
     queryset = Priorities.objects.all()
     serializer_class = PrioritiesSerializer
@@ -257,6 +265,5 @@ class PrioritiesViewSet(viewsets.ModelViewSet):
                 status=500
             )
 
-        Issue.objects.filter(priority=instance).update(priority=default_type)
-
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        job = start_deletion(instance, replacement=default_type, user=request.user)
+        return catalog_deletion_response(job, request)
\ No newline at end of file
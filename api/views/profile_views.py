@@ -5,9 +5,15 @@ from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.contrib.auth.models import User
 
-from issues.models import Profile, Issue, Comment
-from api.serializers import IssueSerializer, CommentSerializer
+from issues.models import DirectUpload, Profile, Issue, Comment
+from issues.upload_handlers import save_to_field, stream_uploads
+from api.serializers import (
+    IssueSerializer, CommentSerializer, AvatarUploadRequestSerializer, DirectUploadSerializer, requested_issue_fields
+)
 from api.serializers.ProfileSerializer import ProfileSerializer
+from api.querysets import plan_issue_queryset
+from api.views.direct_upload_views import start_upload_response
+from api.views.issue_views import ISSUE_FIELDS_PARAMETERS
 
 from drf_spectacular.utils import (
     extend_schema_view, extend_schema,
@@ -61,15 +67,34 @@ from drf_spectacular.utils import (
         },
         responses=ProfileSerializer,
     ),
+    start_picture_upload=extend_schema(
+        summary="Preparar la subida directa de la imagen de perfil",
+        description="Alternativa a edit-picture sin pasar la imagen por el servidor: devuelve en 'upload' una URL "
+                    "prefirmada con la que el cliente sube la imagen directamente al almacenamiento (PUT con las "
+                    "cabeceras indicadas). Al confirmarla con POST /api/uploads/{upload_id}/finalize/ pasa a ser "
+                    "el avatar del usuario actual.",
+        tags=["Profile"],
+        request=AvatarUploadRequestSerializer,
+        responses={201: DirectUploadSerializer, 501: {"description": "El almacenamiento no admite subidas directas"}},
+        examples=[
+            OpenApiExample(
+                'Ejemplo Request Picture Upload',
+                value={"name": "foto.png", "size": 20480, "md5": "0cc175b9c0f1b6a831c399e269772661"},
+                request_only=True
+            ),
+        ],
+    ),
     get_assigned_issues=extend_schema(
         summary="Obtener issues asignados",
         description="Devuelve los issues abiertos asignados al usuario.",
+        parameters=ISSUE_FIELDS_PARAMETERS,
         tags=["Profile"],
         responses=IssueSerializer(many=True),
     ),
     get_watched_issues=extend_schema(
         summary="Obtener issues observados",
         description="Devuelve los issues que el usuario está observando.",
+        parameters=ISSUE_FIELDS_PARAMETERS,
         tags=["Profile"],
         responses=IssueSerializer(many=True),
     ),
@@ -171,36 +196,48 @@ class ProfileViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        # Con S3 la imagen se sube al bucket según llega
+        stream_uploads(request, Profile._meta.get_field('avatar'))
         if 'avatar' not in request.FILES:
             return Response(
                 {"detail": "El campo 'avatar' es requerido."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        profile.avatar = request.FILES['avatar']
-        profile.save()
+        save_to_field(profile, 'avatar', request.FILES['avatar'])
 
         serializer = self.get_serializer(profile)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], url_path='edit-picture/upload', parser_classes=[JSONParser])
+    def start_picture_upload(self, request):
+        """
+        Prepara la subida directa al almacenamiento de la imagen de perfil.
+        """
+        serializer = AvatarUploadRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return start_upload_response(request, serializer, DirectUpload.AVATAR)
+
     @action(detail=True, methods=['get'], url_path='assigned-issues')
     def get_assigned_issues(self, request, pk=None):
         profile = self.get_object()
 
 
-        issues = Issue.objects.filter(
+        fields = requested_issue_fields(request.query_params)
+        issues = plan_issue_queryset(Issue.objects.filter(
             assigned_to=profile.user,
-        )
+        ), fields)
 
-        serializer = IssueSerializer(issues, many=True)
+        serializer = IssueSerializer(issues, many=True, fields=fields)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'], url_path='watched-issues')
     def get_watched_issues(self, request, pk=None):
         profile = self.get_object()
-        issues = profile.user.watched_issues.all()
+        fields = requested_issue_fields(request.query_params)
+        issues = plan_issue_queryset(profile.user.watched_issues.all(), fields)
 
-        serializer = IssueSerializer(issues, many=True)
+        serializer = IssueSerializer(issues, many=True, fields=fields)
         return Response(serializer.data)
 
     @action(detail=True, methods=['get'], url_path='user-comments')
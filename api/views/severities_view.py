@@ -7,8 +7,11 @@ from drf_spectacular.utils import (
 )
 from django.shortcuts import get_object_or_404
 
-from issues.models import Severities, Issue
-from ..serializers import SeveritiesSerializer
+from issues.models import Severities
+from issues.catalog_deletion import start_deletion
+from ..conditional import ConditionalGetMixin
+from .catalog_deletion_views import catalog_deletion_response
+from ..serializers import CatalogDeletionSerializer, SeveritiesSerializer
 
 @extend_schema_view(
     list=extend_schema(
@@ -98,9 +101,11 @@ from ..serializers import SeveritiesSerializer
     ),
     destroy=extend_schema(
         tags=['Severities'],
-        responses={204: None},
+        responses={204: None, 202: CatalogDeletionSerializer},
         summary="Eliminar una severidad",
-        description="Elimina una severidad dado su id, reasignando sus issues a 'Normal'.",
+        description="Elimina una severidad dado su id, reasignando sus issues a 'Normal'. Si afecta a muchos "
+                    "issues responde 202 y la reasignación sigue en segundo plano (ver "
+                    "/api/catalog-deletions/{id}/); la severidad se borra al terminar.",
         examples=[
             OpenApiExample(
                 'DeleteSeverityExample',
@@ -112,7 +117,7 @@ from ..serializers import SeveritiesSerializer
         ],
     ),
 )
-class SeverityViewSet(viewsets.ModelViewSet):
+class SeverityViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'put', 'delete']
     queryset = Severities.objects.all()
     serializer_class = SeveritiesSerializer
@@ -152,5 +157,5 @@ class SeverityViewSet(viewsets.ModelViewSet):
                 status=drf_status.HTTP_403_FORBIDDEN
             )
         normal = get_object_or_404(Severities, nombre="Normal")
-        Issue.objects.filter(severity=instance).update(severity=normal)
-        return super().destroy(request, *args, **kwargs)
+        job = start_deletion(instance, replacement=normal, user=request.user)
+        return catalog_deletion_response(job, request)
@@ -7,8 +7,11 @@ from drf_spectacular.utils import (
     OpenApiParameter, OpenApiTypes, OpenApiExample
 )
 
-from issues.models import Status, Issue
-from ..serializers import StatusSerializer
+from issues.models import Status
+from issues.catalog_deletion import start_deletion
+from ..conditional import ConditionalGetMixin
+from .catalog_deletion_views import catalog_deletion_response
+from ..serializers import CatalogDeletionSerializer, StatusSerializer
 
 @extend_schema_view(
     list=extend_schema(
@@ -96,9 +99,11 @@ from ..serializers import StatusSerializer
     ),
     destroy=extend_schema(
         tags=['Statuses'],
-        responses={204: None},
+        responses={204: None, 202: CatalogDeletionSerializer},
         summary="Eliminar un status",
-        description="Elimina un status dado su id, reasignando sus issues a 'New'.",
+        description="Elimina un status dado su id, reasignando sus issues a 'New'. Si afecta a muchos issues "
+                    "responde 202 y la reasignación sigue en segundo plano (ver /api/catalog-deletions/{id}/); "
+                    "el status se borra al terminar.",
         examples=[
             OpenApiExample(
                 'DeleteStatusExample',
@@ -110,7 +115,7 @@ from ..serializers import StatusSerializer
         ],
     ),
 )
-class StatusViewSet(viewsets.ModelViewSet):
+class StatusViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'put', 'delete']
     queryset = Status.objects.all()
     serializer_class = StatusSerializer
@@ -150,5 +155,5 @@ class StatusViewSet(viewsets.ModelViewSet):
                 status=drf_status.HTTP_403_FORBIDDEN
             )
         new_status = get_object_or_404(Status, nombre="New")
-        Issue.objects.filter(status=instance).update(status=new_status)
-        return super().destroy(request, *args, **kwargs)
+        job = start_deletion(instance, replacement=new_status, user=request.user)
+        return catalog_deletion_response(job, request)
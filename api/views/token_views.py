@@ -0,0 +1,68 @@
+from rest_framework import mixins, viewsets, status
+from rest_framework.response import Response
+
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
+
+from issues.models import ApiToken
+from issues.tokens import issue_token
+from ..serializers import ApiTokenSerializer, ApiTokenCreatedSerializer
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar mis tokens de API",
+        description="Tokens del usuario autenticado. Solo se muestra el prefijo: el token en claro no se guarda.",
+        tags=["Tokens"],
+        responses=ApiTokenSerializer(many=True),
+    ),
+    create=extend_schema(
+        summary="Crear un token de API",
+        description="Crea un token para un cliente concreto. El token en claro ('token') solo aparece en esta "
+                    "respuesta.",
+        tags=["Tokens"],
+        request=ApiTokenSerializer,
+        responses={201: ApiTokenCreatedSerializer},
+        examples=[
+            OpenApiExample(
+                'TokenCreated',
+                response_only=True,
+                status_codes=["201"],
+                value={
+                    "id": 7,
+                    "name": "ci",
+                    "prefix": "3f9a0c1d2b4e",
+                    "created_at": "2025-05-02T10:00:00Z",
+                    "last_used_at": None,
+                    "token": "3f9a0c1d2b4e5f60718293a4b5c6d7e8f9012345",
+                },
+            ),
+        ],
+    ),
+    destroy=extend_schema(
+        summary="Revocar un token de API",
+        description="Elimina el token; deja de aceptarse de inmediato.",
+        tags=["Tokens"],
+        parameters=[OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del token")],
+        responses={204: None},
+    ),
+)
+class ApiTokenViewSet(
+    mixins.ListModelMixin,
+    mixins.CreateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet
+):
+    serializer_class = ApiTokenSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ApiToken.objects.none()
+        return self.request.user.api_tokens.order_by('-created_at')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        api_token, token = issue_token(request.user, name=serializer.validated_data.get('name', 'default'))
+        api_token.token = token
+        return Response(ApiTokenCreatedSerializer(api_token).data, status=status.HTTP_201_CREATED)
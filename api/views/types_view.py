@@ -9,8 +9,11 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status as drf_status
 from django.shortcuts import get_object_or_404
-from issues.models import Types, Issue
-from ..serializers import TypesSerializer
+from issues.models import Types
+from issues.catalog_deletion import start_deletion
+from ..conditional import ConditionalGetMixin
+from .catalog_deletion_views import catalog_deletion_response
+from ..serializers import CatalogDeletionSerializer, TypesSerializer
 
 DEFAULT_TYPE_NAME = "bug"
 
@@ -180,10 +183,15 @@ DEFAULT_TYPE_NAME = "bug"
     ),
     destroy=extend_schema(
         summary="Eliminar un tipo",
-        description="Elimina un tipo dado su id.",
+        description="Elimina un tipo dado su id, reasignando sus issues al tipo por defecto.",
         tags=['Types'],
         responses={
             204: OpenApiResponse(description="Eliminado correctamente"),
+            202: OpenApiResponse(
+                response=CatalogDeletionSerializer,
+                description="Muchos issues afectados: se reasignan en segundo plano y el progreso se consulta "
+                            "en la URL de la cabecera Location",
+            ),
             404: OpenApiResponse(
                 description="No encontrado",
                 examples=[
@@ -219,7 +227,7 @@ DEFAULT_TYPE_NAME = "bug"
         ],
     ),
 )
-class TypesViewSet(viewsets.ModelViewSet):
+class TypesViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     http_method_names = ['get', 'post', 'put', 'delete']
     queryset = Types.objects.all()
     serializer_class = TypesSerializer
@@ -261,6 +269,5 @@ class TypesViewSet(viewsets.ModelViewSet):
                 status=500
             )
 
-        Issue.objects.filter(issue_type=instance).update(issue_type=default_type)
-
-        return super().destroy(request, *args, **kwargs)
\ No newline at end of file
+        job = start_deletion(instance, replacement=default_type, user=request.user)
+        return catalog_deletion_response(job, request)
\ No newline at end of file
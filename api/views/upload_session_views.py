@@ -0,0 +1,162 @@
+import base64
+import binascii
+
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample
+
+from issues.chunked_uploads import (
+    UploadSessionClosed, UploadSessionError, UploadSessionIncomplete,
+    abort_session, complete_session, receive_chunk, start_session
+)
+from issues.direct_uploads import DirectUploadError
+from issues.models import UploadSession
+from ..serializers import UploadSessionSerializer, UploadPartSerializer
+
+
+UPLOAD_SESSION_EXAMPLE = OpenApiExample(
+    'UploadSessionPending',
+    response_only=True,
+    value={
+        "id": 5,
+        "attachment": {
+            "id": 41, "file": None, "name": "logs.tar.gz", "size": 524288000, "state": "awaiting",
+            "error": "", "uploaded_at": "2025-05-02T10:00:00Z",
+        },
+        "name": "logs.tar.gz", "size": 524288000, "content_type": "application/x-tar",
+        "chunk_size": 8388608, "total_chunks": 63, "received": [1, 2, 3, 5],
+        "state": "pending", "error": "",
+        "created_at": "2025-05-02T10:00:00Z", "expires_at": "2025-05-03T10:04:00Z", "finished_at": None,
+    },
+)
+
+SESSION_PARAMETER = OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID de la sesión")
+
+
+def start_session_response(request, serializer, issue):
+    """
+    Abre la sesión con los datos ya validados de ``serializer`` y responde 201
+    (con su URL en Location), 400 si no cabe en partes de ese tamaño o 501 si el
+    almacenamiento no admite multipart uploads.
+    """
+    data = serializer.validated_data
+    try:
+        session = start_session(
+            request.user, issue, data['name'], data['size'], data['content_type'], data.get('chunk_size')
+        )
+    except DirectUploadError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    except UploadSessionError as exc:
+        return Response({"chunk_size": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+    location = reverse('uploadsession-detail', args=[session.pk], request=request)
+    return Response(
+        UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED, headers={'Location': location}
+    )
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="Listar subidas por partes",
+        description="Sesiones de subida por partes del usuario actual, de la más reciente a la más antigua.",
+        tags=["Uploads"],
+        responses=UploadSessionSerializer(many=True),
+    ),
+    retrieve=extend_schema(
+        summary="Estado de una subida por partes",
+        description="Devuelve la sesión con las partes ya recibidas ('received'): para reanudar una subida "
+                    "interrumpida basta con enviar las que faltan y completarla.",
+        tags=["Uploads"],
+        parameters=[SESSION_PARAMETER],
+        responses=UploadSessionSerializer,
+        examples=[UPLOAD_SESSION_EXAMPLE],
+    ),
+    destroy=extend_schema(
+        summary="Cancelar una subida por partes",
+        description="Descarta las partes subidas y el attachment que esperaba el archivo.",
+        tags=["Uploads"],
+        parameters=[SESSION_PARAMETER],
+        responses={204: None, 409: {"description": "La sesión ya estaba completada"}},
+    ),
+)
+class UploadSessionViewSet(
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet
+):
+    queryset = UploadSession.objects.select_related('attachment').prefetch_related('parts').order_by('-pk')
+    serializer_class = UploadSessionSerializer
+    filterset_fields = ['state']
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
+
+    def destroy(self, request, *args, **kwargs):
+        session = abort_session(self.get_object().pk)
+        if session.state == UploadSession.DONE:
+            return Response(
+                {"detail": "La subida ya está completada; borra el attachment si no lo quieres."},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @extend_schema(
+        summary="Enviar una parte",
+        description="Cuerpo: los bytes de la parte 'number' (desde 1), que debe medir exactamente 'chunk_size' "
+                    "salvo la última. Con la cabecera Content-MD5 (base64) se comprueba que ha llegado íntegra. "
+                    "Se puede repetir sin riesgo: la parte reenviada sustituye a la anterior. Responde 400 si la "
+                    "parte no es válida y 409 si la sesión ya está cerrada.",
+        tags=["Uploads"],
+        parameters=[
+            SESSION_PARAMETER,
+            OpenApiParameter('number', OpenApiTypes.INT, OpenApiParameter.PATH, description="Número de parte"),
+        ],
+        request={'application/octet-stream': {'type': 'string', 'format': 'binary'}},
+        responses={200: UploadPartSerializer, 400: None, 409: None, 411: None},
+    )
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<number>[0-9]+)')
+    def chunk(self, request, pk=None, number=None):
+        session = self.get_object()
+        try:
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response({"detail": "Falta la cabecera Content-Length."}, status=status.HTTP_411_LENGTH_REQUIRED)
+        md5 = None
+        if request.headers.get('Content-MD5'):
+            try:
+                md5 = binascii.hexlify(base64.b64decode(request.headers['Content-MD5'], validate=True)).decode()
+            except binascii.Error:
+                return Response({"detail": "Content-MD5 no es base64 válido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # El cuerpo se lee en bloques de request.stream, sin pasar por los parsers
+            part = receive_chunk(session, int(number), request.stream, length, md5)
+        except UploadSessionClosed as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+        except UploadSessionError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(UploadPartSerializer(part).data)
+
+    @extend_schema(
+        summary="Completar una subida por partes",
+        description="Con todas las partes recibidas, el almacenamiento las junta en el archivo final y el "
+                    "attachment pasa a 'stored'. Responde 409 con las partes que faltan ('missing') si no están "
+                    "todas.",
+        tags=["Uploads"],
+        parameters=[SESSION_PARAMETER],
+        request=None,
+        responses={200: UploadSessionSerializer, 409: None},
+    )
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        try:
+            session = complete_session(self.get_object().pk)
+        except UploadSessionIncomplete as exc:
+            return Response({"detail": str(exc), "missing": exc.missing}, status=status.HTTP_409_CONFLICT)
+        except UploadSessionError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+        code = status.HTTP_200_OK if session.state == UploadSession.DONE else status.HTTP_409_CONFLICT
+        return Response(self.get_serializer(session).data, status=code)
@@ -6,6 +6,11 @@ from django.contrib.auth.models import User
 
 from django.contrib.auth.models import User
 from api.serializers.UserSerializer import ExtendedUserSerializer
+from api.serializers.UserReassignSerializer import UserReassignSerializer, UserReassignResultSerializer
+from api.filters import fuzzy_requested
+from api.pagination import UserCursorPagination
+from issues.models import Trigram
+from issues.trigrams import contains_filter, fuzzy_search
 
 from drf_spectacular.utils import (
     extend_schema_view, extend_schema,
@@ -32,6 +37,14 @@ from drf_spectacular.utils import (
                 description="Filtro para buscar usuarios por su biografía.",
                 required=False
             ),
+            OpenApiParameter(
+                name='fuzzy',
+                type=OpenApiTypes.BOOL,
+                location=OpenApiParameter.QUERY,
+                description="Busca el username por similitud de trigramas (tolera errores tipográficos) "
+                            "y ordena por parecido.",
+                required=False
+            ),
         ],
         responses=ExtendedUserSerializer(many=True),
         examples=[
@@ -155,15 +168,63 @@ class UserViewSet(
     mixins.RetrieveModelMixin,
     viewsets.GenericViewSet
 ):
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('profile', 'stats')
     serializer_class = ExtendedUserSerializer
+    pagination_class = UserCursorPagination
 
     def get_queryset(self):
         queryset = super().get_queryset()
         name = self.request.query_params.get('username')
         bio = self.request.query_params.get('bio')
-        if name:
-            queryset = queryset.filter(username__icontains=name)
+        if name and fuzzy_requested(self.request.query_params):
+            queryset = fuzzy_search(queryset, Trigram.USERNAME, name)
+        elif name:
+            queryset = queryset.filter(contains_filter(Trigram.USERNAME, name, using=queryset.db))
         if bio:
-            queryset = queryset.filter(profile__biography__icontains=bio)
-        return queryset
\ No newline at end of file
+            queryset = queryset.filter(
+                contains_filter(Trigram.BIOGRAPHY, bio, prefix='profile__', using=queryset.db)
+            )
+        return queryset
+
+    @extend_schema(
+        summary="Reasignar los issues de un usuario",
+        description="Pasa al usuario 'target_username' todos los issues asignados al usuario indicado y, si "
+                    "'include_watchers' (por defecto sí), también sus suscripciones como watcher. 'status_names' "
+                    "limita la operación a los issues con esos status. Se hace por bloques, cada uno en su propia "
+                    "transacción; si se interrumpe, se puede repetir. Solo el propio usuario o un administrador.",
+        tags=['Users'],
+        parameters=[
+            OpenApiParameter('id', OpenApiTypes.INT, OpenApiParameter.PATH, description="ID del usuario de origen"),
+        ],
+        request=UserReassignSerializer,
+        responses={
+            200: UserReassignResultSerializer,
+            400: OpenApiResponse(description="Usuario destino o status no válidos"),
+            403: OpenApiResponse(description="Sin permiso para reasignar los issues de este usuario"),
+        },
+        examples=[
+            OpenApiExample(
+                'ReassignRequest',
+                summary="Pasar a david los issues abiertos de victor",
+                value={"target_username": "david", "status_names": ["New", "In Progress"]},
+                request_only=True,
+            ),
+            OpenApiExample(
+                'ReassignResponse',
+                summary="Issues y suscripciones movidos",
+                value={"assigned": 128, "watchers": 342},
+                response_only=True,
+            ),
+        ],
+    )
+    @action(detail=True, methods=['post'], parser_classes=[JSONParser], pagination_class=None)
+    def reassign(self, request, pk=None):
+        source = self.get_object()
+        if source != request.user and not request.user.is_staff:
+            return Response(
+                {"detail": "No tienes permiso para reasignar los issues de este usuario."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        serializer = UserReassignSerializer(data=request.data, context={'request': request, 'source': source})
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
@@ -0,0 +1,378 @@
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .blobs import acquire, file_digest, known_hashes
+from .models import Attachment, Issue
+from .storage_gc import queue_deletion, stored_names
+from .upload_handlers import StoredUploadedFile
+from .variants import schedule_variants, shared_variants
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def staging_dir():
+    return getattr(settings, 'ATTACHMENT_STAGING_DIR', os.path.join(settings.BASE_DIR, 'staging'))
+
+
+class AttachmentBatch:
+    """
+    Adjuntos de un issue que llegan en la misma petición. Se usa como
+    contexto alrededor del trabajo de la petición en la base de datos:
+
+    - Con ATTACHMENT_UPLOAD_BACKGROUND (por defecto), al entrar copia los
+      archivos a staging; ``save`` crea las filas ``pending`` y encola su
+      subida tras el commit.
+    - Sin él, al entrar lanza la subida de todos al almacenamiento en el grupo
+      de hilos, en paralelo entre sí y con el resto de la petición; ``save``
+      espera a que terminen (tarda lo que el más lento) y crea las filas ya
+      ``stored``.
+
+    Los archivos que StorageUploadHandler ya ha subido mientras llegaban
+    (StoredUploadedFile) no pasan por staging ni por el grupo de hilos: sus
+    filas se crean directamente ``stored``.
+
+    Los archivos cuyo contenido (SHA-256) ya está en el almacenamiento no se
+    suben: la fila se crea ``stored`` con el objeto existente (issues.blobs).
+    De los que ya se han subido y resultan repetidos se borra la copia.
+
+    En todos los casos las filas se insertan con un único bulk_create. Si algo
+    falla dentro del bloque se borran los archivos ya subidos o en staging y
+    la excepción sigue su curso, de modo que la transacción del llamador
+    deshace el resto.
+    """
+
+    def __init__(self, files, using='default'):
+        self.files = list(files)
+        self.using = using
+        self.background = getattr(settings, 'ATTACHMENT_UPLOAD_BACKGROUND', True)
+        # Por posición en ``files``
+        self._digests = {}
+        self._reused = set()
+        self._staged = {}
+        self._futures = {}
+        # Copias subidas de contenidos que ya estaban
+        self._duplicates = []
+
+    def __enter__(self):
+        pending = []
+        for index, uploaded_file in enumerate(self.files):
+            if isinstance(uploaded_file, StoredUploadedFile):
+                self._digests[index] = uploaded_file.sha256
+            else:
+                self._digests[index] = file_digest(uploaded_file)
+                pending.append((index, uploaded_file))
+        known = known_hashes(self._digests.values(), using=self.using) if pending else set()
+        for index, uploaded_file in pending:
+            if self._digests[index] in known:
+                self._reused.add(index)
+            else:
+                self._start(index, uploaded_file)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.discard()
+        return False
+
+    def save(self, issue):
+        """Crea las filas de los adjuntos de ``issue``. Devuelve la lista de Attachment."""
+        if not self.files:
+            return []
+        rows = [self._row(issue, index, f) for index, f in enumerate(self.files)]
+        created = Attachment.objects.using(self.using).bulk_create(rows)
+        # bulk_create no emite post_save: el issue se marca como modificado aquí
+        issue.updated_at = timezone.now()
+        Issue.objects.using(self.using).filter(pk=issue.pk).update(updated_at=issue.updated_at)
+        for uploaded_file, attachment in zip(self.files, created):
+            if isinstance(uploaded_file, StoredUploadedFile) and attachment.file.name == uploaded_file.key:
+                # Desde el commit el objeto es del adjunto y no se borra al cerrar la petición
+                transaction.on_commit(uploaded_file.keep, using=self.using)
+        queue_deletion('attachment', self._duplicates, using=self.using)
+        if self._staged:
+            ids = [attachment.pk for index, attachment in enumerate(created) if index in self._staged]
+            transaction.on_commit(lambda: [_submit(pk, self.using) for pk in ids], using=self.using)
+        # bulk_create tampoco emite post_save para las miniaturas
+        # (las que reutilizan un objeto ya traen las suyas)
+        schedule_variants(
+            'attachment',
+            [a.pk for a in created if a.state == Attachment.STORED and not a.variants],
+            using=self.using,
+        )
+        return created
+
+    def discard(self):
+        """Borra los archivos en staging y los ya subidos (espera a las subidas en curso)."""
+        for path in self._staged.values():
+            discard_staged(path)
+        storage = Attachment._meta.get_field('file').storage
+        for future in self._futures.values():
+            try:
+                name = future.result()
+            except Exception:
+                continue
+            storage.delete(name)
+        for uploaded_file in self.files:
+            if isinstance(uploaded_file, StoredUploadedFile):
+                uploaded_file.discard()
+
+    def _start(self, index, uploaded_file):
+        if self.background:
+            self._staged[index] = _stage_file(uploaded_file)
+        else:
+            field = Attachment._meta.get_field('file')
+            self._futures[index] = _get_executor().submit(_save_to_storage, field, uploaded_file)
+
+    def _row(self, issue, index, uploaded_file):
+        sha256 = self._digests[index]
+        if isinstance(uploaded_file, StoredUploadedFile):
+            # Si el contenido ya estaba, la copia se borra al cerrar la petición
+            blob = acquire(sha256, uploaded_file.key, uploaded_file.size, using=self.using)
+            return _stored_row(issue, uploaded_file, blob, using=self.using)
+        if index in self._reused:
+            blob = acquire(sha256, using=self.using)
+            if blob is not None:
+                return _stored_row(issue, uploaded_file, blob, using=self.using)
+            # El objeto se ha borrado entretanto: se sube como los demás
+            self._start(index, uploaded_file)
+        if index in self._staged:
+            return Attachment(
+                issue=issue, state=Attachment.PENDING, staged_path=self._staged[index], sha256=sha256,
+                **_describe(uploaded_file)
+            )
+        # result() relanza el primer fallo; discard() borrará lo que sí se subió
+        name = self._futures[index].result()
+        blob = acquire(sha256, name, uploaded_file.size or 0, using=self.using)
+        if blob.name != name:
+            self._duplicates.append(name)
+        return _stored_row(issue, uploaded_file, blob, using=self.using)
+
+
+def stage_attachment(issue, uploaded_file, using='default'):
+    """Adjunta un único archivo a ``issue`` (ver AttachmentBatch). Devuelve el Attachment."""
+    with AttachmentBatch([uploaded_file], using=using) as batch:
+        return batch.save(issue)[0]
+
+
+def attach_blob(issue, sha256, name, using='default'):
+    """
+    Adjunta a ``issue`` un archivo cuyo contenido (``sha256``) ya está en el
+    almacenamiento, sin volver a subirlo. Devuelve el Attachment ``stored``, o
+    None si no hay ningún objeto con ese contenido.
+    """
+    with transaction.atomic(using=using):
+        blob = acquire(sha256, using=using)
+        if blob is None:
+            return None
+        attachment = Attachment.objects.using(using).create(
+            issue=issue, file=blob.name, blob=blob, sha256=sha256, name=name, size=blob.size,
+            state=Attachment.STORED, variants=shared_variants('attachment', blob.name, using=using),
+        )
+        Issue.objects.using(using).filter(pk=issue.pk).update(updated_at=timezone.now())
+    if not attachment.variants:
+        schedule_variants('attachment', [attachment.pk], using=using)
+    return attachment
+
+
+def create_placeholder(issue, name, size, using='default'):
+    """Attachment ``awaiting`` de un archivo que el cliente sube por otra vía (issues.direct_uploads)."""
+    attachment = Attachment.objects.using(using).create(issue=issue, name=name, size=size, state=Attachment.AWAITING)
+    Issue.objects.using(using).filter(pk=issue.pk).update(updated_at=timezone.now())
+    return attachment
+
+
+def link_placeholder(attachment_id, file_name, size, using='default'):
+    """
+    Asigna el archivo ya subido al attachment ``awaiting`` y lo marca como
+    ``stored``. Devuelve False si el attachment se borró entretanto.
+    """
+    linked = Attachment.objects.using(using).filter(pk=attachment_id, state=Attachment.AWAITING).update(
+        file=file_name, size=size, state=Attachment.STORED, error=''
+    )
+    Issue.objects.using(using).filter(attachment=attachment_id).update(updated_at=timezone.now())
+    if linked:
+        schedule_variants('attachment', [attachment_id], using=using)
+    return bool(linked)
+
+
+def drop_placeholder(attachment_id, using='default'):
+    """Borra el attachment ``awaiting`` de una subida que no ha llegado a completarse."""
+    attachment = Attachment.objects.using(using).filter(pk=attachment_id, state=Attachment.AWAITING).first()
+    if attachment is not None:
+        attachment.delete()
+        Issue.objects.using(using).filter(pk=attachment.issue_id).update(updated_at=timezone.now())
+
+
+def _describe(uploaded_file):
+    return {'name': os.path.basename(uploaded_file.name)[:255], 'size': uploaded_file.size or 0}
+
+
+def _stored_row(issue, uploaded_file, blob, using):
+    return Attachment(
+        issue=issue, file=blob.name, blob=blob, sha256=blob.sha256, state=Attachment.STORED,
+        variants=shared_variants('attachment', blob.name, using=using) if blob.refcount > 1 else {},
+        **_describe(uploaded_file)
+    )
+
+
+def _stage_file(uploaded_file):
+    os.makedirs(staging_dir(), exist_ok=True)
+    staged_path = f'{uuid.uuid4().hex}{os.path.splitext(uploaded_file.name)[1][:16]}'
+    destination = os.path.join(staging_dir(), staged_path)
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        # Ya está en disco (TemporaryUploadedFile): basta con moverlo
+        file_move_safe(uploaded_file.temporary_file_path(), destination)
+    else:
+        with open(destination, 'wb') as out:
+            for chunk in uploaded_file.chunks():
+                out.write(chunk)
+    return staged_path
+
+
+def _save_to_storage(field, uploaded_file):
+    name = field.generate_filename(None, uploaded_file.name)
+    return field.storage.save(name, uploaded_file, max_length=field.max_length)
+
+
+def store_attachment(attachment_id, using='default'):
+    """
+    Sube al almacenamiento el archivo en staging de un adjunto ``pending`` (o
+    ``failed``, para reintentar) y lo marca como ``stored``. Si falla queda en
+    ``failed`` con el error y el archivo se conserva en staging. Devuelve el
+    Attachment, o None si se borró entretanto.
+    """
+    attachments = Attachment.objects.using(using)
+    attachment = attachments.filter(pk=attachment_id).first()
+    if attachment is None or attachment.state == Attachment.STORED:
+        return attachment
+    staged = os.path.join(staging_dir(), attachment.staged_path)
+    # Si otro adjunto ha subido ya el mismo contenido, no hace falta subirlo
+    linked = _link_stored(attachment, None, using)
+    name = None
+    if linked is None:
+        try:
+            with open(staged, 'rb') as fh:
+                attachment.file.save(attachment.name or attachment.staged_path, File(fh), save=False)
+        except Exception as exc:
+            logger.exception("No se pudo subir el adjunto %s", attachment_id)
+            attachments.filter(pk=attachment_id).update(state=Attachment.FAILED, error=str(exc))
+            return attachments.filter(pk=attachment_id).first()
+        name = attachment.file.name
+        linked = _link_stored(attachment, name, using)
+
+    if name and linked != name:
+        # Borrado o subido por otro entretanto, o el contenido ya estaba
+        attachment.file.delete(save=False)
+    if not linked:
+        return attachments.filter(pk=attachment_id).first()
+    discard_staged(staged)
+    schedule_variants('attachment', [attachment_id], using=using)
+    return attachments.get(pk=attachment_id)
+
+
+def _link_stored(attachment, name, using):
+    # Asigna al adjunto el blob de su contenido o, si no hay, el objeto
+    # ``name`` recién subido. Devuelve el nombre asignado, None si aún hay que
+    # subirlo o '' si el adjunto se ha borrado o subido entretanto.
+    attachments = Attachment.objects.using(using)
+    with transaction.atomic(using=using):
+        blob = acquire(attachment.sha256, name, attachment.size, using=using) if attachment.sha256 else None
+        if blob is None and name is None:
+            return None
+        file_name = blob.name if blob is not None else name
+        # Solo si sigue existiendo y nadie lo ha subido ya
+        updated = attachments.filter(pk=attachment.pk).exclude(state=Attachment.STORED).update(
+            file=file_name, blob=blob, state=Attachment.STORED, staged_path='', error='',
+            variants=shared_variants('attachment', file_name, using=using) if blob is not None else {},
+        )
+        if not updated:
+            transaction.set_rollback(True, using=using)
+            return ''
+    return file_name
+
+
+def deduplicate_attachment(attachment_id, using='default'):
+    """
+    Calcula el SHA-256 de un adjunto ``stored`` que aún no lo tiene (anterior
+    a issues.blobs, o subido directamente o por partes) y lo enlaza con el blob
+    de su contenido. Si otro adjunto ya tenía ese contenido, pasa a usar su
+    objeto y el propio se borra. Devuelve True si era una copia.
+    """
+    attachments = Attachment.objects.using(using)
+    attachment = attachments.filter(pk=attachment_id, state=Attachment.STORED, blob__isnull=True).first()
+    if attachment is None or not attachment.file:
+        return False
+    name = attachment.file.name
+    with attachment.file.open('rb') as fh:
+        sha256 = file_digest(fh)
+
+    with transaction.atomic(using=using):
+        blob = acquire(sha256, name, attachment.size, using=using)
+        duplicate = blob.name != name
+        values = {'blob': blob, 'sha256': sha256}
+        if duplicate:
+            values.update(file=blob.name, variants=shared_variants('attachment', blob.name, using=using))
+        # Solo si nadie lo ha cambiado mientras se leía
+        if not attachments.filter(pk=attachment_id, file=name, blob__isnull=True).update(**values):
+            transaction.set_rollback(True, using=using)
+            return False
+        if duplicate:
+            queue_deletion('attachment', stored_names('attachment', attachment, name), using=using)
+    if duplicate and not values['variants']:
+        schedule_variants('attachment', [attachment_id], using=using)
+    return duplicate
+
+
+def unhashed_attachments(using='default'):
+    """Adjuntos guardados sin blob (sin SHA-256 calculado), en orden."""
+    rows = Attachment.objects.using(using).filter(state=Attachment.STORED, blob__isnull=True).exclude(file='')
+    return rows.order_by('pk')
+
+
+def discard_staged(path):
+    """Borra un archivo de staging (ruta absoluta o relativa al directorio) si existe."""
+    try:
+        os.remove(os.path.join(staging_dir(), path))
+    except FileNotFoundError:
+        pass
+
+
+def unfinished_attachments(include_failed=False, using='default'):
+    """Adjuntos aún sin subir (p. ej. porque se reinició el proceso), en orden."""
+    states = (Attachment.PENDING, Attachment.FAILED) if include_failed else (Attachment.PENDING,)
+    return Attachment.objects.using(using).filter(state__in=states).order_by('pk')
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ATTACHMENT_UPLOAD_WORKERS', 4),
+                thread_name_prefix='attachment-upload',
+            )
+        return _executor
+
+
+def _submit(attachment_id, using):
+    _get_executor().submit(_store_in_thread, attachment_id, using)
+
+
+def _store_in_thread(attachment_id, using):
+    try:
+        store_attachment(attachment_id, using=using)
+    finally:
+        # Las conexiones son por hilo: se cierran para no dejarlas abiertas
+        connections.close_all()
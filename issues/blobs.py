@@ -0,0 +1,55 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Blob
+
+
+def file_digest(uploaded_file):
+    """SHA-256 (hexadecimal) de ``uploaded_file``; lo deja al principio para volver a leerlo."""
+    digest = hashlib.sha256()
+    for chunk in uploaded_file.chunks():
+        digest.update(chunk)
+    uploaded_file.seek(0)
+    return digest.hexdigest()
+
+
+def known_hashes(hashes, using='default'):
+    """De ``hashes``, los que ya tienen un objeto en el almacenamiento."""
+    return set(Blob.objects.using(using).filter(sha256__in=set(hashes)).values_list('sha256', flat=True))
+
+
+def acquire(sha256, name=None, size=0, using='default'):
+    """
+    Suma una referencia al blob con el contenido ``sha256`` y lo devuelve. Si
+    no hay ninguno y se da ``name`` (un objeto ya guardado con ese contenido),
+    se crea con él; si no, devuelve None. Si el blob devuelto no usa ``name``,
+    ese objeto sobra y hay que borrarlo. Debe llamarse en la transacción que
+    guarda el adjunto: si se deshace, la referencia también.
+    """
+    blobs = Blob.objects.using(using)
+    with transaction.atomic(using=using, savepoint=False):
+        for _attempt in range(2):
+            if blobs.filter(sha256=sha256).update(refcount=F('refcount') + 1):
+                return blobs.get(sha256=sha256)
+            if name is None:
+                return None
+            try:
+                with transaction.atomic(using=using):
+                    return blobs.create(sha256=sha256, name=name, size=size, refcount=1)
+            except IntegrityError:
+                # Otra petición lo ha creado a la vez: se usa el suyo
+                continue
+        raise IntegrityError(f"No se pudo registrar el blob {sha256}.")
+
+
+def release(blob_id, using='default'):
+    """
+    Resta una referencia al blob ``blob_id``; con la última se borra la fila.
+    El objeto lo borra issues.storage_gc al borrar el adjunto, cuando ninguna
+    otra fila lo usa.
+    """
+    blobs = Blob.objects.using(using)
+    blobs.filter(pk=blob_id, refcount__gt=0).update(refcount=F('refcount') - 1)
+    blobs.filter(pk=blob_id, refcount=0).delete()
@@ -0,0 +1,298 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .catalogs import get_registry
+from .models import Issue, Priorities, Severities, Status, Trigram, Types
+from .trigrams import index_objects
+from .user_stats import adjust as adjust_user_stats
+from .watchers import add_watchers, remove_watchers, resolve_usernames
+
+
+DEFAULT_DESCRIPTION = "Bulk created issue"
+
+# Campo del elemento -> (catálogo, campo de Issue, nombre para los mensajes)
+CATALOG_FIELDS = {
+    'status_name': (Status, 'status', 'El status'),
+    'priority_name': (Priorities, 'priority', 'La prioridad'),
+    'severity_name': (Severities, 'severity', 'La severidad'),
+    'issue_type_name': (Types, 'issue_type', 'El tipo de issue'),
+}
+
+
+class BulkValidationError(Exception):
+    """
+    Datos no válidos en una operación masiva. ``errors`` va tal cual en la
+    respuesta: {posición: {campo: mensaje}} en las altas, {campo: mensaje} en
+    las modificaciones.
+    """
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class BulkIssueImporter:
+    """
+    Alta masiva de issues a partir de un iterable de elementos (dicts con
+    ``subject`` y, opcionalmente, ``description``, ``due_date``, los
+    ``*_name`` de los catálogos, ``assigned_to_username`` y
+    ``watchers_usernames``).
+
+    Los elementos se consumen de uno en uno y se insertan por bloques de
+    ``chunk_size``: en memoria solo está el bloque en curso más (id, subject)
+    de lo ya creado. Por bloque, los catálogos se resuelven con el registro (sin
+    consultas) y los usuarios con una sola consulta; después van un
+    bulk_create de los issues, otro de los watchers y el mantenimiento que las
+    señales no hacen (índice de trigramas y contadores de UserStats).
+
+    Todo ocurre en una transacción: si un bloque tiene errores se lanza
+    BulkValidationError con los de ese bloque y no se crea nada. Necesita un motor
+    que devuelva las claves de bulk_create (PostgreSQL, SQLite >= 3.35).
+    """
+
+    def __init__(self, user, chunk_size=None, max_items=None, using='default'):
+        self.user = user
+        self.chunk_size = chunk_size or getattr(settings, 'ISSUE_BULK_CHUNK_SIZE', 1000)
+        self.max_items = max_items or getattr(settings, 'ISSUE_BULK_MAX_ITEMS', 100_000)
+        self.using = using
+        self.registry = get_registry()
+        self.defaults = self.registry.issue_defaults()
+        self.created = []
+        self._pending = []
+        self._count = 0
+
+    def run(self, items):
+        """Crea todos los elementos de ``items``. Devuelve [(id, subject), ...] en orden."""
+        with transaction.atomic(using=self.using):
+            for item in items:
+                self.add(item)
+            self.flush()
+        return self.created
+
+    def add(self, item):
+        if self._count >= self.max_items:
+            raise BulkValidationError({self._count: {'issues': f"Como máximo {self.max_items} issues por petición."}})
+        self._pending.append((self._count, item))
+        self._count += 1
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        users = self._resolve_users(pending)
+        errors = {}
+        issues = []
+        watchers = []
+        for index, item in pending:
+            issue, watcher_ids, item_errors = self._build(item, users)
+            if item_errors:
+                errors[index] = item_errors
+            elif not errors:
+                issues.append(issue)
+                watchers.append(watcher_ids)
+        if errors:
+            raise BulkValidationError(errors)
+
+        Issue.objects.using(self.using).bulk_create(issues, batch_size=self.chunk_size)
+        through = Issue.watchers.through
+        through.objects.using(self.using).bulk_create(
+            [through(issue_id=issue.pk, user_id=user_id)
+             for issue, watcher_ids in zip(issues, watchers) for user_id in watcher_ids],
+            batch_size=self.chunk_size,
+        )
+
+        # bulk_create no emite señales: índice y contadores se mantienen aquí
+        index_objects(Trigram.SUBJECT, issues, using=self.using, replace=False)
+        adjust_user_stats('created_issues_count', [issue.created_by_id for issue in issues], using=self.using)
+        adjust_user_stats('assigned_issues_count', [issue.assigned_to_id for issue in issues], using=self.using)
+        adjust_user_stats('watched_issues_count', [pk for ids in watchers for pk in ids], using=self.using)
+
+        self.created.extend((issue.pk, issue.subject) for issue in issues)
+
+    def _resolve_users(self, pending):
+        usernames = set()
+        for _index, item in pending:
+            if item.get('assigned_to_username'):
+                usernames.add(item['assigned_to_username'])
+            usernames.update(name for name in item.get('watchers_usernames') or () if name)
+        users, _missing = resolve_usernames(usernames, using=self.using)
+        return users
+
+    def _build(self, item, users):
+        errors = {}
+        values = dict(self.defaults)
+        for field, (model, issue_field, label) in CATALOG_FIELDS.items():
+            name = item.get(field)
+            if not name:
+                continue
+            obj = self.registry.by_name(model, name)
+            if obj is None:
+                errors[field] = f"{label} '{name}' no existe."
+            else:
+                values[issue_field] = obj
+
+        assigned = item.get('assigned_to_username')
+        if assigned:
+            if assigned in users:
+                values['assigned_to_id'] = users[assigned]
+            else:
+                errors['assigned_to_username'] = f"El usuario '{assigned}' no existe."
+
+        watcher_ids = []
+        for username in item.get('watchers_usernames') or ():
+            if not username:
+                continue
+            if username not in users:
+                errors['watchers_usernames'] = f"El usuario '{username}' no existe."
+            elif users[username] not in watcher_ids:
+                watcher_ids.append(users[username])
+
+        if errors:
+            return None, None, errors
+        issue = Issue(
+            subject=item['subject'],
+            description=item.get('description') or DEFAULT_DESCRIPTION,
+            due_date=item.get('due_date'),
+            created_by=self.user,
+            **values,
+        )
+        return issue, watcher_ids, None
+
+
+def bulk_update_issues(issue_ids, changes, chunk_size=None, using='default'):
+    """
+    Aplica el mismo cambio a muchos issues con operaciones por conjuntos. Por
+    cada bloque de ``chunk_size`` ids: un UPDATE de las columnas (y de
+    updated_at, que invalida los ETag), un bulk_create de los watchers añadidos
+    y un DELETE de los quitados (issues.watchers), más el ajuste de los
+    contadores de UserStats que las señales no ven.
+
+    ``changes`` admite los ``*_name`` de los catálogos, ``assigned_to_username``
+    (vacío o None para desasignar), ``due_date``, ``add_watchers_usernames`` y
+    ``remove_watchers_usernames``. Los nombres se resuelven antes de tocar nada
+    y, si alguno no existe, se lanza BulkValidationError.
+
+    Devuelve el conjunto de ids actualizados (los de ``issue_ids`` que existen).
+    """
+    chunk_size = chunk_size or getattr(settings, 'ISSUE_BULK_CHUNK_SIZE', 1000)
+    registry = get_registry()
+    errors = {}
+    values = {}
+
+    for field, (model, issue_field, label) in CATALOG_FIELDS.items():
+        if field in changes:
+            obj = registry.by_name(model, changes[field])
+            if obj is None:
+                errors[field] = f"{label} '{changes[field]}' no existe."
+            else:
+                values[issue_field] = obj
+    if 'due_date' in changes:
+        values['due_date'] = changes['due_date']
+
+    assigned = changes.get('assigned_to_username')
+    usernames = [*(changes.get('add_watchers_usernames') or ()), *(changes.get('remove_watchers_usernames') or ())]
+    if assigned:
+        usernames.append(assigned)
+    users, _missing = resolve_usernames(usernames, using=using)
+
+    if 'assigned_to_username' in changes:
+        if not assigned:
+            values['assigned_to_id'] = None
+        elif assigned in users:
+            values['assigned_to_id'] = users[assigned]
+        else:
+            errors['assigned_to_username'] = f"El usuario '{assigned}' no existe."
+
+    watcher_changes = {}
+    for field in ('add_watchers_usernames', 'remove_watchers_usernames'):
+        missing = [name for name in changes.get(field) or () if name not in users]
+        if missing:
+            errors[field] = f"El usuario '{missing[0]}' no existe."
+        watcher_changes[field] = list(dict.fromkeys(users[name] for name in changes.get(field) or () if name in users))
+    if errors:
+        raise BulkValidationError(errors)
+
+    add_ids = watcher_changes['add_watchers_usernames']
+    remove_ids = watcher_changes['remove_watchers_usernames']
+    issue_ids = list(dict.fromkeys(issue_ids))
+    updated = set()
+
+    with transaction.atomic(using=using):
+        for start in range(0, len(issue_ids), chunk_size):
+            chunk = issue_ids[start:start + chunk_size]
+            existing = list(Issue.objects.using(using).filter(pk__in=chunk).values_list('pk', flat=True))
+            if not existing:
+                continue
+            queryset = Issue.objects.using(using).filter(pk__in=existing)
+
+            if 'assigned_to_id' in values:
+                new = values['assigned_to_id']
+                previous = list(queryset.exclude(assigned_to_id=new).values_list('assigned_to_id', flat=True))
+                adjust_user_stats('assigned_issues_count', previous, -1, using=using)
+                adjust_user_stats('assigned_issues_count', [new] * len(previous), 1, using=using)
+
+            queryset.update(updated_at=timezone.now(), **values)
+
+            add_watchers(existing, add_ids, using=using)
+            remove_watchers(existing, remove_ids, using=using)
+
+            updated.update(existing)
+    return updated
+
+
+def reassign_user_issues(source_id, target_id, status_ids=None, watchers=True, chunk_size=None, using='default'):
+    """
+    Pasa a ``target_id`` los issues asignados a ``source_id`` y, con
+    ``watchers``, sus suscripciones como watcher; ``status_ids`` limita ambos a
+    los issues con esos status.
+
+    Se avanza por bloques de ``chunk_size`` ids en orden, cada uno en su propia
+    transacción (un UPDATE, o un INSERT y un DELETE de watchers), para no
+    retener el bloqueo de escritura durante toda la operación: si se corta a
+    medias, lo ya movido queda hecho y basta con volver a lanzarla. Devuelve
+    {'assigned': issues reasignados, 'watchers': suscripciones movidas}.
+    """
+    chunk_size = chunk_size or getattr(settings, 'ISSUE_BULK_CHUNK_SIZE', 1000)
+    issues = Issue.objects.using(using)
+    if status_ids is not None:
+        issues = issues.filter(status_id__in=status_ids)
+    result = {'assigned': 0, 'watchers': 0}
+
+    last = 0
+    while True:
+        chunk = list(
+            issues.filter(assigned_to_id=source_id, pk__gt=last)
+            .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not chunk:
+            break
+        last = chunk[-1]
+        with transaction.atomic(using=using):
+            # Se vuelve a exigir el asignado por si alguien lo ha cambiado entre medias
+            moved = issues.filter(pk__in=chunk, assigned_to_id=source_id).update(
+                assigned_to_id=target_id, updated_at=timezone.now()
+            )
+            if moved:
+                adjust_user_stats('assigned_issues_count', [source_id], -moved, using=using)
+                adjust_user_stats('assigned_issues_count', [target_id], moved, using=using)
+        result['assigned'] += moved
+
+    if watchers:
+        last = 0
+        while True:
+            chunk = list(
+                issues.filter(watchers=source_id, pk__gt=last)
+                .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                break
+            last = chunk[-1]
+            with transaction.atomic(using=using):
+                add_watchers(chunk, [target_id], using=using)
+                result['watchers'] += remove_watchers(chunk, [source_id], using=using)
+
+    return result
@@ -0,0 +1,135 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .catalogs import ISSUE_FIELDS, get_registry
+from .models import CatalogDeletion, Issue, Priorities, Severities, Status, Types
+
+
+logger = logging.getLogger(__name__)
+
+# Nombre de cada catálogo en CatalogDeletion.catalog (el mismo que en las URLs)
+CATALOG_KEYS = {
+    Status: 'status',
+    Priorities: 'priorities',
+    Types: 'types',
+    Severities: 'severities',
+}
+CATALOG_MODELS = {key: model for model, key in CATALOG_KEYS.items()}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def start_deletion(instance, replacement=None, user=None, using='default'):
+    """
+    Borra la entrada de catálogo ``instance`` pasando antes sus issues a
+    ``replacement`` (por defecto, el valor por defecto del catálogo).
+
+    Si afecta a pocos issues (como mucho un bloque) o CATALOG_DELETION_BACKGROUND
+    está desactivado, se hace en la propia llamada; si no, el trabajo se lanza en
+    segundo plano tras el commit. Si ya había un borrado en marcha de la misma
+    entrada se devuelve ese. Devuelve el CatalogDeletion.
+    """
+    model = type(instance)
+    catalog = CATALOG_KEYS[model]
+    active = CatalogDeletion.objects.using(using).filter(
+        catalog=catalog, object_id=instance.pk, state__in=CatalogDeletion.ACTIVE_STATES
+    ).first()
+    if active is not None:
+        return active
+
+    if replacement is None:
+        replacement = get_registry().default(model)
+    if replacement is None or replacement.pk == instance.pk:
+        raise ValueError(f"No hay un valor al que pasar los issues de {catalog} '{instance.nombre}'.")
+
+    total = Issue.objects.using(using).filter(**{ISSUE_FIELDS[model]: instance}).count()
+    job = CatalogDeletion.objects.using(using).create(
+        catalog=catalog, object_id=instance.pk, nombre=instance.nombre,
+        replacement_id=replacement.pk, total=total, requested_by=user,
+    )
+    if total <= _chunk_size() or not getattr(settings, 'CATALOG_DELETION_BACKGROUND', True):
+        return run_deletion(job.pk, using=using)
+    transaction.on_commit(lambda: _submit(job.pk, using), using=using)
+    return job
+
+
+def run_deletion(job_id, using='default'):
+    """
+    Ejecuta (o retoma) el borrado ``job_id``: recorre por clave los issues que
+    aún apuntan a la entrada y los actualiza por bloques, cada uno en su propia
+    transacción, y después borra la entrada junto con los que se hayan asignado
+    mientras tanto. Si algo falla el trabajo queda en 'failed' con el error y
+    se puede relanzar. Devuelve el CatalogDeletion actualizado.
+    """
+    jobs = CatalogDeletion.objects.using(using)
+    job = jobs.get(pk=job_id)
+    if job.state == CatalogDeletion.DONE:
+        return job
+    jobs.filter(pk=job.pk).update(state=CatalogDeletion.RUNNING, error='')
+
+    model = CATALOG_MODELS[job.catalog]
+    column = f'{ISSUE_FIELDS[model]}_id'
+    issues = Issue.objects.using(using).filter(**{column: job.object_id})
+    chunk_size = _chunk_size()
+    try:
+        last = 0
+        while True:
+            chunk = list(issues.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not chunk:
+                break
+            last = chunk[-1]
+            with transaction.atomic(using=using):
+                moved = issues.filter(pk__in=chunk).update(
+                    **{column: job.replacement_id}, updated_at=timezone.now()
+                )
+                jobs.filter(pk=job.pk).update(processed=F('processed') + moved)
+
+        with transaction.atomic(using=using):
+            moved = issues.update(**{column: job.replacement_id}, updated_at=timezone.now())
+            # Borrado por instancia: las señales invalidan el registro de catálogos
+            model.objects.using(using).filter(pk=job.object_id).delete()
+            jobs.filter(pk=job.pk).update(
+                state=CatalogDeletion.DONE, processed=F('processed') + moved, finished_at=timezone.now()
+            )
+    except Exception as exc:
+        logger.exception("Falló el borrado de %s '%s'", job.catalog, job.nombre)
+        jobs.filter(pk=job.pk).update(state=CatalogDeletion.FAILED, error=str(exc), finished_at=timezone.now())
+    return jobs.get(pk=job.pk)
+
+
+def pending_deletions(include_failed=False, using='default'):
+    """Borrados sin terminar (p. ej. porque se reinició el proceso), en orden de creación."""
+    states = CatalogDeletion.ACTIVE_STATES + ((CatalogDeletion.FAILED,) if include_failed else ())
+    return CatalogDeletion.objects.using(using).filter(state__in=states).order_by('pk')
+
+
+def _chunk_size():
+    return getattr(settings, 'CATALOG_DELETION_CHUNK_SIZE', 1000)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Un solo hilo: los borrados se hacen de uno en uno
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='catalog-deletion')
+        return _executor
+
+
+def _submit(job_id, using):
+    _get_executor().submit(_run_in_thread, job_id, using)
+
+
+def _run_in_thread(job_id, using):
+    try:
+        run_deletion(job_id, using=using)
+    finally:
+        # Las conexiones son por hilo: se cierran para no dejarlas abiertas
+        connections.close_all()
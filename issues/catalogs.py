@@ -0,0 +1,127 @@
+import threading
+import uuid
+
+from django.core.cache import caches
+
+from .models import Priorities, Severities, Status, Types
+
+
+# Catálogos gestionados por el registro y nombre del valor por defecto de cada uno
+CATALOG_MODELS = (Status, Priorities, Types, Severities)
+DEFAULT_NAMES = {
+    Status: 'New',
+    Priorities: 'Medium',
+    Types: 'Bug',
+    Severities: 'Normal',
+}
+# Campo de Issue que apunta a cada catálogo
+ISSUE_FIELDS = {
+    Status: 'status',
+    Priorities: 'priority',
+    Types: 'issue_type',
+    Severities: 'severity',
+}
+
+CACHE_ALIAS = 'shared'
+VERSION_KEY = 'issues:catalogs:version'
+
+_lock = threading.Lock()
+_registry = None
+
+
+class CatalogRegistry:
+    """
+    Instantánea en memoria de los catálogos con índices por nombre y por id.
+
+    Las instancias se comparten entre peticiones e hilos: se pueden asignar a
+    una FK, pero no se deben modificar ni guardar.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self._all = rows
+        self._by_id = {model: {obj.pk: obj for obj in objs} for model, objs in rows.items()}
+        self._by_name = {model: {obj.nombre: obj for obj in objs} for model, objs in rows.items()}
+        self._by_lower_name = {
+            model: {obj.nombre.lower(): obj for obj in reversed(objs)} for model, objs in rows.items()
+        }
+
+    def all(self, model):
+        """Filas del catálogo en el orden de ``model.objects.all()`` (por id)."""
+        return list(self._all[model])
+
+    def by_id(self, model, pk):
+        return self._by_id[model].get(pk)
+
+    def by_name(self, model, name, ignore_case=False):
+        if name is None:
+            return None
+        if ignore_case:
+            return self._by_lower_name[model].get(name.lower())
+        return self._by_name[model].get(name)
+
+    def get(self, model, name):
+        """Como ``model.objects.get(nombre=name)``, sin consulta."""
+        obj = self.by_name(model, name)
+        if obj is None:
+            raise model.DoesNotExist(f"{model.__name__} '{name}' no existe")
+        return obj
+
+    def default(self, model):
+        return self.by_name(model, DEFAULT_NAMES[model])
+
+    def issue_defaults(self):
+        """Valores por defecto de un issue nuevo, listos para ``Issue(**defaults)``."""
+        return {field: self.get(model, DEFAULT_NAMES[model]) for model, field in ISSUE_FIELDS.items()}
+
+    def with_default_first(self, model):
+        """Filas del catálogo con el valor por defecto al principio (desplegables)."""
+        default = self.default(model)
+        rows = self.all(model)
+        if default is None:
+            return rows
+        return [default] + [obj for obj in rows if obj.pk != default.pk]
+
+
+def _shared_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _current_version():
+    cache = _shared_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Caché vacía (primer arranque, expulsión...): se crea una marca nueva;
+        # add() evita pisar la de otro worker que se adelante
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _load(version):
+    rows = {model: list(model.objects.order_by('pk')) for model in CATALOG_MODELS}
+    return CatalogRegistry(version, rows)
+
+
+def get_registry():
+    """
+    Registro de catálogos vigente. En el camino habitual no hace consultas a la
+    base de datos: solo lee la marca de versión de la caché compartida y, si
+    coincide con la del registro cargado, lo devuelve tal cual.
+    """
+    global _registry
+    version = _current_version()
+    registry = _registry
+    if registry is not None and registry.version == version:
+        return registry
+    with _lock:
+        if _registry is None or _registry.version != version:
+            _registry = _load(version)
+        return _registry
+
+
+def invalidate():
+    """Invalida el registro en todos los procesos cambiando la marca de versión."""
+    global _registry
+    _shared_cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+    _registry = None
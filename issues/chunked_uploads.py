@@ -0,0 +1,253 @@
+import base64
+import hashlib
+import logging
+import tempfile
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .attachments import create_placeholder, drop_placeholder, link_placeholder
+from .direct_uploads import check_storage, clean_upload_name
+from .models import Attachment, UploadPart, UploadSession
+from .s3 import MAX_PARTS, MIN_PART_SIZE, delete_object, new_key, object_key, write_parameters
+
+
+logger = logging.getLogger(__name__)
+
+# Cada parte de la sesión es una parte del multipart upload
+MIN_CHUNK_SIZE = MIN_PART_SIZE
+MAX_CHUNKS = MAX_PARTS
+READ_SIZE = 64 * 1024
+
+
+class UploadSessionError(Exception):
+    """Parte o petición que no encaja con la sesión (número fuera de rango, tamaño o MD5 distintos...)."""
+
+
+class UploadSessionClosed(UploadSessionError):
+    """La sesión ya está completada, cancelada o caducada."""
+
+
+class UploadSessionIncomplete(UploadSessionError):
+    """Se ha pedido completar la sesión sin todas las partes; ``missing`` son sus números."""
+
+    def __init__(self, missing):
+        super().__init__(f"Faltan {len(missing)} partes.")
+        self.missing = missing
+
+
+def start_session(user, issue, name, size, content_type, chunk_size=None, using='default'):
+    """
+    Abre una sesión para subir por partes un adjunto de ``issue``: inicia el
+    multipart upload en el bucket y crea el Attachment en estado ``awaiting``.
+    Todas las partes miden ``chunk_size`` (CHUNKED_UPLOAD_CHUNK_SIZE por
+    defecto) salvo la última. Lanza DirectUploadError si el almacenamiento no
+    es S3 y UploadSessionError si el archivo necesita más de MAX_CHUNKS partes.
+    """
+    field = Attachment._meta.get_field('file')
+    storage = field.storage
+    check_storage(storage)
+    chunk_size = chunk_size or getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+    if -(-size // chunk_size) > MAX_CHUNKS:
+        raise UploadSessionError(f"Con partes de {chunk_size} bytes harían falta más de {MAX_CHUNKS}.")
+
+    name = clean_upload_name(name)
+    key = new_key(field, name)
+    params = write_parameters(storage, key, content_type)
+    client = storage.connection.meta.client
+    multipart = client.create_multipart_upload(Bucket=storage.bucket_name, Key=object_key(storage, key), **params)
+    try:
+        with transaction.atomic(using=using):
+            attachment = create_placeholder(issue, name, size, using=using)
+            return UploadSession.objects.using(using).create(
+                user=user, attachment=attachment, key=key, multipart_id=multipart['UploadId'],
+                name=name, size=size, content_type=content_type, chunk_size=chunk_size,
+                expires_at=_expiry(),
+            )
+    except Exception:
+        _abort_multipart(storage, key, multipart['UploadId'])
+        raise
+
+
+def receive_chunk(session, number, stream, length, md5=None, using='default'):
+    """
+    Guarda la parte ``number`` (desde 1) de la sesión leyendo ``length`` bytes
+    de ``stream``. El cuerpo se guarda en memoria (las partes miden como mucho
+    CHUNKED_UPLOAD_MAX_CHUNK_SIZE) mientras se calcula su MD5 y se envía como
+    esa parte del multipart upload, con Content-MD5 para que S3 compruebe que
+    llega íntegra; nunca se junta con las demás en el servidor.
+    Si ``md5`` (hexadecimal) no coincide no se envía. Reenviar una parte la
+    sustituye, así que los reintentos son seguros. Renueva la caducidad de la
+    sesión. Devuelve el UploadPart.
+    """
+    if session.state != UploadSession.PENDING:
+        raise UploadSessionClosed("La sesión ya está cerrada.")
+    if session.attachment_id is None:
+        _fail(session, "El adjunto se ha borrado antes de terminar la subida.", using)
+        raise UploadSessionClosed("El adjunto se ha borrado antes de terminar la subida.")
+    if not 1 <= number <= session.total_chunks:
+        raise UploadSessionError(f"La sesión tiene las partes de 1 a {session.total_chunks}.")
+    expected = chunk_length(session, number)
+    if length != expected:
+        raise UploadSessionError(f"La parte {number} debe medir {expected} bytes.")
+
+    storage = Attachment._meta.get_field('file').storage
+    digest = hashlib.md5()
+    # boto3 necesita poder rebobinar el cuerpo para firmarlo y para reintentar;
+    # solo pasan a disco las partes de sesiones abiertas con un máximo mayor
+    with tempfile.SpooledTemporaryFile(
+        max_size=getattr(settings, 'CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 16 * 1024 * 1024),
+        dir=settings.FILE_UPLOAD_TEMP_DIR,
+    ) as spool:
+        remaining = length
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                raise UploadSessionError(f"El cuerpo de la parte {number} está incompleto.")
+            digest.update(data)
+            spool.write(data)
+            remaining -= len(data)
+        checksum = digest.hexdigest()
+        if md5 and md5.lower() != checksum:
+            raise UploadSessionError(f"El MD5 de la parte {number} no coincide con el enviado.")
+        spool.seek(0)
+        try:
+            response = storage.connection.meta.client.upload_part(
+                Bucket=storage.bucket_name, Key=object_key(storage, session.key),
+                UploadId=session.multipart_id, PartNumber=number, Body=spool,
+                ContentLength=length, ContentMD5=base64.b64encode(digest.digest()).decode(),
+            )
+        except ClientError:
+            # Caducada o cancelada mientras llegaba la parte
+            if UploadSession.objects.using(using).filter(pk=session.pk, state=UploadSession.PENDING).exists():
+                raise
+            raise UploadSessionClosed("La sesión ya está cerrada.")
+
+    with transaction.atomic(using=using):
+        part, _created = UploadPart.objects.using(using).update_or_create(
+            session=session, number=number,
+            defaults={'size': length, 'md5': checksum, 'etag': response['ETag'].strip('"')},
+        )
+        UploadSession.objects.using(using).filter(pk=session.pk).update(expires_at=_expiry())
+    return part
+
+
+def complete_session(session_id, using='default'):
+    """
+    Completa la sesión: con todas las partes recibidas cierra el multipart
+    upload (S3 junta las partes sin que vuelvan a pasar por el servidor) y
+    asigna el objeto al adjunto, que pasa a ``stored``. Lanza
+    UploadSessionIncomplete con las partes que faltan. Devuelve la
+    UploadSession.
+    """
+    sessions = UploadSession.objects.using(using)
+    session = sessions.get(pk=session_id)
+    if session.state != UploadSession.PENDING:
+        return session
+    if session.attachment_id is None:
+        return _fail(session, "El adjunto se ha borrado antes de terminar la subida.", using)
+
+    parts = list(session.parts.using(using).order_by('number').values_list('number', 'etag'))
+    missing = missing_chunks(session, [number for number, _etag in parts])
+    if missing:
+        raise UploadSessionIncomplete(missing)
+
+    storage = Attachment._meta.get_field('file').storage
+    try:
+        storage.connection.meta.client.complete_multipart_upload(
+            Bucket=storage.bucket_name, Key=object_key(storage, session.key), UploadId=session.multipart_id,
+            MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etag} for number, etag in parts]},
+        )
+    except ClientError as exc:
+        session = sessions.get(pk=session.pk)
+        if session.state != UploadSession.PENDING:
+            # Otra llamada la ha completado o cerrado entretanto
+            return session
+        raise UploadSessionError(f"El almacenamiento no ha podido juntar las partes: {exc}")
+
+    with transaction.atomic(using=using):
+        if not sessions.filter(pk=session.pk, state=UploadSession.PENDING).update(
+            state=UploadSession.DONE, finished_at=timezone.now()
+        ):
+            return sessions.get(pk=session.pk)
+        linked = link_placeholder(session.attachment_id, session.key, session.size, using=using)
+        if not linked:
+            transaction.set_rollback(True, using=using)
+    if not linked:
+        return _fail(session, "El adjunto se ha borrado antes de terminar la subida.", using)
+    # Las partes ya no hacen falta
+    session.parts.using(using).all().delete()
+    return sessions.get(pk=session.pk)
+
+
+def abort_session(session_id, using='default'):
+    """Cancela la sesión: descarta en el bucket las partes subidas y borra el adjunto ``awaiting``."""
+    session = UploadSession.objects.using(using).get(pk=session_id)
+    return _fail(session, "Subida cancelada.", using)
+
+
+def expire_sessions(using='default'):
+    """
+    Cierra las sesiones sin actividad desde hace más de CHUNKED_UPLOAD_EXPIRES:
+    se abortan sus multipart uploads (S3 borra las partes) y se borran los
+    adjuntos que las esperaban. Devuelve el número de sesiones cerradas.
+    """
+    expired = UploadSession.objects.using(using).filter(
+        state=UploadSession.PENDING, expires_at__lt=timezone.now()
+    )
+    count = 0
+    for session in expired.order_by('pk').iterator():
+        if _fail(session, "La sesión ha caducado sin completarse.", using).state == UploadSession.FAILED:
+            count += 1
+    return count
+
+
+def chunk_length(session, number):
+    """Tamaño que debe tener la parte ``number`` de la sesión."""
+    if number < session.total_chunks:
+        return session.chunk_size
+    return session.size - session.chunk_size * (session.total_chunks - 1)
+
+
+def missing_chunks(session, received):
+    """Números de las partes de la sesión que no están en ``received``."""
+    received = set(received)
+    return [number for number in range(1, session.total_chunks + 1) if number not in received]
+
+
+def _fail(session, error, using):
+    sessions = UploadSession.objects.using(using)
+    with transaction.atomic(using=using):
+        if not sessions.filter(pk=session.pk, state=UploadSession.PENDING).update(
+            state=UploadSession.FAILED, error=error, finished_at=timezone.now()
+        ):
+            # Otra llamada la ha cerrado ya (y quizá enlazado el objeto): no se toca
+            return sessions.get(pk=session.pk)
+        if session.attachment_id:
+            drop_placeholder(session.attachment_id, using=using)
+        session.parts.using(using).all().delete()
+        storage = Attachment._meta.get_field('file').storage
+
+        def discard():
+            _abort_multipart(storage, session.key, session.multipart_id)
+            # Por si llegó a completarse en el bucket
+            delete_object(storage, session.key)
+        transaction.on_commit(discard, using=using)
+    return sessions.get(pk=session.pk)
+
+
+def _abort_multipart(storage, key, multipart_id):
+    try:
+        storage.connection.meta.client.abort_multipart_upload(
+            Bucket=storage.bucket_name, Key=object_key(storage, key), UploadId=multipart_id
+        )
+    except ClientError as exc:
+        if exc.response.get('Error', {}).get('Code') != 'NoSuchUpload':
+            logger.exception("No se pudo abortar el multipart upload de %s", key)
+
+
+def _expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, 'CHUNKED_UPLOAD_EXPIRES', 24 * 3600))
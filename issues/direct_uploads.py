@@ -0,0 +1,200 @@
+import base64
+import binascii
+import posixpath
+from datetime import timedelta
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .attachments import create_placeholder, drop_placeholder, link_placeholder
+from .models import Attachment, DirectUpload, Profile
+from .s3 import delete_object, is_s3, new_key, object_key, write_parameters
+from .storage_gc import queue_deletion, stored_names
+from .variants import schedule_variants
+
+# Parámetros de put_object que el cliente envía como cabeceras (y entran en la firma)
+_HEADERS = {
+    'ACL': 'x-amz-acl',
+    'CacheControl': 'Cache-Control',
+    'ContentDisposition': 'Content-Disposition',
+    'ContentEncoding': 'Content-Encoding',
+    'ContentLanguage': 'Content-Language',
+    'ContentLength': 'Content-Length',
+    'ContentMD5': 'Content-MD5',
+    'ContentType': 'Content-Type',
+    'ServerSideEncryption': 'x-amz-server-side-encryption',
+    'StorageClass': 'x-amz-storage-class',
+}
+
+# Margen tras caducar la URL antes de dar una subida por abandonada: S3 solo
+# comprueba la caducidad al empezar, una subida grande puede acabar después
+EXPIRY_GRACE = timedelta(hours=1)
+
+
+class DirectUploadError(Exception):
+    """El almacenamiento de destino no admite subidas directas (no es S3)."""
+
+
+def start_upload(user, target, name, size, md5, content_type, issue=None, using='default'):
+    """
+    Prepara la subida directa de un archivo al bucket: le asigna un nombre único
+    y crea el DirectUpload y, para un adjunto de ``issue``, el Attachment en
+    estado ``awaiting``. La URL prefirmada la da upload_target(). Lanza
+    DirectUploadError si el almacenamiento no es S3.
+    """
+    field = _file_field(target)
+    check_storage(field.storage)
+    name = clean_upload_name(name)
+    with transaction.atomic(using=using):
+        attachment = None
+        if target == DirectUpload.ATTACHMENT:
+            attachment = create_placeholder(issue, name, size, using=using)
+        return DirectUpload.objects.using(using).create(
+            user=user, target=target, attachment=attachment, key=new_key(field, name),
+            name=name, size=size, md5=md5.lower(), content_type=content_type,
+            expires_at=timezone.now() + timedelta(seconds=getattr(settings, 'DIRECT_UPLOAD_EXPIRES', 900)),
+        )
+
+
+def upload_target(upload):
+    """
+    Petición con la que el cliente sube el archivo: {'method', 'url', 'headers',
+    'expires_at'}. La URL se firma con el tamaño, el MD5 y el tipo declarados,
+    así que S3 rechaza otro contenido. None si la subida ya no está pendiente o
+    la URL ha caducado.
+    """
+    remaining = int((upload.expires_at - timezone.now()).total_seconds())
+    if upload.state != DirectUpload.PENDING or remaining <= 0:
+        return None
+    storage = _file_field(upload.target).storage
+    params = write_parameters(storage, upload.key, upload.content_type)
+    params.update(
+        ContentLength=upload.size,
+        ContentMD5=base64.b64encode(binascii.unhexlify(upload.md5)).decode(),
+    )
+    params = {key: value for key, value in params.items() if key in _HEADERS}
+    url = storage.connection.meta.client.generate_presigned_url(
+        'put_object',
+        Params={'Bucket': storage.bucket_name, 'Key': object_key(storage, upload.key), **params},
+        ExpiresIn=remaining,
+        HttpMethod='PUT',
+    )
+    # Content-Length lo pone el propio cliente HTTP
+    headers = {_HEADERS[key]: str(value) for key, value in params.items() if key != 'ContentLength'}
+    return {'method': 'PUT', 'url': url, 'headers': headers, 'expires_at': upload.expires_at}
+
+
+def finalize_upload(upload_id, using='default'):
+    """
+    Confirma la subida ``upload_id``: con un HEAD comprueba que el objeto existe
+    y que su tamaño y su MD5 (ETag) son los declarados, y lo enlaza con el
+    adjunto (que pasa a ``stored``) o con el avatar del usuario. Si no coinciden,
+    o el adjunto se borró entretanto, la subida queda en ``failed`` y el objeto
+    se borra. Si el objeto aún no está, la subida sigue en ``pending``.
+    Devuelve el DirectUpload.
+    """
+    uploads = DirectUpload.objects.using(using)
+    upload = uploads.get(pk=upload_id)
+    if upload.state != DirectUpload.PENDING:
+        return upload
+    if upload.target == DirectUpload.ATTACHMENT and upload.attachment_id is None:
+        return _fail(upload, "El adjunto se ha borrado antes de terminar la subida.", using)
+
+    head = _head(_file_field(upload.target).storage, upload.key)
+    if head is None:
+        return upload
+    error = _mismatch(upload, head)
+    if error:
+        return _fail(upload, error, using)
+
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        # Solo la primera confirmación enlaza el objeto
+        if not uploads.filter(pk=upload.pk, state=DirectUpload.PENDING).update(
+            state=DirectUpload.DONE, finished_at=now
+        ):
+            return uploads.get(pk=upload.pk)
+        if upload.target == DirectUpload.ATTACHMENT:
+            linked = link_placeholder(upload.attachment_id, upload.key, head['ContentLength'], using=using)
+        else:
+            profiles = Profile.objects.using(using).filter(user=upload.user_id)
+            # update() no emite post_save: el avatar anterior se anota aquí para borrarlo
+            for profile in profiles.select_for_update().only('avatar', 'avatar_variants'):
+                queue_deletion('avatar', stored_names('avatar', profile), using=using)
+            linked = profiles.update(avatar=upload.key)
+            schedule_variants('avatar', profiles.values_list('pk', flat=True), using=using)
+        if not linked:
+            transaction.set_rollback(True, using=using)
+    if not linked:
+        return _fail(upload, "El adjunto se ha borrado antes de terminar la subida.", using)
+    return uploads.get(pk=upload.pk)
+
+
+def expire_uploads(using='default'):
+    """
+    Da por abandonadas las subidas sin confirmar cuya URL caducó hace más de
+    EXPIRY_GRACE: quedan en ``failed``, se borra lo que se llegara a subir y los
+    adjuntos en ``awaiting``. Devuelve el número de subidas expiradas.
+    """
+    limit = timezone.now() - EXPIRY_GRACE
+    expired = DirectUpload.objects.using(using).filter(state=DirectUpload.PENDING, expires_at__lt=limit)
+    count = 0
+    for upload in expired.order_by('pk').iterator():
+        if _fail(upload, "La subida ha caducado sin confirmarse.", using).state == DirectUpload.FAILED:
+            count += 1
+    return count
+
+
+def _fail(upload, error, using):
+    uploads = DirectUpload.objects.using(using)
+    with transaction.atomic(using=using):
+        if not uploads.filter(pk=upload.pk, state=DirectUpload.PENDING).update(
+            state=DirectUpload.FAILED, error=error, finished_at=timezone.now()
+        ):
+            # Otra llamada la ha cerrado ya (y quizá enlazado el objeto): no se toca
+            return uploads.get(pk=upload.pk)
+        if upload.attachment_id:
+            drop_placeholder(upload.attachment_id, using=using)
+        storage = _file_field(upload.target).storage
+        transaction.on_commit(lambda: delete_object(storage, upload.key), using=using)
+    return uploads.get(pk=upload.pk)
+
+
+def check_storage(storage):
+    """Lanza DirectUploadError si ``storage`` no es S3."""
+    if not is_s3(storage):
+        raise DirectUploadError("El almacenamiento configurado no admite subidas directas.")
+
+
+def clean_upload_name(name):
+    """Nombre de archivo declarado por el cliente, sin directorios."""
+    return posixpath.basename(name.replace('\\', '/'))[:255]
+
+
+def _file_field(target):
+    if target == DirectUpload.ATTACHMENT:
+        return Attachment._meta.get_field('file')
+    return Profile._meta.get_field('avatar')
+
+
+def _head(storage, key):
+    try:
+        return storage.connection.meta.client.head_object(
+            Bucket=storage.bucket_name, Key=object_key(storage, key)
+        )
+    except ClientError as exc:
+        if exc.response['ResponseMetadata']['HTTPStatusCode'] == 404:
+            return None
+        raise
+
+
+def _mismatch(upload, head):
+    if head['ContentLength'] != upload.size:
+        return f"El archivo subido ocupa {head['ContentLength']} bytes y se declararon {upload.size}."
+    # Con SSE-KMS el ETag no es el MD5; ahí basta con el Content-MD5 firmado, que S3 comprueba
+    etag = head.get('ETag', '').strip('"')
+    if head.get('ServerSideEncryption') != 'aws:kms' and etag != upload.md5:
+        return "El MD5 del archivo subido no coincide con el declarado."
+    return ''
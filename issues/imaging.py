@@ -0,0 +1,125 @@
+import io
+import posixpath
+import re
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Miniaturas con Pillow. Sin dependencias de Django: render_variants se
+# ejecuta en los procesos del grupo de issues.variants.
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff'}
+# Extensión de los archivos de cada formato
+EXTENSIONS = {'jpeg': 'jpg', 'webp': 'webp'}
+# El storage puede añadir un sufijo (_XXXXXXX) si el nombre ya existe
+_VARIANT_NAME = re.compile(r'^(.+)-[0-9]+(?:_[A-Za-z0-9]{7})?\.(?:%s)$' % '|'.join(EXTENSIONS.values()))
+
+
+class ImageError(Exception):
+    """El archivo no es una imagen que se pueda procesar (formato desconocido, demasiado grande...)."""
+
+
+def is_image(name):
+    """True si ``name`` tiene la extensión de un formato de imagen que admite Pillow."""
+    return posixpath.splitext(name or '')[1].lower() in IMAGE_EXTENSIONS
+
+
+def variant_name(name, size, fmt):
+    """Nombre en el almacenamiento de la variante ``size``/``fmt`` del archivo ``name``."""
+    return f"{posixpath.splitext(name)[0]}-{size}.{EXTENSIONS[fmt]}"
+
+
+def variant_root(name):
+    """
+    Nombre sin extensión del original del que ``name`` sería una variante
+    (``<raíz>-<tamaño>.<ext>``), o None si no tiene esa forma.
+    """
+    match = _VARIANT_NAME.match(name)
+    return match.group(1) if match else None
+
+
+def current_variants(variants, name):
+    """
+    Variantes de ``variants`` (el JSON que guarda issues.variants) si son del
+    archivo ``name``: {tamaño: {'width', 'height', formato: nombre}}. Tras
+    cambiar el archivo, y hasta que se generan las nuevas, no hay ninguna.
+    """
+    if not name or not variants or variants.get('source') != name:
+        return {}
+    return variants.get('sizes', {})
+
+
+def pick_variant(variants, name, size, fmt='jpeg'):
+    """
+    Nombre de la variante más pequeña de al menos ``size`` px (o la mayor, si
+    ninguna llega) del archivo ``name``, o None si no tiene.
+    """
+    sizes = sorted(current_variants(variants, name).items(), key=lambda item: int(item[0]))
+    if not sizes:
+        return None
+    for key, variant in sizes:
+        if int(key) >= size:
+            return variant.get(fmt)
+    return sizes[-1][1].get(fmt)
+
+
+def render_variants(data, sizes, formats, quality=80, max_pixels=None):
+    """
+    Genera las miniaturas de la imagen ``data`` (bytes): para cada tamaño de
+    ``sizes``, la imagen reducida hasta que su lado mayor mida como mucho esos
+    px, en cada formato de ``formats`` ('webp', 'jpeg'). Nunca se amplía: de
+    los tamaños que superan la imagen solo se genera el menor. Se aplica la
+    orientación del EXIF y después se descarta, con el resto de metadatos
+    salvo el perfil de color. Devuelve [(tamaño, ancho, alto, {formato: bytes})].
+    Lanza ImageError si no se puede abrir.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if max_pixels and image.width * image.height > max_pixels:
+                raise ImageError(f"La imagen tiene más de {max_pixels} píxeles.")
+            wanted = _wanted_sizes(sizes, max(image.size))
+            # JPEG: se decodifica ya reducida (escalado DCT), mucho más rápido
+            image.draft('RGB', (wanted[-1], wanted[-1]))
+            # El perfil de color solo vale si la imagen ya era RGB (no CMYK, grises...)
+            icc_profile = image.info.get('icc_profile') if image.mode in ('RGB', 'RGBA') else None
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+    except UnidentifiedImageError as exc:
+        raise ImageError("No es una imagen en un formato conocido.") from exc
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise ImageError(str(exc)) from exc
+
+    results = []
+    # De mayor a menor, cada una a partir de la anterior
+    for size in reversed(wanted):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        encoded = {fmt: _encode(image, fmt, quality, icc_profile) for fmt in formats}
+        results.append((size, image.width, image.height, encoded))
+    return results[::-1]
+
+
+def _wanted_sizes(sizes, longest):
+    sizes = sorted(set(sizes))
+    wanted = [size for size in sizes if size < longest]
+    larger = [size for size in sizes if size >= longest]
+    if larger:
+        wanted.append(larger[0])
+    return wanted
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _encode(image, fmt, quality, icc_profile):
+    out = io.BytesIO()
+    options = {'icc_profile': icc_profile} if icc_profile else {}
+    if fmt == 'jpeg':
+        if image.mode == 'RGBA':
+            # JPEG no admite transparencia: se pone sobre fondo blanco
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.save(out, 'JPEG', quality=quality, optimize=True, progressive=True, **options)
+    else:
+        image.save(out, 'WEBP', quality=quality, method=4, **options)
+    return out.getvalue()
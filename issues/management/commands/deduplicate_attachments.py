@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from issues.attachments import deduplicate_attachment, unhashed_attachments
+
+
+class Command(BaseCommand):
+    help = ("Calcula el SHA-256 de los adjuntos guardados sin él (anteriores a la deduplicación, o subidos "
+            "directamente o por partes) y hace que los de igual contenido compartan un único objeto.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        hashed = duplicates = failed = 0
+        for pk in unhashed_attachments(using=using).values_list('pk', flat=True):
+            try:
+                if deduplicate_attachment(pk, using=using):
+                    duplicates += 1
+                hashed += 1
+            except Exception as exc:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"adjunto {pk}: {exc}"))
+        summary = f"{hashed} adjuntos revisados, {duplicates} copias eliminadas, {failed} con error"
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from issues.chunked_uploads import expire_sessions
+from issues.direct_uploads import expire_uploads
+
+
+class Command(BaseCommand):
+    help = ("Descarta las subidas directas que no se confirmaron a tiempo y las subidas por partes caducadas: "
+            "borra del almacenamiento lo que se llegara a subir y los attachments que las esperaban. Pensado "
+            "para lanzarse periódicamente.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        uploads = expire_uploads(using=options['database'])
+        sessions = expire_sessions(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f"{uploads} subidas directas y {sessions} subidas por partes caducadas"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from issues.variants import KINDS, generate_variants, missing_variants
+
+
+class Command(BaseCommand):
+    help = ("Genera las miniaturas de los adjuntos y avatares que aún no las tienen "
+            "(p. ej. los subidos antes de que existieran o cuya generación falló).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(KINDS), help="Solo adjuntos o solo avatares")
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        generated = skipped = 0
+        for kind in [options['kind']] if options['kind'] else sorted(KINDS):
+            for pk in missing_variants(kind, using=using):
+                if generate_variants(kind, pk, using=using):
+                    generated += 1
+                else:
+                    skipped += 1
+                    self.stdout.write(self.style.WARNING(f"{kind} {pk}: sin miniaturas"))
+        self.stdout.write(self.style.SUCCESS(f"{generated} imágenes con miniaturas, {skipped} sin generar"))
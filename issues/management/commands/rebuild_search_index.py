@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from issues.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = ("Regenera el índice de texto completo de issues y comentarios y, en SQLite, vuelve a crear los "
+            "triggers que lo mantienen (se pierden si una migración reconstruye las tablas).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        with transaction.atomic(using=using):
+            missing = rebuild_search_index(using=using)
+        if missing is None:
+            raise CommandError("Esta base de datos no tiene índice de texto completo: la búsqueda usa icontains.")
+        if missing:
+            self.stdout.write(self.style.WARNING(f"Triggers recreados: {', '.join(missing)}"))
+        self.stdout.write(self.style.SUCCESS("Índice de búsqueda regenerado"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from issues.models import Trigram
+from issues.trigrams import pg_trgm_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Regenera el índice de trigramas de la búsqueda aproximada (subjects y usernames)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=[kind for kind, _label in Trigram.KIND_CHOICES],
+            action='append',
+            help="Tipo a regenerar; por defecto todos",
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if pg_trgm_available(using):
+            self.stdout.write("pg_trgm disponible: la búsqueda usa los índices GIN, no hay tabla que regenerar.")
+        kinds = options['kind'] or [kind for kind, _label in Trigram.KIND_CHOICES]
+        for kind in kinds:
+            total = rebuild_index(kind, using=using)
+            self.stdout.write(self.style.SUCCESS(f"{kind}: {total} objetos indexados"))
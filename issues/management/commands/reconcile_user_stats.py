@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from issues.user_stats import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores de actividad de los usuarios (UserStats) e informa de las desviaciones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Solo informa de las desviaciones, sin corregirlas",
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        fix = not options['dry_run']
+        checked, missing, drift = reconcile(
+            fix=fix, using=options['database'], chunk_size=options['chunk_size']
+        )
+        for user_id, field, stored, actual in drift:
+            self.stdout.write(f"usuario {user_id}: {field} {stored} -> {actual}")
+        verb = "corregidos" if fix else "por corregir"
+        summary = f"{checked} usuarios revisados, {missing} sin fila, {len(drift)} contadores {verb}"
+        if missing or drift:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from issues.catalog_deletion import pending_deletions, run_deletion
+from issues.models import CatalogDeletion
+
+
+class Command(BaseCommand):
+    help = "Retoma los borrados de catálogo sin terminar (p. ej. tras reiniciar el servidor)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-failed',
+            action='store_true',
+            help="Relanza también los que terminaron con error",
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        jobs = list(pending_deletions(include_failed=options['include_failed'], using=using))
+        for job in jobs:
+            job = run_deletion(job.pk, using=using)
+            message = f"{job.catalog} '{job.nombre}': {job.processed}/{job.total} issues reasignados"
+            if job.state == CatalogDeletion.DONE:
+                self.stdout.write(self.style.SUCCESS(message))
+            else:
+                self.stdout.write(self.style.ERROR(f"{message}, error: {job.error}"))
+        if not jobs:
+            self.stdout.write("No hay borrados pendientes.")
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from issues.s3 import delete_objects
+from issues.storage_gc import KINDS, drain, file_field, find_orphans
+
+
+class Command(BaseCommand):
+    help = ("Borra los archivos anotados para borrar y, después, recorre el almacenamiento de adjuntos y "
+            "avatares borrando los que no usa ninguna fila (huérfanos).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=sorted(KINDS), help="Solo adjuntos o solo avatares")
+        parser.add_argument(
+            '--grace', type=int,
+            help="Respeta los archivos modificados hace menos de estos segundos (por defecto STORAGE_SWEEP_GRACE)",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Solo lista los huérfanos, sin borrarlos")
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        dry_run = options['dry_run']
+        grace = timedelta(seconds=options['grace']) if options['grace'] is not None else None
+
+        if not dry_run:
+            deleted, failed = drain(using=using)
+            self.stdout.write(f"{deleted} archivos pendientes borrados, {failed} con error")
+
+        orphans = failed = 0
+        for kind in [options['kind']] if options['kind'] else sorted(KINDS):
+            storage = file_field(kind).storage
+            for names in find_orphans(kind, grace=grace, using=using):
+                orphans += len(names)
+                if dry_run:
+                    for name in names:
+                        self.stdout.write(name)
+                    continue
+                for name, error in delete_objects(storage, names).items():
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f"{name}: {error}"))
+
+        summary = f"{orphans} huérfanos" + (" (sin borrar)" if dry_run else f" borrados, {failed} con error")
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
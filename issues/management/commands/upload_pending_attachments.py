@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from issues.attachments import store_attachment, unfinished_attachments
+from issues.models import Attachment
+
+
+class Command(BaseCommand):
+    help = ("Sube al almacenamiento los adjuntos que siguen en staging (p. ej. tras reiniciar el servidor). "
+            "Se lanza en la máquina donde están los archivos de staging.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-failed',
+            action='store_true',
+            help="Reintenta también los que fallaron",
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        stored = failed = 0
+        for pk in unfinished_attachments(include_failed=options['include_failed'], using=using).values_list('pk', flat=True):
+            attachment = store_attachment(pk, using=using)
+            if attachment is None:
+                continue
+            if attachment.state == Attachment.STORED:
+                stored += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"adjunto {pk} ({attachment.name}): {attachment.error}"))
+        summary = f"{stored} adjuntos subidos, {failed} con error"
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
@@ -0,0 +1,172 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE issues_issue_fts USING fts5(
+        subject, description, comments,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO issues_issue_fts (rowid, subject, description, comments)
+    SELECT i.id, i.subject, i.description,
+           coalesce((SELECT group_concat(c.text, ' ') FROM issues_comment c WHERE c.issue_id = i.id), '')
+    FROM issues_issue i
+    """,
+    """
+    CREATE TRIGGER issues_issue_fts_ai AFTER INSERT ON issues_issue BEGIN
+        INSERT INTO issues_issue_fts (rowid, subject, description, comments)
+        VALUES (new.id, new.subject, new.description, '');
+    END
+    """,
+    """
+    CREATE TRIGGER issues_issue_fts_au AFTER UPDATE OF subject, description ON issues_issue BEGIN
+        UPDATE issues_issue_fts SET subject = new.subject, description = new.description
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER issues_issue_fts_ad AFTER DELETE ON issues_issue BEGIN
+        DELETE FROM issues_issue_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER issues_comment_fts_ai AFTER INSERT ON issues_comment BEGIN
+        UPDATE issues_issue_fts
+        SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = new.issue_id), '')
+        WHERE rowid = new.issue_id;
+    END
+    """,
+    """
+    CREATE TRIGGER issues_comment_fts_au AFTER UPDATE OF text, issue_id ON issues_comment BEGIN
+        UPDATE issues_issue_fts
+        SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = old.issue_id), '')
+        WHERE rowid = old.issue_id;
+        UPDATE issues_issue_fts
+        SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = new.issue_id), '')
+        WHERE rowid = new.issue_id;
+    END
+    """,
+    """
+    CREATE TRIGGER issues_comment_fts_ad AFTER DELETE ON issues_comment BEGIN
+        UPDATE issues_issue_fts
+        SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = old.issue_id), '')
+        WHERE rowid = old.issue_id;
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS issues_comment_fts_ad",
+    "DROP TRIGGER IF EXISTS issues_comment_fts_au",
+    "DROP TRIGGER IF EXISTS issues_comment_fts_ai",
+    "DROP TRIGGER IF EXISTS issues_issue_fts_ad",
+    "DROP TRIGGER IF EXISTS issues_issue_fts_au",
+    "DROP TRIGGER IF EXISTS issues_issue_fts_ai",
+    "DROP TABLE IF EXISTS issues_issue_fts",
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE issues_issue_search (
+        issue_id bigint PRIMARY KEY REFERENCES issues_issue (id) ON DELETE CASCADE,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX issues_issue_search_document_idx ON issues_issue_search USING gin (document)",
+    """
+    CREATE FUNCTION issues_issue_search_refresh(target bigint) RETURNS void AS $$
+        INSERT INTO issues_issue_search (issue_id, document)
+        SELECT i.id,
+               setweight(to_tsvector('simple', coalesce(i.subject, '')), 'A') ||
+               setweight(to_tsvector('simple', coalesce(i.description, '')), 'B') ||
+               setweight(to_tsvector('simple', coalesce(
+                   (SELECT string_agg(c.text, ' ') FROM issues_comment c WHERE c.issue_id = i.id), ''
+               )), 'C')
+        FROM issues_issue i
+        WHERE i.id = target
+        ON CONFLICT (issue_id) DO UPDATE SET document = EXCLUDED.document;
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE FUNCTION issues_issue_search_issue_trigger() RETURNS trigger AS $$
+    BEGIN
+        PERFORM issues_issue_search_refresh(NEW.id);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE FUNCTION issues_issue_search_comment_trigger() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM issues_issue_search_refresh(OLD.issue_id);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM issues_issue_search_refresh(NEW.issue_id);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER issues_issue_search_issue
+    AFTER INSERT OR UPDATE OF subject, description ON issues_issue
+    FOR EACH ROW EXECUTE FUNCTION issues_issue_search_issue_trigger()
+    """,
+    """
+    CREATE TRIGGER issues_issue_search_comment
+    AFTER INSERT OR UPDATE OF text, issue_id OR DELETE ON issues_comment
+    FOR EACH ROW EXECUTE FUNCTION issues_issue_search_comment_trigger()
+    """,
+    "SELECT issues_issue_search_refresh(id) FROM issues_issue",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS issues_issue_search_comment ON issues_comment",
+    "DROP TRIGGER IF EXISTS issues_issue_search_issue ON issues_issue",
+    "DROP FUNCTION IF EXISTS issues_issue_search_comment_trigger()",
+    "DROP FUNCTION IF EXISTS issues_issue_search_issue_trigger()",
+    "DROP FUNCTION IF EXISTS issues_issue_search_refresh(bigint)",
+    "DROP TABLE IF EXISTS issues_issue_search",
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+        statements = SQLITE_FORWARD
+    elif connection.vendor == 'postgresql':
+        statements = POSTGRES_FORWARD
+    else:
+        # Sin índice: issues.search recurre a icontains
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    statements = {
+        'sqlite': SQLITE_BACKWARD,
+        'postgresql': POSTGRES_BACKWARD,
+    }.get(schema_editor.connection.vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0001_SetDefaultSettings'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:44
+
+import re
+
+from django.db import migrations, models, transaction
+
+
+# Copia de issues.trigrams.trigrams en el momento de la migración: las
+# migraciones no deben depender del código de la aplicación
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def trigrams(text):
+    result = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+POSTGRES_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS issues_issue_subject_trgm_idx ON issues_issue USING gin (subject gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS auth_user_username_trgm_idx ON auth_user USING gin (username gin_trgm_ops)",
+]
+
+
+def _enable_pg_trgm(schema_editor):
+    # Puede fallar por falta de permisos: en ese caso se usa la tabla de trigramas
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        return True
+    except Exception:
+        return False
+
+
+def build_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql' and _enable_pg_trgm(schema_editor):
+        for statement in POSTGRES_INDEXES:
+            schema_editor.execute(statement)
+        return
+
+    using = schema_editor.connection.alias
+    Trigram = apps.get_model('issues', 'Trigram')
+    sources = [
+        ('subject', apps.get_model('issues', 'Issue'), 'subject'),
+        ('username', apps.get_model('auth', 'User'), 'username'),
+    ]
+    for kind, model, field in sources:
+        rows = []
+        for pk, text in model.objects.using(using).values_list('pk', field).iterator():
+            rows.extend(Trigram(kind=kind, object_id=pk, trigram=trigram) for trigram in trigrams(text))
+            if len(rows) >= 5000:
+                Trigram.objects.using(using).bulk_create(rows)
+                rows = []
+        Trigram.objects.using(using).bulk_create(rows)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS issues_issue_subject_trgm_idx")
+        schema_editor.execute("DROP INDEX IF EXISTS auth_user_username_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0003_issue_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('subject', 'Issue subject'), ('username', 'Username')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('trigram', models.CharField(max_length=3)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'trigram', 'object_id'], name='issues_trigram_lookup_idx'), models.Index(fields=['object_id', 'kind'], name='issues_trigram_object_idx')],
+            },
+        ),
+        migrations.RunPython(build_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:46
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    # Las filas existentes no tienen historial: se toma la fecha de creación
+    Issue = apps.get_model('issues', 'Issue')
+    Issue.objects.using(schema_editor.connection.alias).update(updated_at=F('created_at'))
+
+
+# En SQLite, AddField/RemoveField reconstruyen issues_issue y con ello borran
+# los triggers de 0003 que mantienen issues_issue_fts: se vuelven a crear
+SQLITE_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS issues_issue_fts_ai",
+    "DROP TRIGGER IF EXISTS issues_issue_fts_au",
+    "DROP TRIGGER IF EXISTS issues_issue_fts_ad",
+    """
+    CREATE TRIGGER issues_issue_fts_ai AFTER INSERT ON issues_issue BEGIN
+        INSERT INTO issues_issue_fts (rowid, subject, description, comments)
+        VALUES (new.id, new.subject, new.description, '');
+    END
+    """,
+    """
+    CREATE TRIGGER issues_issue_fts_au AFTER UPDATE OF subject, description ON issues_issue BEGIN
+        UPDATE issues_issue_fts SET subject = new.subject, description = new.description
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER issues_issue_fts_ad AFTER DELETE ON issues_issue BEGIN
+        DELETE FROM issues_issue_fts WHERE rowid = old.id;
+    END
+    """,
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        # PostgreSQL conserva los triggers al alterar la tabla
+        return
+    with connection.cursor() as cursor:
+        if 'issues_issue_fts' not in connection.introspection.table_names(cursor):
+            # SQLite sin FTS5: no hay índice
+            return
+    for statement in SQLITE_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0004_trigram_index'),
+    ]
+
+    operations = [
+        # Al deshacer, RemoveField también reconstruye la tabla
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='issue',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
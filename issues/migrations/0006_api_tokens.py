@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:53
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_profile_tokens(apps, schema_editor):
+    # Mismo formato que issues.tokens: prefijo de 12 caracteres y SHA-256 del token
+    using = schema_editor.connection.alias
+    Profile = apps.get_model('issues', 'Profile')
+    ApiToken = apps.get_model('issues', 'ApiToken')
+    tokens = [
+        ApiToken(
+            user_id=user_id,
+            name='default',
+            prefix=token[:12],
+            secret_hash=hashlib.sha256(token.encode('utf-8')).hexdigest(),
+        )
+        for user_id, token in Profile.objects.using(using).exclude(api_token='').values_list('user_id', 'api_token')
+    ]
+    ApiToken.objects.using(using).bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0005_issue_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApiToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(default='default', max_length=100)),
+                ('prefix', models.CharField(db_index=True, max_length=12)),
+                ('secret_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='api_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        # Irreversible: de los hashes no se puede recuperar el token en claro
+        migrations.RunPython(move_profile_tokens),
+        migrations.RemoveField(
+            model_name='profile',
+            name='api_token',
+        ),
+    ]
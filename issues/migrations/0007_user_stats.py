@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_user_stats(apps, schema_editor):
+    # Mismo cálculo que issues.user_stats.compute, con los modelos históricos
+    alias = schema_editor.connection.alias
+    User = apps.get_model('auth', 'User')
+    Issue = apps.get_model('issues', 'Issue')
+    Comment = apps.get_model('issues', 'Comment')
+    UserStats = apps.get_model('issues', 'UserStats')
+    sources = {
+        'watched_issues_count': (Issue.watchers.through, 'user_id'),
+        'assigned_issues_count': (Issue, 'assigned_to_id'),
+        'created_issues_count': (Issue, 'created_by_id'),
+        'comments_count': (Comment, 'user_id'),
+    }
+    counts = {}
+    for field, (model, column) in sources.items():
+        rows = (model.objects.using(alias).exclude(**{column: None}).order_by()
+                .values(column).annotate(total=Count('pk')).values_list(column, 'total'))
+        for user_id, total in rows:
+            counts.setdefault(user_id, {})[field] = total
+    UserStats.objects.using(alias).bulk_create(
+        [UserStats(user_id=pk, **counts.get(pk, {}))
+         for pk in User.objects.using(alias).values_list('pk', flat=True).iterator()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('issues', '0006_api_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('watched_issues_count', models.PositiveIntegerField(default=0)),
+                ('assigned_issues_count', models.PositiveIntegerField(default=0)),
+                ('created_issues_count', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
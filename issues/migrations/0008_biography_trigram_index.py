@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:58
+
+import re
+
+from django.db import migrations, models
+
+
+# Copia de issues.trigrams.trigrams en el momento de la migración: las
+# migraciones no deben depender del código de la aplicación
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def trigrams(text):
+    result = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def _has_pg_trgm(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def build_biography_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql' and _has_pg_trgm(schema_editor):
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS issues_profile_biography_trgm_idx "
+            "ON issues_profile USING gin (biography gin_trgm_ops)"
+        )
+        return
+
+    using = schema_editor.connection.alias
+    Trigram = apps.get_model('issues', 'Trigram')
+    Profile = apps.get_model('issues', 'Profile')
+    rows = []
+    for pk, text in Profile.objects.using(using).exclude(biography=None).values_list('pk', 'biography').iterator():
+        rows.extend(Trigram(kind='biography', object_id=pk, trigram=trigram) for trigram in trigrams(text))
+        if len(rows) >= 5000:
+            Trigram.objects.using(using).bulk_create(rows)
+            rows = []
+    Trigram.objects.using(using).bulk_create(rows)
+
+
+def drop_biography_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS issues_profile_biography_trgm_idx")
+    else:
+        Trigram = apps.get_model('issues', 'Trigram')
+        Trigram.objects.using(schema_editor.connection.alias).filter(kind='biography').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('issues', '0007_user_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trigram',
+            name='kind',
+            field=models.CharField(choices=[('subject', 'Issue subject'), ('username', 'Username'), ('biography', 'Profile biography')], max_length=16),
+        ),
+        migrations.RunPython(build_biography_index, drop_biography_index),
+    ]
@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.module_loading import import_string
 from django.utils.text import slugify
 
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from storages.backends.s3boto3 import S3Boto3Storage
 
+from .imaging import pick_variant
+
 class Status(models.Model):
     nombre = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=50, unique=True, blank=True)
@@ -48,6 +52,10 @@ class Issue(models.Model):
     subject = models.CharField(max_length=255)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Se actualiza también al cambiar watchers, comentarios, adjuntos, los
+    # catálogos asociados o el nombre de sus usuarios (issues.signals): sirve de
+    # validador para ETag/Last-Modified
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     status = models.ForeignKey(
         Status,on_delete=models.SET_NULL,null=True,blank=True,related_name="issues"
     )
@@ -72,13 +80,182 @@ class Issue(models.Model):
         return self.subject
 
 
+def attachment_storage():
+    """
+    Almacenamiento de los adjuntos: S3 salvo que ATTACHMENT_STORAGE indique otra
+    clase (p. ej. FileSystemStorage para desarrollo o pruebas).
+    """
+    backend = getattr(settings, 'ATTACHMENT_STORAGE', None)
+    return import_string(backend)() if backend else S3Boto3Storage()
+
+
+class Blob(models.Model):
+    """
+    Objeto del almacenamiento de adjuntos identificado por su contenido
+    (issues.blobs): los adjuntos con el mismo SHA-256 comparten ``name`` en
+    lugar de guardar otra copia. ``refcount`` cuenta los adjuntos que lo usan;
+    al llegar a cero se borra la fila, y el objeto con el último adjunto
+    (issues.storage_gc).
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} adjuntos)"
+
+
 class Attachment(models.Model):
+    """
+    Archivo adjunto de un issue. Se sube en diferido (issues.attachments): se
+    crea en estado ``pending`` con el archivo guardado en disco local
+    (``staged_path``) y pasa a ``stored`` cuando un worker lo ha subido al
+    almacenamiento; hasta entonces ``file`` está vacío. Los que sube el cliente
+    directamente al bucket (issues.direct_uploads) esperan en ``awaiting``
+    hasta que se confirma la subida. Si ``blob`` está puesto, ``file`` es el
+    objeto compartido con los demás adjuntos del mismo contenido.
+    """
+    PENDING = 'pending'
+    AWAITING = 'awaiting'
+    STORED = 'stored'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (PENDING, 'Pending'),
+        (AWAITING, 'Awaiting upload'),
+        (STORED, 'Stored'),
+        (FAILED, 'Failed'),
+    ]
+
     issue = models.ForeignKey(Issue, related_name='attachment', on_delete=models.CASCADE)
-    file = models.FileField(upload_to='attachments/', storage=S3Boto3Storage())
+    file = models.FileField(upload_to='attachments/', storage=attachment_storage, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Nombre original y tamaño, disponibles antes de que termine la subida
+    name = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField(default=0)
+    state = models.CharField(max_length=8, choices=STATE_CHOICES, default=STORED)
+    staged_path = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    # Miniaturas de las imágenes (issues.variants)
+    variants = models.JSONField(default=dict, blank=True)
+    # SHA-256 del contenido y objeto compartido que usa (issues.blobs)
+    sha256 = models.CharField(max_length=64, blank=True)
+    blob = models.ForeignKey(Blob, null=True, blank=True, related_name='attachments', on_delete=models.PROTECT)
+
+    def __str__(self):
+        return f"{self.file.name or self.name} ({self.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')})"
+
+
+
+class DirectUpload(models.Model):
+    """
+    Subida de un archivo directamente al bucket con una URL prefirmada
+    (issues.direct_uploads). El cliente sube a ``key`` y después la confirma: se
+    comprueban el tamaño y el MD5 declarados y el objeto pasa al adjunto
+    (``attachment``, creado en estado ``awaiting``) o al avatar de ``user``.
+    """
+    ATTACHMENT = 'attachment'
+    AVATAR = 'avatar'
+    TARGET_CHOICES = [
+        (ATTACHMENT, 'Attachment'),
+        (AVATAR, 'Avatar'),
+    ]
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='direct_uploads')
+    target = models.CharField(max_length=10, choices=TARGET_CHOICES)
+    attachment = models.OneToOneField(
+        Attachment, on_delete=models.SET_NULL, null=True, blank=True, related_name='direct_upload'
+    )
+    # Nombre en el almacenamiento, como el de un FileField (sin AWS_LOCATION)
+    key = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    md5 = models.CharField(max_length=32)
+    content_type = models.CharField(max_length=100)
+    state = models.CharField(max_length=8, choices=STATE_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['state', 'expires_at'], name='issues_dirupl_expiry_idx')]
+
+    def __str__(self):
+        return f"Subida de {self.name} ({self.target}, {self.state})"
+
+
+
+class UploadSession(models.Model):
+    """
+    Subida de un adjunto grande por partes numeradas (issues.chunked_uploads).
+    Cada parte se envía a la API y se pasa tal cual a una parte del multipart
+    upload ``multipart_id`` del bucket; al completarla el objeto ``key`` se
+    asigna al adjunto, que hasta entonces está en estado ``awaiting``.
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    attachment = models.OneToOneField(
+        Attachment, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session'
+    )
+    key = models.CharField(max_length=255)
+    multipart_id = models.CharField(max_length=255)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100)
+    # Todas las partes miden chunk_size salvo la última, que lleva el resto
+    chunk_size = models.PositiveIntegerField()
+    state = models.CharField(max_length=8, choices=STATE_CHOICES, default=PENDING)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Se renueva con cada parte recibida
+    expires_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['state', 'expires_at'], name='issues_upsess_expiry_idx')]
+
+    @property
+    def total_chunks(self):
+        return -(-self.size // self.chunk_size)
+
+    def __str__(self):
+        return f"Subida por partes de {self.name} ({self.state})"
+
+
+class UploadPart(models.Model):
+    """Parte recibida de una UploadSession; volver a enviarla la sustituye."""
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='parts')
+    number = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    md5 = models.CharField(max_length=32)
+    etag = models.CharField(max_length=64)
+    uploaded_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'number'], name='issues_uploadpart_unique_number'),
+        ]
 
     def __str__(self):
-        return f"{self.file.name} ({self.uploaded_at.strftime('%Y-%m-%d %H:%M:%S')})"
+        return f"Parte {self.number} de {self.session_id}"
 
 
 
@@ -86,22 +263,70 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     biography = models.TextField(blank=True, null=True)
     avatar = models.ImageField(upload_to='avatars/', storage=S3Boto3Storage(), blank=True, null=True)
-    api_token = models.CharField(
-        max_length=40,
-        unique=True,
-        blank=True,
-        help_text="Token de acceso a la API, se genera al primer login."
-    )
+    # Miniaturas del avatar (issues.variants)
+    avatar_variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f'Perfil de {self.user.username}'
 
+    def avatar_thumbnail_url(self, size):
+        """URL de la miniatura del avatar de al menos ``size`` px, o la del original si aún no la hay."""
+        if not self.avatar:
+            return ''
+        name = pick_variant(self.avatar_variants, self.avatar.name, size)
+        return self.avatar.storage.url(name) if name else self.avatar.url
+
+    @property
+    def avatar_small_url(self):
+        return self.avatar_thumbnail_url(64)
+
+    @property
+    def avatar_medium_url(self):
+        return self.avatar_thumbnail_url(256)
+
+
+
+class ApiToken(models.Model):
+    """
+    Token de acceso a la API. Un usuario puede tener varios (uno por cliente).
+
+    No se guarda el token en claro: ``prefix`` son sus primeros caracteres, para
+    encontrarlo con una búsqueda por índice, y ``secret_hash`` el SHA-256 del
+    token completo, que se compara en tiempo constante (issues.tokens).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, default='default')
+    prefix = models.CharField(max_length=12, db_index=True)
+    secret_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Se actualiza en diferido y por lotes (issues.tokens.last_used)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.prefix}…) de {self.user.username}'
+
+
+class UserStats(models.Model):
+    """
+    Contadores de actividad de cada usuario, mantenidos al vuelo por las señales
+    de issues.signals para no contar en cada listado de usuarios. El comando
+    reconcile_user_stats los recalcula desde las tablas de origen.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    watched_issues_count = models.PositiveIntegerField(default=0)
+    assigned_issues_count = models.PositiveIntegerField(default=0)
+    created_issues_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Estadísticas de {self.user.username}'
 
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+        UserStats.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
@@ -117,4 +342,97 @@ class Comment(models.Model):
     published_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Comentario de {self.user.username} en '{self.issue.subject}'"
\ No newline at end of file
+        return f"Comentario de {self.user.username} en '{self.issue.subject}'"
+
+
+class Trigram(models.Model):
+    """
+    Índice invertido de trigramas para la búsqueda tolerante a errores
+    (issues.trigrams). Cada fila indica que el texto indexado del objeto
+    ``object_id`` contiene ``trigram``.
+    """
+    SUBJECT = 'subject'
+    USERNAME = 'username'
+    BIOGRAPHY = 'biography'
+    KIND_CHOICES = [
+        (SUBJECT, 'Issue subject'),
+        (USERNAME, 'Username'),
+        (BIOGRAPHY, 'Profile biography'),
+    ]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            # object_id primero: con (kind, object_id) SQLite prefiere recorrer
+            # todo el tipo para el GROUP BY en lugar de buscar por trigrama
+            models.Index(fields=['kind', 'trigram', 'object_id'], name='issues_trigram_lookup_idx'),
+            models.Index(fields=['object_id', 'kind'], name='issues_trigram_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id}:{self.trigram!r}"
+
+
+class CatalogDeletion(models.Model):
+    """
+    Borrado de una entrada de catálogo (issues.catalog_deletion). Los issues que
+    la usan se pasan por bloques al valor de ``replacement_id`` y la entrada solo
+    se borra al terminar; ``processed`` y ``total`` dan el progreso.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE_STATES = (PENDING, RUNNING)
+
+    # Nombre del catálogo como en las URLs: status, priorities, types, severities
+    catalog = models.CharField(max_length=16)
+    object_id = models.PositiveIntegerField()
+    nombre = models.CharField(max_length=50)
+    replacement_id = models.PositiveIntegerField()
+    state = models.CharField(max_length=8, choices=STATE_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['catalog', 'object_id'], name='issues_catdel_object_idx')]
+
+    def __str__(self):
+        return f"Borrado de {self.catalog} '{self.nombre}' ({self.state})"
+
+
+class PendingDeletion(models.Model):
+    """
+    Objeto del almacenamiento que ya no usa ninguna fila y hay que borrar
+    (issues.storage_gc). Se anota en la misma transacción que borra la fila,
+    así que si se deshace no se borra nada; tras el commit se borran por lotes.
+    """
+    ATTACHMENT = 'attachment'
+    AVATAR = 'avatar'
+    KIND_CHOICES = [
+        (ATTACHMENT, 'Attachment'),
+        (AVATAR, 'Avatar'),
+    ]
+
+    # Campo cuyo almacenamiento guarda el objeto: Attachment.file o Profile.avatar
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    name = models.CharField(max_length=1024)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"Borrado pendiente de {self.name}"
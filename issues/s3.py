@@ -0,0 +1,97 @@
+import logging
+import posixpath
+import uuid
+
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+
+logger = logging.getLogger(__name__)
+
+# Límites de los multipart uploads: partes de al menos 5 MB (salvo la última)
+# y como mucho 10000 partes
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+# Claves por llamada a delete_objects
+DELETE_BATCH_SIZE = 1000
+
+
+def is_s3(storage):
+    """True si ``storage`` escribe en un bucket S3 (y admite URLs prefirmadas y multipart uploads)."""
+    return isinstance(storage, S3Boto3Storage)
+
+
+def new_key(field, name):
+    """Nombre único para ``name`` en el almacenamiento de ``field``, dentro de su max_length."""
+    # Un directorio por subida: el nombre no choca sin consultar el bucket
+    key = field.generate_filename(None, posixpath.join(uuid.uuid4().hex, name))
+    if len(key) > field.max_length:
+        stem, ext = posixpath.splitext(key)
+        ext = ext[:16]
+        key = stem[:field.max_length - len(ext)] + ext
+    return key
+
+
+def object_key(storage, key):
+    """Clave real en el bucket de un nombre de ``storage`` (con AWS_LOCATION delante)."""
+    return storage._normalize_name(clean_name(key))
+
+
+def storage_name(storage, key):
+    """Nombre en ``storage`` de una clave del bucket (la inversa de object_key)."""
+    location = storage.location.strip('/')
+    return key[len(location) + 1:] if location and key.startswith(location + '/') else key
+
+
+def write_parameters(storage, key, content_type=None):
+    """
+    Parámetros de put_object/create_multipart_upload para ``key``: los mismos
+    (ACL, AWS_S3_OBJECT_PARAMETERS...) que pone el storage al guardar desde el
+    servidor, con ``content_type`` si se indica.
+    """
+    params = storage._get_write_parameters(key)
+    if content_type and 'ContentType' not in storage.object_parameters:
+        params['ContentType'] = content_type
+    return params
+
+
+def delete_object(storage, key):
+    """Borra ``key`` del almacenamiento; los fallos solo se registran."""
+    try:
+        storage.delete(key)
+    except Exception:
+        logger.exception("No se pudo borrar el objeto %s", key)
+
+
+def delete_objects(storage, names):
+    """
+    Borra ``names`` del almacenamiento. En S3 se borran con delete_objects,
+    hasta DELETE_BATCH_SIZE claves por llamada; en otros almacenamientos, uno
+    a uno. Devuelve {nombre: error} de los que no se han podido borrar.
+    """
+    names = list(dict.fromkeys(names))
+    failed = {}
+    if not is_s3(storage):
+        for name in names:
+            try:
+                storage.delete(name)
+            except Exception as exc:
+                failed[name] = str(exc)
+        return failed
+
+    client = storage.connection.meta.client
+    for start in range(0, len(names), DELETE_BATCH_SIZE):
+        batch = {object_key(storage, name): name for name in names[start:start + DELETE_BATCH_SIZE]}
+        try:
+            response = client.delete_objects(
+                Bucket=storage.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+            )
+        except Exception as exc:
+            logger.exception("No se pudieron borrar %d objetos", len(batch))
+            failed.update((name, str(exc)) for name in batch.values())
+            continue
+        for error in response.get('Errors', []):
+            name = batch.get(error['Key'], error['Key'])
+            failed[name] = f"{error.get('Code')}: {error.get('Message')}"
+    return failed
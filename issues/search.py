@@ -0,0 +1,225 @@
+import re
+
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+
+# Tablas de índice creadas por la migración 0003_issue_search_index
+SQLITE_FTS_TABLE = 'issues_issue_fts'
+POSTGRES_SEARCH_TABLE = 'issues_issue_search'
+
+# Triggers que mantienen el índice de SQLite. Si Django reconstruye
+# issues_issue o issues_comment (AddField, AlterField...) se pierden sin
+# aviso: rebuild_search_index los vuelve a crear.
+SQLITE_TRIGGERS = {
+    'issues_issue_fts_ai': """
+        CREATE TRIGGER issues_issue_fts_ai AFTER INSERT ON issues_issue BEGIN
+            INSERT INTO issues_issue_fts (rowid, subject, description, comments)
+            VALUES (new.id, new.subject, new.description, '');
+        END
+    """,
+    'issues_issue_fts_au': """
+        CREATE TRIGGER issues_issue_fts_au AFTER UPDATE OF subject, description ON issues_issue BEGIN
+            UPDATE issues_issue_fts SET subject = new.subject, description = new.description
+            WHERE rowid = new.id;
+        END
+    """,
+    'issues_issue_fts_ad': """
+        CREATE TRIGGER issues_issue_fts_ad AFTER DELETE ON issues_issue BEGIN
+            DELETE FROM issues_issue_fts WHERE rowid = old.id;
+        END
+    """,
+    'issues_comment_fts_ai': """
+        CREATE TRIGGER issues_comment_fts_ai AFTER INSERT ON issues_comment BEGIN
+            UPDATE issues_issue_fts
+            SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = new.issue_id), '')
+            WHERE rowid = new.issue_id;
+        END
+    """,
+    'issues_comment_fts_au': """
+        CREATE TRIGGER issues_comment_fts_au AFTER UPDATE OF text, issue_id ON issues_comment BEGIN
+            UPDATE issues_issue_fts
+            SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = old.issue_id), '')
+            WHERE rowid = old.issue_id;
+            UPDATE issues_issue_fts
+            SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = new.issue_id), '')
+            WHERE rowid = new.issue_id;
+        END
+    """,
+    'issues_comment_fts_ad': """
+        CREATE TRIGGER issues_comment_fts_ad AFTER DELETE ON issues_comment BEGIN
+            UPDATE issues_issue_fts
+            SET comments = coalesce((SELECT group_concat(text, ' ') FROM issues_comment WHERE issue_id = old.issue_id), '')
+            WHERE rowid = old.issue_id;
+        END
+    """,
+}
+
+# Pesos de subject, description y comments en el ranking de SQLite (bm25)
+SQLITE_COLUMN_WEIGHTS = (10.0, 4.0, 1.0)
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+_index_available = {}
+
+
+def parse_search_query(text):
+    """
+    Convierte el texto del buscador en una lista de términos (words, prefix).
+
+    - "frase entre comillas" -> palabras consecutivas
+    - palabra* -> búsqueda por prefijo de la última palabra
+    - palabra -> término simple
+
+    Todos los términos deben aparecer (AND). Los caracteres que no forman parte
+    de palabras se descartan, así que el resultado es seguro para construir las
+    consultas de FTS5 y de tsquery.
+    """
+    terms = []
+    for phrase, bare in _TOKEN_RE.findall(text or ''):
+        raw = phrase if phrase else bare
+        words = [word.lower() for word in _WORD_RE.findall(raw)]
+        if not words:
+            continue
+        prefix = not phrase and raw.endswith('*')
+        terms.append((words, prefix))
+    return terms
+
+
+def _sqlite_match_expression(terms):
+    parts = []
+    for words, prefix in terms:
+        part = '"%s"' % ' '.join(words)
+        parts.append(part + '*' if prefix else part)
+    return ' '.join(parts)
+
+
+def _postgres_tsquery(terms):
+    parts = []
+    for words, prefix in terms:
+        lexemes = ["'%s'" % word for word in words]
+        if prefix:
+            lexemes[-1] += ':*'
+        parts.append(lexemes[0] if len(lexemes) == 1 else '(%s)' % ' <-> '.join(lexemes))
+    return ' & '.join(parts)
+
+
+def search_index_available(using='default'):
+    """
+    Indica si la base de datos tiene el índice de texto completo creado y, en
+    SQLite, los triggers que lo mantienen al día. Sin ellos el índice se queda
+    atrás y se recurre a icontains hasta lanzar rebuild_search_index.
+    """
+    if using not in _index_available:
+        connection = connections[using]
+        table = {
+            'sqlite': SQLITE_FTS_TABLE,
+            'postgresql': POSTGRES_SEARCH_TABLE,
+        }.get(connection.vendor)
+        with connection.cursor() as cursor:
+            available = table is not None and table in connection.introspection.table_names(cursor)
+            if available and connection.vendor == 'sqlite':
+                available = not _missing_sqlite_triggers(cursor)
+        _index_available[using] = available
+    return _index_available[using]
+
+
+def rebuild_search_index(using='default'):
+    """
+    Vuelve a llenar el índice de texto completo con todos los issues y, en
+    SQLite, crea los triggers que falten. Devuelve los triggers creados, o
+    None si la base de datos no tiene índice (otro motor o SQLite sin FTS5).
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        if connection.vendor == 'sqlite' and SQLITE_FTS_TABLE in tables:
+            missing = _missing_sqlite_triggers(cursor)
+            for name in missing:
+                cursor.execute(SQLITE_TRIGGERS[name])
+            cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE}")
+            cursor.execute(f"""
+                INSERT INTO {SQLITE_FTS_TABLE} (rowid, subject, description, comments)
+                SELECT i.id, i.subject, i.description,
+                       coalesce((SELECT group_concat(c.text, ' ') FROM issues_comment c WHERE c.issue_id = i.id), '')
+                FROM issues_issue i
+            """)
+        elif connection.vendor == 'postgresql' and POSTGRES_SEARCH_TABLE in tables:
+            missing = []
+            cursor.execute("SELECT issues_issue_search_refresh(id) FROM issues_issue")
+        else:
+            return None
+    _index_available.pop(using, None)
+    return missing
+
+
+def _missing_sqlite_triggers(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s)" % ', '.join(
+        ['%s'] * len(SQLITE_TRIGGERS)
+    ), list(SQLITE_TRIGGERS))
+    present = {row[0] for row in cursor.fetchall()}
+    return [name for name in SQLITE_TRIGGERS if name not in present]
+
+
+def search_issues(queryset, text):
+    """
+    Filtra un queryset de Issue por texto completo sobre subject, description y
+    los comentarios, y lo anota con ``rank`` (mayor es más relevante).
+
+    Usa FTS5 en SQLite y tsvector + GIN en PostgreSQL. Si el índice no existe
+    (otro motor o SQLite sin FTS5) se recurre a icontains con rank constante.
+    """
+    terms = parse_search_query(text)
+    if not terms:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    using = queryset.db
+    vendor = connections[using].vendor
+    issue_table = queryset.model._meta.db_table
+
+    if search_index_available(using) and vendor == 'sqlite':
+        match = _sqlite_match_expression(terms)
+        weights = ', '.join(str(weight) for weight in SQLITE_COLUMN_WEIGHTS)
+        return queryset.filter(
+            id__in=RawSQL(
+                f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s',
+                (match,),
+            )
+        ).annotate(
+            rank=RawSQL(
+                f'SELECT -bm25({SQLITE_FTS_TABLE}, {weights}) FROM {SQLITE_FTS_TABLE} '
+                f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = "{issue_table}"."id"',
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+
+    if search_index_available(using) and vendor == 'postgresql':
+        tsquery = _postgres_tsquery(terms)
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT issue_id FROM {POSTGRES_SEARCH_TABLE} "
+                f"WHERE document @@ to_tsquery('simple', %s)",
+                (tsquery,),
+            )
+        ).annotate(
+            rank=RawSQL(
+                f"SELECT ts_rank_cd(document, to_tsquery('simple', %s)) FROM {POSTGRES_SEARCH_TABLE} "
+                f'WHERE issue_id = "{issue_table}"."id"',
+                (tsquery,),
+                output_field=FloatField(),
+            )
+        )
+
+    condition = Q()
+    for words, _prefix in terms:
+        phrase = ' '.join(words)
+        condition &= (
+            Q(subject__icontains=phrase)
+            | Q(description__icontains=phrase)
+            | Q(comments__text__icontains=phrase)
+        )
+    matching = queryset.model.objects.filter(condition).values('id')
+    return queryset.filter(id__in=matching).annotate(rank=Value(0.0, output_field=FloatField()))
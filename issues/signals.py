@@ -1,12 +1,20 @@
 import os
-import secrets
 
 import requests
+from django.contrib.auth.models import User
 from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
 from django.dispatch import receiver
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
+from django.utils import timezone
 from allauth.socialaccount.models import SocialAccount
 
+from . import attachments, blobs, catalogs, storage_gc, tokens, trigrams, user_stats, variants
+from .models import Attachment, Comment, Issue, Profile, Trigram, UserStats
+
 @receiver(user_logged_in)
 def update_avatar_on_login(sender, request, user, **kwargs):
     """
@@ -47,12 +55,332 @@ def update_avatar_on_login(sender, request, user, **kwargs):
 
 @receiver(user_logged_in)
 def ensure_api_token(sender, user, request, **kwargs):
-    profile = user.profile
-    if not profile.api_token:
+    if not user.api_tokens.exists():
         print("Token generado")
-        # Genera un token de 40 hexadecimales
-        profile.api_token = secrets.token_hex(20)
-        profile.save()
+        # Solo se guarda su hash: el token en claro se muestra una vez en el perfil
+        _api_token, token = tokens.issue_token(user, name='web')
+        if request is not None and hasattr(request, 'session'):
+            request.session['new_api_token'] = token
+
+
+# --- Índice de trigramas (issues.trigrams) ---------------------------------------
+
+def _remember_indexed_text(instance, field):
+    # Solo si el campo está cargado: con only()/defer() leerlo lanzaría una consulta
+    instance._trigram_text = instance.__dict__.get(field)
+
+
+def _reindex_if_changed(kind, instance, field, created, update_fields):
+    # Devuelve si el texto ha cambiado (o es nuevo)
+    if update_fields is not None and field not in update_fields:
+        return False
+    text = getattr(instance, field)
+    changed = created or text != getattr(instance, '_trigram_text', None)
+    if changed:
+        trigrams.index_objects(kind, [instance], using=instance._state.db)
+    instance._trigram_text = text
+    return changed
+
+
+@receiver(post_init, sender=Issue)
+def remember_issue_subject(sender, instance, **kwargs):
+    _remember_indexed_text(instance, 'subject')
+
+
+@receiver(post_save, sender=Issue)
+def index_issue_subject(sender, instance, created, update_fields=None, **kwargs):
+    _reindex_if_changed(Trigram.SUBJECT, instance, 'subject', created, update_fields)
+
+
+@receiver(post_delete, sender=Issue)
+def unindex_issue_subject(sender, instance, **kwargs):
+    trigrams.unindex_objects(Trigram.SUBJECT, [instance.pk], using=instance._state.db)
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    _remember_indexed_text(instance, 'username')
+
+
+@receiver(post_save, sender=User)
+def index_username(sender, instance, created, update_fields=None, **kwargs):
+    if _reindex_if_changed(Trigram.USERNAME, instance, 'username', created, update_fields) and not created:
+        # Los issues muestran el nombre de quien los creó, tiene asignados, vigila o comenta
+        touch_issues_in_batches(
+            Q(created_by=instance), Q(assigned_to=instance), Q(watchers=instance), Q(comments__user=instance),
+            using=instance._state.db,
+        )
+
+
+@receiver(post_delete, sender=User)
+def unindex_username(sender, instance, **kwargs):
+    trigrams.unindex_objects(Trigram.USERNAME, [instance.pk], using=instance._state.db)
+
+
+@receiver(post_init, sender=Profile)
+def remember_biography(sender, instance, **kwargs):
+    _remember_indexed_text(instance, 'biography')
+
+
+@receiver(post_save, sender=Profile)
+def index_biography(sender, instance, created, update_fields=None, **kwargs):
+    # El perfil se guarda en cada guardado del usuario: solo se reindexa si cambia
+    _reindex_if_changed(Trigram.BIOGRAPHY, instance, 'biography', created, update_fields)
+
+
+@receiver(post_delete, sender=Profile)
+def unindex_biography(sender, instance, **kwargs):
+    trigrams.unindex_objects(Trigram.BIOGRAPHY, [instance.pk], using=instance._state.db)
+
+
+# --- Issue.updated_at ------------------------------------------------------------
+# La representación de un issue incluye watchers, comentarios, adjuntos y los
+# nombres de sus catálogos y de sus usuarios: cualquier cambio en ellos debe
+# invalidar su ETag.
+
+TOUCH_CHUNK_SIZE = 1000
+
+
+def touch_issues(condition, using='default'):
+    Issue.objects.using(using).filter(condition).update(updated_at=timezone.now())
+
+
+def touch_issues_in_batches(*conditions, using='default'):
+    """
+    touch_issues() para conjuntos que pueden ser muy grandes (los issues de un
+    catálogo o de un usuario): recorre por clave los que cumplen cada
+    condición y los actualiza por bloques de TOUCH_CHUNK_SIZE, como
+    catalog_deletion.run_deletion, en lugar de con un solo UPDATE.
+    """
+    now = timezone.now()
+    issues = Issue.objects.using(using)
+    for condition in conditions:
+        matching = issues.filter(condition).order_by('pk').values_list('pk', flat=True).distinct()
+        last = 0
+        while True:
+            chunk = list(matching.filter(pk__gt=last)[:TOUCH_CHUNK_SIZE])
+            if chunk:
+                issues.filter(pk__in=chunk).update(updated_at=now)
+            if len(chunk) < TOUCH_CHUNK_SIZE:
+                break
+            last = chunk[-1]
+
+
+@receiver(m2m_changed, sender=Issue.watchers.through)
+def touch_issue_on_watchers_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # user.watched_issues.clear(): después ya no se sabe qué issues tenía
+        instance._cleared_issue_ids = list(instance.watched_issues.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        touch_issues(Q(pk=instance.pk), using=instance._state.db)
+    elif action == 'post_clear':
+        touch_issues(Q(pk__in=instance.__dict__.pop('_cleared_issue_ids', [])), using=instance._state.db)
+    else:
+        touch_issues(Q(pk__in=pk_set or []), using=instance._state.db)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def touch_issue_on_child_change(sender, instance, **kwargs):
+    touch_issues(Q(pk=instance.issue_id), using=instance._state.db)
+
+
+@receiver(post_delete, sender=Attachment)
+def discard_staged_attachment(sender, instance, **kwargs):
+    # Adjunto borrado antes de terminar de subirse: su archivo en staging sobra
+    if instance.staged_path:
+        transaction.on_commit(lambda: attachments.discard_staged(instance.staged_path), using=instance._state.db)
+
+
+def remember_catalog_name(sender, instance, **kwargs):
+    # Los issues solo muestran el nombre de la entrada, no su color ni su slug
+    instance._catalog_nombre = instance.__dict__.get('nombre')
+
+
+def touch_issues_of_catalog(sender, instance, created=False, update_fields=None, **kwargs):
+    if created or (update_fields is not None and 'nombre' not in update_fields):
+        return
+    if instance.nombre != getattr(instance, '_catalog_nombre', None):
+        touch_issues_in_batches(Q(**{catalogs.ISSUE_FIELDS[sender]: instance}), using=instance._state.db)
+    instance._catalog_nombre = instance.nombre
+
+
+def touch_issues_of_deleted_catalog(sender, instance, **kwargs):
+    touch_issues_in_batches(Q(**{catalogs.ISSUE_FIELDS[sender]: instance}), using=instance._state.db)
+
+
+def invalidate_catalog_registry(sender, using=None, **kwargs):
+    # Tras el commit: otro worker que recargase antes leería los datos antiguos
+    transaction.on_commit(catalogs.invalidate, using=using)
+
+
+for _catalog in catalogs.ISSUE_FIELDS:
+    post_init.connect(remember_catalog_name, sender=_catalog, dispatch_uid=f'catalog_name_{_catalog.__name__}')
+    post_save.connect(touch_issues_of_catalog, sender=_catalog, dispatch_uid=f'touch_issues_{_catalog.__name__}_save')
+    # Antes de borrar: después las FK ya están a NULL (SET_NULL)
+    pre_delete.connect(
+        touch_issues_of_deleted_catalog, sender=_catalog, dispatch_uid=f'touch_issues_{_catalog.__name__}_delete'
+    )
+    post_save.connect(invalidate_catalog_registry, sender=_catalog, dispatch_uid=f'catalogs_{_catalog.__name__}_save')
+    post_delete.connect(invalidate_catalog_registry, sender=_catalog, dispatch_uid=f'catalogs_{_catalog.__name__}_delete')
+
+
+@receiver(pre_delete, sender=User)
+def touch_issues_of_user(sender, instance, **kwargs):
+    touch_issues_in_batches(
+        Q(assigned_to=instance), Q(watchers=instance), Q(comments__user=instance), using=instance._state.db,
+    )
+
+
+# --- Archivos de adjuntos y avatares (issues.variants, issues.storage_gc) --------
+# Al cambiar el archivo se generan las miniaturas del nuevo y se anota el
+# anterior para borrarlo; al borrar la fila (también en cascada), el suyo. Las
+# operaciones sin señales (bulk_create, QuerySet.update) deben llamar ellas
+# mismas a variants.schedule_variants() y storage_gc.queue_deletion().
+
+def _file_name(instance, field):
+    # Solo si el campo está cargado, como en _remember_indexed_text
+    value = instance.__dict__.get(field)
+    return getattr(value, 'name', value)
+
+
+def _stored_name(instance, field):
+    # Un archivo pasado al constructor aún no está en el almacenamiento: su
+    # nombre no es el que tendrá al guardarlo
+    value = instance.__dict__.get(field)
+    if isinstance(value, File) and not getattr(value, '_committed', False):
+        return None
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=Attachment)
+def remember_attachment_file(sender, instance, **kwargs):
+    instance._stored_file = _stored_name(instance, 'file')
+
+
+@receiver(post_init, sender=Profile)
+def remember_avatar(sender, instance, **kwargs):
+    instance._stored_file = _stored_name(instance, 'avatar')
+
+
+def _file_changed(kind, instance, field, update_fields):
+    if update_fields is not None and field not in update_fields:
+        return
+    name = _file_name(instance, field)
+    previous = getattr(instance, '_stored_file', None)
+    if name != previous:
+        using = instance._state.db
+        if name:
+            variants.schedule_variants(kind, [instance.pk], using=using)
+        if previous:
+            storage_gc.queue_deletion(kind, storage_gc.stored_names(kind, instance, previous), using=using)
+    instance._stored_file = name
+
+
+@receiver(post_save, sender=Attachment)
+def attachment_file_changed(sender, instance, update_fields=None, **kwargs):
+    _file_changed('attachment', instance, 'file', update_fields)
+
+
+@receiver(post_save, sender=Profile)
+def avatar_changed(sender, instance, update_fields=None, **kwargs):
+    _file_changed('avatar', instance, 'avatar', update_fields)
+
+
+@receiver(post_delete, sender=Attachment)
+def delete_attachment_file(sender, instance, **kwargs):
+    # Un objeto compartido (issues.blobs) solo se borra con el último adjunto:
+    # storage_gc no borra lo que aún usa otra fila
+    if instance.__dict__.get('blob_id'):
+        blobs.release(instance.blob_id, using=instance._state.db)
+    storage_gc.queue_deletion('attachment', storage_gc.stored_names('attachment', instance), using=instance._state.db)
+
+
+@receiver(post_delete, sender=Profile)
+def delete_avatar(sender, instance, **kwargs):
+    storage_gc.queue_deletion('avatar', storage_gc.stored_names('avatar', instance), using=instance._state.db)
+
+
+# --- Contadores de UserStats (issues.user_stats) -----------------------------------
+# Las operaciones masivas que no emiten señales (bulk_create, QuerySet.update)
+# deben ajustar los contadores ellas mismas con user_stats.adjust().
+
+# Campos de Issue que apuntan a un usuario -> contador que alimentan
+ISSUE_USER_COUNTERS = {
+    'assigned_to': 'assigned_issues_count',
+    'created_by': 'created_issues_count',
+}
+_UNKNOWN = object()
+
+
+@receiver(post_init, sender=Issue)
+def remember_issue_users(sender, instance, **kwargs):
+    # Campo diferido (only()/defer()): no se conoce el valor anterior y no se ajusta
+    instance._stats_users = {
+        name: instance.__dict__.get(f'{name}_id', _UNKNOWN) for name in ISSUE_USER_COUNTERS
+    }
+
+
+@receiver(post_save, sender=Issue)
+def count_issue_users(sender, instance, created, update_fields=None, **kwargs):
+    using = instance._state.db
+    previous = getattr(instance, '_stats_users', {})
+    for name, field in ISSUE_USER_COUNTERS.items():
+        if update_fields is not None and name not in update_fields and f'{name}_id' not in update_fields:
+            continue
+        old = None if created else previous.get(name, _UNKNOWN)
+        new = getattr(instance, f'{name}_id')
+        if old is not _UNKNOWN and old != new:
+            user_stats.adjust(field, [old], -1, using=using)
+            user_stats.adjust(field, [new], 1, using=using)
+        previous[name] = new
+    instance._stats_users = previous
+
+
+@receiver(pre_delete, sender=Issue)
+def uncount_issue_watchers(sender, instance, **kwargs):
+    # Las filas de watchers se borran en cascada sin m2m_changed
+    UserStats.objects.using(instance._state.db).filter(user__watched_issues=instance).update(
+        watched_issues_count=Greatest(F('watched_issues_count') - 1, 0)
+    )
+
+
+@receiver(post_delete, sender=Issue)
+def uncount_issue_users(sender, instance, **kwargs):
+    for name, field in ISSUE_USER_COUNTERS.items():
+        user_stats.adjust(field, [getattr(instance, f'{name}_id')], -1, using=instance._state.db)
+
+
+@receiver(m2m_changed, sender=Issue.watchers.through)
+def count_watchers(sender, instance, action, reverse, model, pk_set, using, **kwargs):
+    through = Issue.watchers.through.objects.using(using)
+    own = {'user_id': instance.pk} if reverse else {'issue_id': instance.pk}
+    other = 'issue_id' if reverse else 'user_id'
+
+    if action == 'pre_remove':
+        # remove() recibe también ids que no estaban: se cuentan los que existen
+        instance._stats_watchers = list(through.filter(**own, **{f'{other}__in': pk_set}).values_list(other, flat=True))
+    elif action == 'pre_clear':
+        instance._stats_watchers = list(through.filter(**own).values_list(other, flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        # En post_add pk_set solo trae los ids añadidos de verdad
+        changed = list(pk_set) if action == 'post_add' else instance.__dict__.pop('_stats_watchers', [])
+        delta = 1 if action == 'post_add' else -1
+        user_ids = [instance.pk] * len(changed) if reverse else changed
+        user_stats.adjust('watched_issues_count', user_ids, delta, using=using)
+
 
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        user_stats.adjust('comments_count', [instance.user_id], 1, using=instance._state.db)
 
 
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    user_stats.adjust('comments_count', [instance.user_id], -1, using=instance._state.db)
@@ -0,0 +1,203 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+
+from .imaging import current_variants, variant_root
+from .models import Blob, DirectUpload, PendingDeletion, UploadSession
+from .s3 import DELETE_BATCH_SIZE, delete_objects, is_s3, object_key, storage_name
+from .variants import KINDS, variant_names
+
+
+logger = logging.getLogger(__name__)
+
+# Nombres por consulta al comprobar si una fila los usa
+LOOKUP_BATCH_SIZE = 500
+# Raíces de miniaturas por consulta (una condición LIKE por raíz)
+ROOTS_PER_QUERY = 100
+
+_executor = None
+_executor_lock = threading.Lock()
+_queued = set()
+
+
+def file_field(kind):
+    """Campo del modelo cuyo almacenamiento guarda los objetos de ``kind``."""
+    model, field, _variants_field = KINDS[kind]
+    return model._meta.get_field(field)
+
+
+def stored_names(kind, instance, name=None):
+    """
+    Nombres en el almacenamiento del archivo de ``instance`` (o del archivo
+    ``name`` que tenía antes) y de sus miniaturas.
+    """
+    _model, field, variants_field = KINDS[kind]
+    # Solo los campos cargados: en una fila ya borrada no se puede leer el resto
+    if name is None:
+        value = instance.__dict__.get(field)
+        name = getattr(value, 'name', value)
+    if not name:
+        return []
+    return [name] + variant_names(current_variants(instance.__dict__.get(variants_field), name))
+
+
+def queue_deletion(kind, names, using='default'):
+    """
+    Anota para borrar los objetos ``names`` del almacenamiento de ``kind``
+    ('attachment' o 'avatar'). Se borran por lotes tras el commit, en segundo
+    plano salvo que STORAGE_GC_BACKGROUND esté desactivado; si la transacción
+    se deshace, la anotación también.
+    """
+    names = [name for name in dict.fromkeys(names) if name]
+    if not names:
+        return
+    PendingDeletion.objects.using(using).bulk_create([PendingDeletion(kind=kind, name=name) for name in names])
+    if getattr(settings, 'STORAGE_GC_BACKGROUND', True):
+        transaction.on_commit(lambda: _request_drain(using), using=using)
+    else:
+        transaction.on_commit(lambda: drain(using=using), using=using)
+
+
+def drain(using='default'):
+    """
+    Borra los objetos anotados en PendingDeletion por lotes de
+    DELETE_BATCH_SIZE: en S3, una llamada a delete_objects por lote. Antes se
+    descartan los que alguna fila vuelve a usar (otro archivo guardado con el
+    mismo nombre). Los que fallan quedan anotados con el error y se reintentan
+    en la siguiente pasada, hasta STORAGE_GC_MAX_ATTEMPTS veces. Devuelve
+    (borrados, fallidos).
+    """
+    max_attempts = getattr(settings, 'STORAGE_GC_MAX_ATTEMPTS', 5)
+    pending = PendingDeletion.objects.using(using)
+    deleted = failed = 0
+    last = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last, attempts__lt=max_attempts).order_by('pk')[:DELETE_BATCH_SIZE])
+        if not batch:
+            return deleted, failed
+        last = batch[-1].pk
+        for kind in KINDS:
+            rows = [row for row in batch if row.kind == kind]
+            if not rows:
+                continue
+            names = {row.name for row in rows}
+            unused = names - referenced_names(kind, names, using=using)
+            errors = delete_objects(file_field(kind).storage, unused)
+            pending.filter(pk__in=[row.pk for row in rows if row.name not in errors]).delete()
+            for name, error in errors.items():
+                pending.filter(kind=kind, name=name, pk__lte=last).update(attempts=F('attempts') + 1, error=error)
+            deleted += len(unused) - len(errors)
+            failed += len(errors)
+
+
+def referenced_names(kind, names, using='default'):
+    """
+    De ``names``, los que alguna fila sigue usando en el almacenamiento de
+    ``kind``: como archivo, como miniatura, como objeto compartido de un
+    blob o como destino de una subida directa o por partes en curso.
+    """
+    model, field, variants_field = KINDS[kind]
+    names = list(names)
+    referenced = set()
+    for start in range(0, len(names), LOOKUP_BATCH_SIZE):
+        chunk = names[start:start + LOOKUP_BATCH_SIZE]
+        referenced.update(model.objects.using(using).filter(**{f'{field}__in': chunk}).values_list(field, flat=True))
+        referenced.update(DirectUpload.objects.using(using).filter(
+            state=DirectUpload.PENDING, target=kind, key__in=chunk
+        ).values_list('key', flat=True))
+        if kind == PendingDeletion.ATTACHMENT:
+            referenced.update(UploadSession.objects.using(using).filter(
+                state=UploadSession.PENDING, key__in=chunk
+            ).values_list('key', flat=True))
+            referenced.update(Blob.objects.using(using).filter(name__in=chunk).values_list('name', flat=True))
+
+    # Miniaturas: se buscan los originales por su nombre sin extensión
+    roots = sorted({root for root in map(variant_root, names) if root})
+    for start in range(0, len(roots), ROOTS_PER_QUERY):
+        chunk = roots[start:start + ROOTS_PER_QUERY]
+        condition = reduce(or_, (Q(**{f'{field}__startswith': f'{root}.'}) for root in chunk))
+        for source, variants in model.objects.using(using).filter(condition).values_list(field, variants_field):
+            referenced.update(variant_names(current_variants(variants, source)))
+    return referenced.intersection(names)
+
+
+def find_orphans(kind, grace=None, using='default'):
+    """
+    Recorre el almacenamiento de ``kind`` bajo el upload_to de su campo, una
+    página del listado cada vez, y genera por cada página la lista de objetos
+    que no usa ninguna fila (ver referenced_names). Los modificados hace menos
+    de ``grace`` (STORAGE_SWEEP_GRACE segundos por defecto) se respetan: pueden
+    ser de subidas que aún no han creado su fila.
+    """
+    if grace is None:
+        grace = timedelta(seconds=getattr(settings, 'STORAGE_SWEEP_GRACE', 24 * 3600))
+    limit = datetime.now(dt_timezone.utc) - grace
+    field = file_field(kind)
+    for page in _list_pages(field.storage, field.upload_to):
+        candidates = {name for name, modified in page if modified < limit}
+        if candidates:
+            yield sorted(candidates - referenced_names(kind, candidates, using=using))
+
+
+def _list_pages(storage, prefix):
+    # Páginas de (nombre, fecha de modificación), sin cargar el listado entero
+    if is_s3(storage):
+        paginator = storage.connection.meta.client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(
+            Bucket=storage.bucket_name, Prefix=object_key(storage, prefix),
+            PaginationConfig={'PageSize': DELETE_BATCH_SIZE},
+        )
+        for page in pages:
+            yield [(storage_name(storage, item['Key']), item['LastModified']) for item in page.get('Contents', [])]
+        return
+
+    # Almacenamiento en disco (FileSystemStorage)
+    root = storage.path('')
+    page = []
+    for directory, _dirs, files in os.walk(storage.path(prefix)):
+        for file_name in files:
+            path = os.path.join(directory, file_name)
+            modified = datetime.fromtimestamp(os.stat(path).st_mtime, dt_timezone.utc)
+            page.append((os.path.relpath(path, root).replace(os.sep, '/'), modified))
+            if len(page) == DELETE_BATCH_SIZE:
+                yield page
+                page = []
+    if page:
+        yield page
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage-gc')
+        return _executor
+
+
+def _request_drain(using):
+    # Los borrados anotados mientras espera una pasada entran en esa misma pasada
+    with _executor_lock:
+        if using in _queued:
+            return
+        _queued.add(using)
+    _get_executor().submit(_drain_in_thread, using)
+
+
+def _drain_in_thread(using):
+    with _executor_lock:
+        _queued.discard(using)
+    try:
+        drain(using=using)
+    except Exception:
+        logger.exception("No se pudieron borrar los objetos pendientes")
+    finally:
+        # Las conexiones son por hilo: se cierran para no dejarlas abiertas
+        connections.close_all()
@@ -1,3 +1,134 @@
-from django.test import TestCase
+import importlib
+import secrets
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from . import blobs, storage_gc
+from .attachments import attach_blob
+from .models import ApiToken, Attachment, Blob, Issue, PendingDeletion, Status
+from .tokens import PREFIX_LENGTH, find_token, hash_token, issue_token
+
+
+class ApiTokenMigrationTests(TransactionTestCase):
+    """
+    0006 pasa los tokens en claro de Profile.api_token a ApiToken (prefijo y
+    hash) y no se puede deshacer: se recrea la columna antigua y se ejecuta su
+    función sobre el estado de los modelos de entonces.
+    """
+    serialized_rollback = True
+
+    def test_plaintext_tokens_still_authenticate(self):
+        migration = importlib.import_module('issues.migrations.0006_api_tokens')
+        loader = MigrationLoader(connection)
+        nodes = [node for node in loader.graph.leaf_nodes() if node[0] != 'issues']
+        state = loader.project_state(nodes + [('issues', '0005_issue_updated_at')])
+        # CreateModel(ApiToken), sin llegar a RemoveField(Profile.api_token)
+        migration.Migration.operations[0].state_forwards('issues', state)
+        OldProfile = state.apps.get_model('issues', 'Profile')
+
+        users = [User.objects.create(username=name) for name in ('alice', 'bob', 'carol')]
+        plaintext = {users[0].pk: secrets.token_hex(20), users[1].pk: secrets.token_hex(20)}
+        # Nula para poder añadirla a los perfiles que ya existen
+        column = OldProfile._meta.get_field('api_token').clone()
+        column.null = True
+        column.set_attributes_from_name('api_token')
+        column.model = OldProfile
+        with connection.schema_editor() as editor:
+            editor.add_field(OldProfile, column)
+        try:
+            OldProfile.objects.filter(user=users[2].pk).update(api_token='')
+            for user_id, token in plaintext.items():
+                OldProfile.objects.filter(user_id=user_id).update(api_token=token)
+            with connection.schema_editor() as editor:
+                migration.move_profile_tokens(state.apps, editor)
+        finally:
+            with connection.schema_editor() as editor:
+                editor.remove_field(OldProfile, column)
+
+        # Sin token, ninguno; el resto, solo su hash
+        self.assertEqual(ApiToken.objects.count(), 2)
+        self.assertFalse(ApiToken.objects.filter(user=users[2]).exists())
+        for user_id, token in plaintext.items():
+            self.assertFalse(ApiToken.objects.filter(secret_hash=token).exists())
+            self.assertEqual(find_token(token).user_id, user_id)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=token)
+            self.assertEqual(client.get('/api/issues/').status_code, 200)
+
+
+class FindTokenTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alice')
+
+    def test_shared_prefix(self):
+        # Dos tokens con el mismo prefijo: decide el hash
+        prefix = secrets.token_hex(PREFIX_LENGTH // 2)
+        first, second = (prefix + secrets.token_hex(14) for _ in range(2))
+        other = User.objects.create(username='bob')
+        for user, token in ((self.user, first), (other, second)):
+            ApiToken.objects.create(user=user, prefix=prefix, secret_hash=hash_token(token))
+        self.assertEqual(find_token(first).user, self.user)
+        self.assertEqual(find_token(second).user, other)
+        self.assertIsNone(find_token(prefix + secrets.token_hex(14)))
+
+    def test_short_or_unknown_token(self):
+        _api_token, token = issue_token(self.user)
+        self.assertIsNone(find_token(token[:PREFIX_LENGTH - 1]))
+        self.assertIsNone(find_token(token[:-1]))
+        self.assertEqual(find_token(token).user, self.user)
+
+
+class BlobTests(TestCase):
+    """Recuento de referencias de issues.blobs y su relación con issues.storage_gc."""
+
+    name = 'attachments/shared.txt'
+    sha256 = 'a' * 64
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='alice')
+        cls.issue = Issue.objects.create(
+            subject='s', description='d', status=Status.objects.first(), created_by=cls.user
+        )
+
+    def test_acquire_and_release(self):
+        self.assertIsNone(blobs.acquire(self.sha256))
+        blob = blobs.acquire(self.sha256, self.name, 10)
+        self.assertEqual((blob.name, blob.refcount), (self.name, 1))
+        # Otro objeto con el mismo contenido: se usa el primero
+        again = blobs.acquire(self.sha256, 'attachments/copy.txt', 10)
+        self.assertEqual((again.pk, again.name, again.refcount), (blob.pk, self.name, 2))
+        blobs.release(blob.pk)
+        self.assertEqual(Blob.objects.get(pk=blob.pk).refcount, 1)
+        blobs.release(blob.pk)
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+
+    def test_shared_blob_survives_deleting_one_attachment(self):
+        blobs.acquire(self.sha256, self.name, 10)
+        first = attach_blob(self.issue, self.sha256, 'one.txt')
+        second = attach_blob(self.issue, self.sha256, 'two.txt')
+        # acquire() del objeto original más una referencia por adjunto
+        blob = Blob.objects.get(sha256=self.sha256)
+        self.assertEqual(blob.refcount, 3)
+        self.assertEqual({first.file.name, second.file.name}, {self.name})
+        blobs.release(blob.pk)
+
+        first.delete()
+        self.assertEqual(Blob.objects.get(pk=blob.pk).refcount, 1)
+        self.assertTrue(PendingDeletion.objects.filter(name=self.name).exists())
+        self.assertEqual(storage_gc.referenced_names('attachment', [self.name]), {self.name})
+        # El objeto sigue en uso: drain descarta la anotación sin borrarlo
+        self.assertEqual(storage_gc.drain(), (0, 0))
+        self.assertFalse(PendingDeletion.objects.exists())
+        self.assertEqual(Attachment.objects.get(pk=second.pk).file.name, self.name)
+
+        # Con el último adjunto se va el blob y el objeto queda libre para borrarse
+        second.delete()
+        self.assertFalse(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertEqual(storage_gc.referenced_names('attachment', [self.name]), set())
+        self.assertTrue(PendingDeletion.objects.filter(name=self.name).exists())
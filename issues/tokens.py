@@ -0,0 +1,103 @@
+import atexit
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import ApiToken
+
+
+logger = logging.getLogger(__name__)
+
+# Caracteres del token que se guardan en claro para buscarlo por índice
+PREFIX_LENGTH = 12
+
+
+def generate_token():
+    """Token nuevo: 40 caracteres hexadecimales, el mismo formato que los antiguos."""
+    return secrets.token_hex(20)
+
+
+def token_prefix(token):
+    return token[:PREFIX_LENGTH]
+
+
+def hash_token(token):
+    # Los tokens son aleatorios y largos: basta un hash rápido, sin sal ni KDF
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def issue_token(user, name='default'):
+    """Crea un token para ``user``. Devuelve (ApiToken, token en claro); este último no se guarda."""
+    token = generate_token()
+    api_token = ApiToken.objects.create(
+        user=user, name=name, prefix=token_prefix(token), secret_hash=hash_token(token)
+    )
+    return api_token, token
+
+
+def find_token(token):
+    """
+    ApiToken (con su usuario) que corresponde a ``token``, o None. Una consulta
+    por el índice de ``prefix`` y comparación del hash en tiempo constante.
+    """
+    if len(token) < PREFIX_LENGTH:
+        return None
+    secret_hash = hash_token(token)
+    candidates = ApiToken.objects.select_related('user').filter(prefix=token_prefix(token))
+    for candidate in candidates:
+        if hmac.compare_digest(candidate.secret_hash, secret_hash):
+            return candidate
+    return None
+
+
+class LastUsedBuffer:
+    """
+    Acumula en memoria la última fecha de uso de cada token y la escribe por
+    lotes (un bulk_update) como mucho cada ``interval`` segundos o al llegar a
+    ``max_pending`` tokens distintos, en lugar de un UPDATE por petición.
+    """
+
+    def __init__(self, interval, max_pending=1000, clock=time.monotonic):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.clock = clock
+        self._pending = {}
+        self._last_flush = clock()
+        self._lock = threading.Lock()
+
+    def touch(self, token_id):
+        with self._lock:
+            self._pending[token_id] = timezone.now()
+            due = (
+                len(self._pending) >= self.max_pending
+                or self.clock() - self._last_flush >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Escribe las fechas pendientes. Devuelve el número de tokens actualizados."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = self.clock()
+        if not pending:
+            return 0
+        tokens = [ApiToken(pk=pk, last_used_at=used_at) for pk, used_at in pending.items()]
+        try:
+            ApiToken.objects.bulk_update(tokens, ['last_used_at'], batch_size=500)
+        except DatabaseError:
+            # Es un dato informativo: no debe tumbar la petición que dispara la escritura
+            logger.exception("No se pudo guardar last_used_at de %d tokens", len(tokens))
+            return 0
+        return len(tokens)
+
+
+last_used = LastUsedBuffer(interval=getattr(settings, 'API_TOKEN_LAST_USED_FLUSH_INTERVAL', 60))
+atexit.register(last_used.flush)
@@ -0,0 +1,220 @@
+import math
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Func, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+
+from .models import Issue, Profile, Trigram
+
+
+# Proporción mínima de trigramas de la consulta que debe contener el texto
+# para considerarlo coincidencia (equivalente a pg_trgm.word_similarity_threshold)
+DEFAULT_THRESHOLD = getattr(settings, 'TRIGRAM_WORD_SIMILARITY_THRESHOLD', 0.6)
+
+# Texto indexado por cada tipo de trigrama: (modelo, campo)
+INDEXED_FIELDS = {
+    Trigram.SUBJECT: (Issue, 'subject'),
+    Trigram.USERNAME: (User, 'username'),
+    Trigram.BIOGRAPHY: (Profile, 'biography'),
+}
+
+_WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+_pg_trgm_available = {}
+
+
+def trigrams(text):
+    """
+    Conjunto de trigramas de un texto con las mismas reglas que pg_trgm: se pasa
+    a minúsculas, se separa en palabras alfanuméricas y cada palabra se rellena
+    con dos espacios delante y uno detrás ("  ab" -> "  a", " ab", "ab ").
+    """
+    result = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def substring_trigrams(text):
+    """
+    Trigramas que contiene cualquier texto en el que ``text`` aparezca como
+    subcadena: los interiores de cada palabra, sin relleno (la palabra de la
+    consulta puede ser solo un trozo de la palabra indexada).
+    """
+    result = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        result.update(word[i:i + 3] for i in range(len(word) - 2))
+    return result
+
+
+def pg_trgm_available(using='default'):
+    """Indica si la base de datos es PostgreSQL con la extensión pg_trgm instalada."""
+    if using not in _pg_trgm_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                available = cursor.fetchone() is not None
+        _pg_trgm_available[using] = available
+    return _pg_trgm_available[using]
+
+
+# --- Mantenimiento del índice ---------------------------------------------------
+
+def index_objects(kind, objects, using='default', replace=True):
+    """
+    (Re)indexa el texto de ``objects`` para el tipo ``kind``. Sustituye las filas
+    previas de esos objetos con un DELETE y un INSERT por lotes, así que sirve
+    tanto para altas como para modificaciones y para las rutas que usan
+    bulk_create. Con ``replace=False`` (objetos recién creados) se omite el DELETE.
+
+    Las filas se insertan con executemany en lugar de bulk_create: un issue
+    genera decenas de trigramas y construir un modelo por fila domina el coste
+    de las altas masivas.
+
+    Con pg_trgm disponible no se mantiene la tabla: la búsqueda usa los índices
+    GIN de la propia columna.
+    """
+    if pg_trgm_available(using):
+        return
+    _model, field = INDEXED_FIELDS[kind]
+    objects = [obj for obj in objects if obj.pk is not None]
+    if not objects:
+        return
+    rows = [
+        (kind, obj.pk, trigram)
+        for obj in objects
+        for trigram in trigrams(getattr(obj, field))
+    ]
+    table = connections[using].ops.quote_name(Trigram._meta.db_table)
+    with transaction.atomic(using=using):
+        if replace:
+            unindex_objects(kind, [obj.pk for obj in objects], using=using)
+        with connections[using].cursor() as cursor:
+            cursor.executemany(f'INSERT INTO {table} (kind, object_id, trigram) VALUES (%s, %s, %s)', rows)
+
+
+def unindex_objects(kind, object_ids, using='default'):
+    Trigram.objects.using(using).filter(kind=kind, object_id__in=list(object_ids)).delete()
+
+
+def rebuild_index(kind, using='default', chunk_size=2000):
+    """Regenera por completo el índice de ``kind``. Devuelve los objetos indexados."""
+    model, field = INDEXED_FIELDS[kind]
+    Trigram.objects.using(using).filter(kind=kind).delete()
+    if pg_trgm_available(using):
+        return 0
+    total = 0
+    chunk = []
+    for obj in model.objects.using(using).only('pk', field).order_by('pk').iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) >= chunk_size:
+            index_objects(kind, chunk, using=using)
+            total += len(chunk)
+            chunk = []
+    index_objects(kind, chunk, using=using)
+    return total + len(chunk)
+
+
+# --- Búsqueda -------------------------------------------------------------------
+
+def fuzzy_search(queryset, kind, text, threshold=None):
+    """
+    Filtra ``queryset`` (de Issue o User según ``kind``) por similitud de
+    trigramas con ``text`` y lo anota con ``rank`` (0..1, mayor es más parecido).
+
+    Se considera coincidencia cuando el texto indexado contiene al menos
+    ``threshold`` de los trigramas de la consulta, de modo que "login eror"
+    encuentra "Login error on mobile". El ranking es la similitud de Jaccard
+    entre ambos conjuntos.
+
+    Sin pg_trgm los candidatos salen del índice (kind, trigram) con un GROUP BY
+    ... HAVING, sin recorrer la tabla. Con pg_trgm se usa el operador <% sobre
+    los índices GIN creados por la migración.
+    """
+    threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+    query_trigrams = sorted(trigrams(text))
+    if not query_trigrams:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+
+    using = queryset.db
+    _model, field = INDEXED_FIELDS[kind]
+
+    if pg_trgm_available(using):
+        table = queryset.model._meta.db_table
+        column = queryset.model._meta.get_field(field).column
+        return queryset.filter(
+            # <% usa el índice GIN con pg_trgm.word_similarity_threshold (0.6 por
+            # defecto); la segunda condición aplica el umbral pedido
+            pk__in=RawSQL(
+                f'SELECT id FROM {table} WHERE %s <%% {column} AND word_similarity(%s, {column}) >= %s',
+                (text, text, threshold),
+            )
+        ).annotate(
+            rank=Func(F(field), Value(text), function='SIMILARITY', output_field=FloatField())
+        )
+
+    query_size = len(query_trigrams)
+    needed = max(1, math.ceil(threshold * query_size))
+    entries = Trigram.objects.using(using).filter(kind=kind)
+
+    candidates = (
+        entries.filter(trigram__in=query_trigrams)
+        .values('object_id')
+        .annotate(shared=Count('id'))
+        .filter(shared__gte=needed)
+        .values('object_id')
+    )
+    shared = Subquery(
+        entries.filter(object_id=OuterRef('pk'), trigram__in=query_trigrams)
+        .values('object_id').annotate(count=Count('id')).values('count')
+    )
+    total = Subquery(
+        entries.filter(object_id=OuterRef('pk'))
+        .values('object_id').annotate(count=Count('id')).values('count')
+    )
+    shared = Cast(Coalesce(shared, 0), FloatField())
+    total = Cast(Coalesce(total, 0), FloatField())
+    return queryset.filter(pk__in=candidates).annotate(
+        rank=ExpressionWrapper(shared / (query_size + total - shared), output_field=FloatField())
+    )
+
+
+def contains_filter(kind, text, prefix='', using='default'):
+    """
+    Q equivalente a ``<prefix><campo>__icontains=text`` que se resuelve con
+    índices: ``prefix`` es la ruta desde el modelo filtrado hasta el indexado
+    (p. ej. 'profile__' para buscar en la biografía desde User).
+
+    Sin pg_trgm los candidatos son los objetos que tienen todos los trigramas
+    interiores de la consulta en la tabla de trigramas, y el icontains solo se
+    evalúa sobre ellos. Con pg_trgm se usa ILIKE, que aprovecha el índice GIN.
+    Si la consulta no tiene trigramas (palabras de menos de 3 letras) queda el
+    icontains sin más.
+    """
+    model, field = INDEXED_FIELDS[kind]
+    exact = Q(**{f'{prefix}{field}__icontains': text})
+
+    if pg_trgm_available(using):
+        table = model._meta.db_table
+        column = model._meta.get_field(field).column
+        pattern = '%' + re.sub(r'([\\%_])', r'\\\1', text) + '%'
+        return Q(**{f'{prefix}pk__in': RawSQL(f'SELECT id FROM {table} WHERE {column} ILIKE %s', (pattern,))})
+
+    query_trigrams = sorted(substring_trigrams(text))
+    if not query_trigrams:
+        return exact
+    candidates = (
+        Trigram.objects.using(using).filter(kind=kind, trigram__in=query_trigrams)
+        .values('object_id')
+        .annotate(shared=Count('id'))
+        .filter(shared=len(query_trigrams))
+        .values('object_id')
+    )
+    return Q(**{f'{prefix}pk__in': candidates}) & exact
@@ -0,0 +1,225 @@
+import base64
+import hashlib
+import logging
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.middleware.csrf import (
+    REASON_BAD_ORIGIN, REASON_NO_CSRF_COOKIE, CsrfViewMiddleware, InvalidTokenFormat, RejectRequest,
+)
+
+from .s3 import MIN_PART_SIZE, delete_object, is_s3, new_key, object_key, write_parameters
+
+
+logger = logging.getLogger(__name__)
+
+
+def stream_uploads(request, field):
+    """
+    Hace que los archivos de ``request`` se suban al almacenamiento de ``field``
+    a medida que llegan (StorageUploadHandler), sin pasar por memoria ni por un
+    temporal. Hay que llamarlo antes de leer request.POST/FILES (request.data en
+    DRF; en vistas con CSRF, desde una vista csrf_exempt). Si el almacenamiento
+    no es S3 no cambia nada.
+    """
+    if is_s3(field.storage):
+        # En DRF los manejadores se leen de la petición de Django
+        getattr(request, '_request', request).upload_handlers = [StorageUploadHandler(request, field)]
+
+
+def reject_cross_site(request):
+    """
+    Comprobaciones de CSRF que no necesitan leer el cuerpo (cookie CSRF y
+    cabeceras Origin/Referer, como CsrfViewMiddleware), para las vistas
+    csrf_exempt que llaman a stream_uploads: si no se rechaza aquí lo que llega
+    de otro sitio, sus archivos ya estarían en el bucket cuando csrf_protect
+    compruebe el token. Devuelve la respuesta 403 o None.
+    """
+    if request.method in ('GET', 'HEAD', 'OPTIONS', 'TRACE') or getattr(request, '_dont_enforce_csrf_checks', False):
+        return None
+    middleware = CsrfViewMiddleware(lambda request: None)
+    try:
+        if middleware._get_secret(request) is None:
+            # La cookie es SameSite: un formulario de otro sitio no la envía
+            raise RejectRequest(REASON_NO_CSRF_COOKIE)
+        if 'HTTP_ORIGIN' in request.META:
+            if not middleware._origin_verified(request):
+                raise RejectRequest(REASON_BAD_ORIGIN % request.META['HTTP_ORIGIN'])
+        elif request.is_secure():
+            middleware._check_referer(request)
+    except (InvalidTokenFormat, RejectRequest) as exc:
+        return middleware._reject(request, exc.reason)
+    return None
+
+
+def save_to_field(instance, field_name, uploaded_file):
+    """
+    Asigna ``uploaded_file`` a ``instance.<field_name>`` y guarda la instancia.
+    Un StoredUploadedFile ya está en el almacenamiento: se asigna por nombre,
+    sin volver a subirlo.
+    """
+    if isinstance(uploaded_file, StoredUploadedFile):
+        getattr(instance, field_name).name = uploaded_file.key
+        instance.save()
+        uploaded_file.keep()
+    else:
+        setattr(instance, field_name, uploaded_file)
+        instance.save()
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    Archivo de la petición que StorageUploadHandler ya ha guardado en
+    ``storage`` con el nombre ``key``; no se puede leer, se asigna por nombre.
+    Si al terminar la petición nadie lo ha conservado con keep(), se borra del
+    almacenamiento: HttpRequest.close() cierra los archivos de request.FILES.
+    """
+
+    def __init__(self, storage, key, name, content_type, size, charset, content_type_extra, md5, sha256):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+        self.storage = storage
+        self.key = key
+        self.md5 = md5
+        self.sha256 = sha256
+        self._owned = True
+
+    def keep(self):
+        """El objeto ya pertenece a una fila de la base de datos: no se borrará al cerrar."""
+        self._owned = False
+
+    def discard(self):
+        """Borra el objeto del almacenamiento si no se ha conservado."""
+        if self._owned:
+            self._owned = False
+            delete_object(self.storage, self.key)
+
+    def close(self):
+        self.discard()
+
+    def __deepcopy__(self, memo):
+        # QueryDict.copy() copia los archivos: la copia tiene que ser el mismo
+        # objeto para que keep() valga también para el de request.FILES
+        return self
+
+
+class _MultipartWriter:
+    """
+    Escribe un objeto del bucket a medida que recibe datos: acumula hasta
+    ``part_size`` bytes y los envía como parte de un multipart upload. Si el
+    archivo cabe en una parte se sube con un único put_object al terminar.
+    """
+
+    def __init__(self, storage, key, params, part_size):
+        self.storage = storage
+        self.key = key
+        self.params = params
+        self.part_size = part_size
+        self.client = storage.connection.meta.client
+        self.buffer = bytearray()
+        self.digest = hashlib.md5()
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.multipart_id = None
+        self.parts = []
+        self.finished = False
+
+    def write(self, data):
+        self.digest.update(data)
+        self.sha256.update(data)
+        self.size += len(data)
+        self.buffer += data
+        if len(self.buffer) >= self.part_size:
+            try:
+                self._send_part()
+            except Exception:
+                self.close()
+                raise
+
+    def finish(self):
+        target = {'Bucket': self.storage.bucket_name, 'Key': object_key(self.storage, self.key)}
+        try:
+            if self.multipart_id is None:
+                self.client.put_object(
+                    Body=self.buffer, ContentMD5=base64.b64encode(self.digest.digest()).decode(),
+                    **target, **self.params,
+                )
+            else:
+                if self.buffer:
+                    self._send_part()
+                self.client.complete_multipart_upload(
+                    UploadId=self.multipart_id, MultipartUpload={'Parts': self.parts}, **target
+                )
+        except Exception:
+            self.close()
+            raise
+        self.buffer = bytearray()
+        self.finished = True
+
+    def close(self):
+        # Archivo a medias (subida rechazada o fallo del almacenamiento): se
+        # descartan las partes. Si la conexión se corta a mitad del cuerpo
+        # Django no avisa al manejador; de esas partes se encarga la regla
+        # AbortIncompleteMultipartUpload del bucket.
+        self.buffer = bytearray()
+        if self.multipart_id is not None and not self.finished:
+            try:
+                self.client.abort_multipart_upload(
+                    Bucket=self.storage.bucket_name, Key=object_key(self.storage, self.key),
+                    UploadId=self.multipart_id,
+                )
+            except ClientError:
+                logger.exception("No se pudo abortar el multipart upload de %s", self.key)
+            self.multipart_id = None
+
+    def _send_part(self):
+        target = {'Bucket': self.storage.bucket_name, 'Key': object_key(self.storage, self.key)}
+        if self.multipart_id is None:
+            self.multipart_id = self.client.create_multipart_upload(**target, **self.params)['UploadId']
+        body, self.buffer = self.buffer, bytearray()
+        number = len(self.parts) + 1
+        response = self.client.upload_part(
+            UploadId=self.multipart_id, PartNumber=number, Body=body,
+            ContentMD5=base64.b64encode(hashlib.md5(body).digest()).decode(), **target,
+        )
+        self.parts.append({'PartNumber': number, 'ETag': response['ETag']})
+
+
+class StorageUploadHandler(FileUploadHandler):
+    """
+    Manejador de subidas que envía cada archivo del formulario al bucket de
+    ``field`` según llega, en partes de STREAMING_UPLOAD_PART_SIZE bytes (al
+    menos 5 MB, el mínimo de S3), en lugar de guardarlo en memoria o en un
+    temporal para que el storage lo vuelva a leer. Cada archivo ocupa como
+    mucho una parte en memoria; el MD5, el SHA-256 y el tamaño se calculan al
+    vuelo. La vista recibe StoredUploadedFile.
+    """
+
+    def __init__(self, request=None, field=None):
+        super().__init__(request)
+        self.field = field
+        self.storage = field.storage
+        self.part_size = max(getattr(settings, 'STREAMING_UPLOAD_PART_SIZE', MIN_PART_SIZE), MIN_PART_SIZE)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.key = new_key(self.field, self.file_name)
+        # Se guarda como ``file``: MultiPartParser lo cierra si la subida se interrumpe
+        self.file = _MultipartWriter(
+            self.storage, self.key, write_parameters(self.storage, self.key, self.content_type), self.part_size
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.finish()
+        return StoredUploadedFile(
+            self.storage, self.key, self.file_name, self.content_type, self.file.size,
+            self.charset, self.content_type_extra, self.file.digest.hexdigest(), self.file.sha256.hexdigest(),
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
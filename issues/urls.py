@@ -2,7 +2,7 @@ from django.urls import path, include
 from .views import issue_list, issue_create, delete_issue, update_issue_status, issue_detail, issue_bulk_create, login, \
     update_issue_assignee, profile, update_bio, update_issue_description, add_comment_to_issue, update_issue_info_title, \
     issue_info_delete_comment, settings_list, settings_edit, settings_delete, \
-    update_avatar, user_directory
+    update_avatar, user_directory, api_token_create, api_token_revoke
 from .views import (issue_list, issue_create, delete_issue, update_issue_status, issue_detail, issue_bulk_create, login, \
     update_issue_assignee, profile, update_bio, update_issue_description, add_comment_to_issue, update_issue_info_title,
                     issue_info_delete_comment, info_issue_upload_attachment, issue_info_delete_attachment,
@@ -72,6 +72,9 @@ urlpatterns = [
 
     path('update_bio/', update_bio, name='update_bio'),
 
+    path('api_tokens/new/', api_token_create, name='api_token_create'),
+    path('api_tokens/<int:token_id>/revoke/', api_token_revoke, name='api_token_revoke'),
+
     path('update-avatar/', update_avatar, name='update_avatar'),
 
     path('users/', user_directory, name='user_directory'),
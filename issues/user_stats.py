@@ -0,0 +1,89 @@
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Comment, Issue, UserStats
+
+
+# Contador de UserStats -> (modelo, columna con el id del usuario) de donde sale
+SOURCES = {
+    'watched_issues_count': (Issue.watchers.through, 'user_id'),
+    'assigned_issues_count': (Issue, 'assigned_to_id'),
+    'created_issues_count': (Issue, 'created_by_id'),
+    'comments_count': (Comment, 'user_id'),
+}
+COUNTER_FIELDS = tuple(SOURCES)
+
+
+def adjust(field, user_ids, delta=1, using='default'):
+    """
+    Suma ``delta`` al contador ``field`` de cada usuario de ``user_ids`` (una vez
+    por aparición; los None se ignoran). Un UPDATE por cada cantidad distinta,
+    calculado en la base de datos para no pisar cambios concurrentes.
+    """
+    by_amount = defaultdict(list)
+    for user_id, times in Counter(pk for pk in user_ids if pk is not None).items():
+        by_amount[times * delta].append(user_id)
+    for amount, ids in by_amount.items():
+        UserStats.objects.using(using).filter(user_id__in=ids).update(
+            **{field: Greatest(F(field) + amount, 0)}
+        )
+
+
+def compute(user_ids=None, using='default'):
+    """
+    Valores reales de los contadores, calculados desde las tablas de origen con
+    una consulta agrupada por contador. Devuelve {user_id: {campo: valor}} solo
+    con los usuarios que tienen algún valor distinto de cero.
+    """
+    result = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for field, (model, column) in SOURCES.items():
+        queryset = model.objects.using(using).exclude(**{column: None})
+        if user_ids is not None:
+            queryset = queryset.filter(**{f'{column}__in': user_ids})
+        rows = queryset.order_by().values(column).annotate(total=Count('pk')).values_list(column, 'total')
+        for user_id, total in rows:
+            result[user_id][field] = total
+    return dict(result)
+
+
+def reconcile(fix=True, using='default', chunk_size=1000):
+    """
+    Compara los contadores guardados con los reales, por bloques de usuarios.
+    Con ``fix`` crea las filas que falten y corrige las desviadas con
+    bulk_update. Devuelve (usuarios revisados, filas que faltaban, desviaciones),
+    donde cada desviación es (user_id, campo, valor guardado, valor real).
+
+    Un cambio que llegue mientras se recalcula un bloque puede perderse: es
+    mejor lanzarlo con poca actividad (o volver a lanzarlo).
+    """
+    checked = missing = 0
+    drift = []
+    user_ids = list(User.objects.using(using).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[start:start + chunk_size]
+        actual = compute(chunk, using=using)
+        stored = UserStats.objects.using(using).in_bulk(chunk)
+        to_create, to_update = [], []
+        for user_id in chunk:
+            values = actual.get(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+            stats = stored.get(user_id)
+            if stats is None:
+                missing += 1
+                to_create.append(UserStats(user_id=user_id, **values))
+                continue
+            changed = False
+            for field, value in values.items():
+                if getattr(stats, field) != value:
+                    drift.append((user_id, field, getattr(stats, field), value))
+                    setattr(stats, field, value)
+                    changed = True
+            if changed:
+                to_update.append(stats)
+        if fix:
+            UserStats.objects.using(using).bulk_create(to_create, batch_size=500, ignore_conflicts=True)
+            UserStats.objects.using(using).bulk_update(to_update, COUNTER_FIELDS, batch_size=500)
+        checked += len(chunk)
+    return checked, missing, drift
@@ -0,0 +1,203 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+
+from .imaging import ImageError, current_variants, is_image, render_variants, variant_name
+from .models import Attachment, Profile
+from .s3 import delete_objects
+
+
+logger = logging.getLogger(__name__)
+
+# Tipo de archivo -> (modelo, campo del archivo, campo JSON de las variantes)
+KINDS = {
+    'attachment': (Attachment, 'file', 'variants'),
+    'avatar': (Profile, 'avatar', 'avatar_variants'),
+}
+
+_executor = None
+_processes = None
+_executor_lock = threading.Lock()
+
+
+def schedule_variants(kind, ids, using='default'):
+    """
+    Genera en segundo plano, tras el commit, las miniaturas de los archivos
+    ``kind`` ('attachment' o 'avatar') de las filas ``ids`` que sean imágenes.
+    Las operaciones que guardan el archivo sin save() (bulk_create, update)
+    deben llamarla ellas mismas; con save() lo hacen las señales.
+    """
+    ids = list(ids)
+    if ids:
+        transaction.on_commit(lambda: [_submit(kind, pk, using) for pk in ids], using=using)
+
+
+def generate_variants(kind, pk, using='default'):
+    """
+    Genera las miniaturas del archivo ``kind`` de la fila ``pk``: para cada
+    tamaño de IMAGE_VARIANT_SIZES, una copia reducida sin EXIF en cada formato
+    de IMAGE_VARIANT_FORMATS, guardadas junto al original. Pillow trabaja en
+    el grupo de IMAGE_VARIANT_PROCESSES procesos. Se anotan en la fila con el
+    nombre del original (``source``): si el archivo cambia entretanto se
+    descartan. Si no es una imagen válida se anota sin variantes, para no
+    reintentarlo. Si otra fila usa el mismo archivo (issues.blobs) se copian
+    las suyas. Devuelve True si se han generado.
+    """
+    model, file_field, variants_field = KINDS[kind]
+    row = model.objects.using(using).filter(pk=pk).only(file_field, variants_field).first()
+    if row is None:
+        return False
+    fieldfile = getattr(row, file_field)
+    source = fieldfile.name
+    if not source or not is_image(source) or getattr(row, variants_field).get('source') == source:
+        return False
+
+    # Mismo objeto en otra fila (issues.blobs): se reutilizan sus miniaturas
+    shared = shared_variants(kind, source, exclude=pk, using=using)
+    if shared:
+        updated = model.objects.using(using).filter(pk=pk, **{file_field: source}).update(**{variants_field: shared})
+        return bool(updated) and not shared.get('error')
+
+    storage = fieldfile.storage
+    sizes = {}
+    error = ''
+    try:
+        if fieldfile.size > getattr(settings, 'IMAGE_VARIANT_MAX_SOURCE_SIZE', 50 * 1024 * 1024):
+            raise ImageError("La imagen es demasiado grande para generar miniaturas.")
+        with fieldfile.open('rb') as fh:
+            data = fh.read()
+        for size, width, height, encoded in _render(data):
+            variant = {'width': width, 'height': height}
+            for fmt, content in encoded.items():
+                variant[fmt] = storage.save(variant_name(source, size, fmt), ContentFile(content))
+            sizes[str(size)] = variant
+    except ImageError as exc:
+        error = str(exc)
+    except Exception:
+        logger.exception("No se pudieron generar las miniaturas de %s %s", kind, pk)
+        _delete_names(storage, variant_names(sizes))
+        return False
+
+    variants = {'source': source, 'sizes': sizes}
+    if error:
+        variants['error'] = error
+    with transaction.atomic(using=using):
+        previous = model.objects.using(using).select_for_update().filter(pk=pk, **{file_field: source}).first()
+        if previous is not None:
+            model.objects.using(using).filter(pk=pk).update(**{variants_field: variants})
+    if previous is None:
+        # Archivo sustituido o fila borrada mientras se generaban
+        _delete_names(storage, variant_names(sizes))
+        return False
+    stale = set(variant_names(getattr(previous, variants_field).get('sizes', {}))) - set(variant_names(sizes))
+    _delete_names(storage, stale)
+    return not error
+
+
+def shared_variants(kind, name, exclude=None, using='default'):
+    """
+    Miniaturas ya generadas del archivo ``name`` en alguna fila de ``kind``
+    que lo use (los adjuntos con el mismo contenido comparten objeto), o {}.
+    """
+    model, file_field, variants_field = KINDS[kind]
+    rows = model.objects.using(using).filter(**{file_field: name, f'{variants_field}__source': name})
+    if exclude is not None:
+        rows = rows.exclude(pk=exclude)
+    return rows.values_list(variants_field, flat=True).first() or {}
+
+
+def variant_urls(fieldfile, variants, request=None):
+    """
+    Variantes del archivo ``fieldfile`` con URLs en lugar de nombres:
+    {tamaño: {'width', 'height', formato: URL}}. Vacío si aún no se han
+    generado o el archivo no es una imagen.
+    """
+    urls = {}
+    for size, variant in current_variants(variants, fieldfile.name).items():
+        urls[size] = {
+            key: _absolute(fieldfile.storage.url(value), request) if key not in ('width', 'height') else value
+            for key, value in variant.items()
+        }
+    return urls
+
+
+def variant_names(sizes):
+    """Nombres en el almacenamiento de las variantes ``sizes`` ({tamaño: {formato: nombre}})."""
+    return [
+        value for variant in sizes.values() for key, value in variant.items() if key not in ('width', 'height')
+    ]
+
+
+def missing_variants(kind, using='default'):
+    """Filas de ``kind`` con una imagen sin miniaturas (p. ej. anteriores a esta función), en orden."""
+    model, file_field, variants_field = KINDS[kind]
+    rows = model.objects.using(using).exclude(**{file_field: ''}).exclude(**{f'{file_field}__isnull': True})
+    return [
+        pk for pk, name, variants in rows.order_by('pk').values_list('pk', file_field, variants_field)
+        if is_image(name) and (variants or {}).get('source') != name
+    ]
+
+
+def _render(data):
+    args = (
+        data,
+        getattr(settings, 'IMAGE_VARIANT_SIZES', (64, 256, 1024)),
+        getattr(settings, 'IMAGE_VARIANT_FORMATS', ('webp', 'jpeg')),
+        getattr(settings, 'IMAGE_VARIANT_QUALITY', 80),
+        getattr(settings, 'IMAGE_VARIANT_MAX_PIXELS', 50_000_000),
+    )
+    processes = _get_processes()
+    if processes is None:
+        return render_variants(*args)
+    return processes.submit(render_variants, *args).result()
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _delete_names(storage, names):
+    for name, error in delete_objects(storage, names).items():
+        logger.warning("No se pudo borrar la miniatura %s: %s", name, error)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_VARIANT_WORKERS', 2),
+                thread_name_prefix='image-variants',
+            )
+        return _executor
+
+
+def _get_processes():
+    global _processes
+    count = getattr(settings, 'IMAGE_VARIANT_PROCESSES', 2)
+    if not count:
+        return None
+    with _executor_lock:
+        if _processes is None:
+            # spawn: el proceso web tiene hilos y conexiones abiertas que fork copiaría
+            _processes = ProcessPoolExecutor(max_workers=count, mp_context=multiprocessing.get_context('spawn'))
+        return _processes
+
+
+def _submit(kind, pk, using):
+    _get_executor().submit(_generate_in_thread, kind, pk, using)
+
+
+def _generate_in_thread(kind, pk, using):
+    try:
+        generate_variants(kind, pk, using=using)
+    except Exception:
+        logger.exception("No se pudieron generar las miniaturas de %s %s", kind, pk)
+    finally:
+        # Las conexiones son por hilo: se cierran para no dejarlas abiertas
+        connections.close_all()
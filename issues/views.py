@@ -1,9 +1,13 @@
 from django.utils import timezone
-from botocore.exceptions import ClientError
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.db.models import Q
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.conf import settings
 from django.contrib.auth.models import User
 
 from .forms import IssueForm
@@ -12,6 +16,15 @@ from .forms import StatusForm, PrioritiesForm, TypesForm, SeveritiesForm
 from .models import Issue, Attachment
 from .models import Profile
 from .models import Comment
+from .search import search_issues
+from .models import ApiToken, CatalogDeletion, Trigram
+from .tokens import issue_token
+from .trigrams import contains_filter
+from .bulk import BulkIssueImporter
+from .attachments import stage_attachment
+from .upload_handlers import reject_cross_site, save_to_field, stream_uploads
+from .catalog_deletion import start_deletion
+from .watchers import add_watchers
 
 MODEL_FORM_MAP = {
     'status': (Status, StatusForm),
@@ -33,8 +46,11 @@ def issue_list(request, attachment_error=None):
 
     issues = Issue.objects.all()
 
+    search_query = request.GET.get('search', '').strip()
+
     # Determinar el campo de ordenación y dirección
-    sort_param = request.GET.get('sort', '-created_at')  # Default: created_at descendente
+    # Default: relevancia si hay búsqueda, created_at descendente si no
+    sort_param = request.GET.get('sort', '-rank' if search_query else '-created_at')
     sort_direction = ''
 
     # Si hay un prefijo de dirección, extraerlo
@@ -60,11 +76,10 @@ def issue_list(request, attachment_error=None):
     order_by_field = f"{sort_direction}{db_sort_field}"
 
     # Aplica los filtros
-    search_query = request.GET.get('search', '').strip()
     if search_query:
-        issues = issues.filter(
-            Q(subject__icontains=search_query) | Q(description__icontains=search_query)
-        )
+        issues = search_issues(issues, search_query)
+    elif sort_field == 'rank':
+        order_by_field = '-created_at'
 
     if request.GET.get('issue_type'):
         issues = issues.filter(issue_type_id=request.GET.get('issue_type'))
@@ -115,12 +130,8 @@ def issue_create(request):
             issue.save()
 
             if 'attachments' in request.FILES:
-                file = request.FILES['attachments']
-                try:
-                    Attachment.objects.create(issue=issue, file=file)
-                except ClientError:
-                    # En lugar de redirigir, renderiza issue_list con un error
-                    return issue_list(request, attachment_error="The bucket is currently disabled. Please try again later.")
+                # Se guarda en staging y se sube al bucket en segundo plano
+                stage_attachment(issue, request.FILES['attachments'])
 
             return redirect('issue_list')
 
@@ -293,19 +304,10 @@ def issue_bulk_create(request):
     if request.method == "POST":
         issues_text = request.POST.get("issues_text", "").strip()
         if issues_text:
-            issues = [
-                Issue(
-                    subject=line.strip(),
-                    description="Bulk created issue",
-                    created_by=request.user,
-                    status = Status.objects.get(nombre='New'),
-                    priority = Priorities.objects.get(nombre='Medium'),
-                    severity = Severities.objects.get(nombre='Normal'),
-                    issue_type = Types.objects.get(nombre='Bug'),
-                )
-                for line in issues_text.split("\n") if line.strip()
-            ]
-            Issue.objects.bulk_create(issues)
+            # Misma ruta que /api/issues/bulk-create/: inserción por bloques en una transacción
+            BulkIssueImporter(request.user).run(
+                {'subject': line.strip()} for line in issues_text.split("\n") if line.strip()
+            )
             return redirect('issue_list')
     return redirect('issue_list')  # Redirigir a la lista de issues
 
@@ -411,30 +413,29 @@ def settings_delete(request, model_name, pk):
         # Find the default item to reassign issues to
         default_item = model.objects.filter(nombre=non_deletable.get(model_name)).first()
 
-        # Reassign all issues that use this item to the default
-        if model_name == 'status':
-            issues = Issue.objects.filter(status=instance)
-            for issue in issues:
-                issue.status = default_item
-                issue.save()
-        elif model_name == 'priorities':
-            issues = Issue.objects.filter(priority=instance)
-            for issue in issues:
-                issue.priority = default_item
-                issue.save()
-        elif model_name == 'types':
-            issues = Issue.objects.filter(issue_type=instance)
-            for issue in issues:
-                issue.issue_type = default_item
-                issue.save()
-        elif model_name == 'severities':
-            issues = Issue.objects.filter(severity=instance)
-            for issue in issues:
-                issue.severity = default_item
-                issue.save()
+        # Los issues pasan al valor por defecto por bloques; si son muchos, en
+        # segundo plano, y la entrada se borra al terminar (issues.catalog_deletion)
+        try:
+            job = start_deletion(instance, replacement=default_item, user=request.user)
+        except ValueError as exc:
+            job = None
+            error_message = str(exc)
+        else:
+            if job.state == CatalogDeletion.DONE:
+                return redirect('settings_list')
+            error_message = f"Could not delete {instance.nombre}: {job.error}"
 
-        instance.delete()
-        return redirect('settings_list')
+        data = {
+            'status': Status.objects.all(),
+            'priorities': Priorities.objects.all(),
+            'types': Types.objects.all(),
+            'severities': Severities.objects.all(),
+        }
+        if job is None or job.state == CatalogDeletion.FAILED:
+            return render(request, 'settings/settings_list.html', {'data': data, 'error_message': error_message})
+        info_message = (f"{instance.nombre} is used by {job.total} issues. They are being moved to "
+                        f"{default_item.nombre} in the background; {instance.nombre} will disappear when it finishes.")
+        return render(request, 'settings/settings_list.html', {'data': data, 'info_message': info_message})
 
     return render(request, 'settings/settings_confirm_delete.html', {'instance': instance})
 
@@ -518,6 +519,10 @@ def profile(request, username=None):
         'is_own_profile': is_own_profile,  # Indicates if it's the user's own profile
         'current_sort': current_sort,  # Send sorting information to the template
     }
+    if is_own_profile:
+        # El token en claro solo existe justo después de crearlo
+        context['new_api_token'] = request.session.pop('new_api_token', None)
+        context['api_tokens'] = request.user.api_tokens.order_by('-created_at')
     return render(request, 'BaseProfile.html', context)
 
 
@@ -532,6 +537,21 @@ def update_bio(request):
         profile.save()
     return redirect('profile')
 
+@login_required
+def api_token_create(request):
+    if request.method == 'POST':
+        name = request.POST.get('name', '').strip()[:100] or 'web'
+        _api_token, token = issue_token(request.user, name=name)
+        request.session['new_api_token'] = token
+    return redirect(reverse('profile') + '#modal-api-token')
+
+
+@login_required
+def api_token_revoke(request, token_id):
+    if request.method == 'POST':
+        ApiToken.objects.filter(pk=token_id, user=request.user).delete()
+    return redirect(reverse('profile') + '#modal-api-token')
+
 @login_required
 def update_issue_info_title(request, issue_id):
     issue = get_object_or_404(Issue, id=issue_id)
@@ -551,29 +571,54 @@ def issue_info_delete_comment(request, issue_id, comment_id):
     return redirect('issue_detail', issue_id=issue_id)
 
 @login_required
+@csrf_exempt
 def info_issue_upload_attachment(request, issue_id):
+    # Lo que llega de otro sitio se rechaza antes de subir nada al bucket
+    rejection = reject_cross_site(request)
+    if rejection:
+        return rejection
+    # Los manejadores de subida se cambian antes de que el CSRF lea request.POST
+    stream_uploads(request, Attachment._meta.get_field('file'))
+    return _upload_attachment(request, issue_id)
+
+@csrf_protect
+def _upload_attachment(request, issue_id):
     issue = get_object_or_404(Issue, id=issue_id)
 
-    if request.method == 'POST' and request.FILES:
-        file = request.FILES.get('file')
-        if file:
-            try:
-                Attachment.objects.create(issue=issue, file=file)
-            except ClientError:
-                request.session['attachment_error'] = "The bucket is currently disabled. Please try again later."
-            except Exception:
-                request.session['attachment_error'] = "An unexpected error occurred while uploading the file."
+    try:
+        file = request.FILES.get('file') if request.method == 'POST' else None
+    except Exception:
+        # Con S3 el archivo se envía al bucket mientras se lee la petición
+        request.session['attachment_error'] = "An unexpected error occurred while uploading the file."
+        file = None
+    if file:
+        try:
+            # Ya en el bucket (S3) o en staging, para subirlo en segundo plano
+            stage_attachment(issue, file)
+        except Exception:
+            request.session['attachment_error'] = "An unexpected error occurred while uploading the file."
 
     return redirect('issue_detail', issue_id=issue.id)
 
 @login_required
+@csrf_exempt
 def update_avatar(request):
-    if request.method == 'POST' and request.FILES.get('avatar'):
+    # Lo que llega de otro sitio se rechaza antes de subir nada al bucket
+    rejection = reject_cross_site(request)
+    if rejection:
+        return rejection
+    # Los manejadores de subida se cambian antes de que el CSRF lea request.POST
+    stream_uploads(request, Profile._meta.get_field('avatar'))
+    return _update_avatar(request)
+
+@csrf_protect
+def _update_avatar(request):
+    if request.method == 'POST':
         profile = request.user.profile
-        avatar_file = request.FILES['avatar']
         try:
-            profile.avatar.save(avatar_file.name, avatar_file)
-            profile.save()
+            avatar_file = request.FILES.get('avatar')
+            if avatar_file:
+                save_to_field(profile, 'avatar', avatar_file)
         except Exception:
             # Guardar en la sesión el mensaje de error para luego mostrarlo en el template
             request.session['attachment_error'] = "The bucket is currently disabled. Please try again later."
@@ -590,9 +635,9 @@ def issue_info_delete_attachment(request, issue_id, attachment_id):
 
 @login_required
 def issue_info_add_watcher(request,issue_id):
-    issue = get_object_or_404(Issue, id=issue_id)
-    if request.user not in issue.watchers.all():
-        issue.watchers.add(request.user)
+    issue = get_object_or_404(Issue.objects.only('pk'), id=issue_id)
+    # Si ya es watcher no se inserta nada: no hace falta cargar la lista
+    add_watchers([issue.pk], [request.user.pk])
     return redirect('issue_detail', issue_id=issue_id)
 
 
@@ -608,12 +653,14 @@ def issue_info_remove_watcher(request, issue_id, ):
     return redirect('issue_detail', issue_id=issue_id)
 @login_required
 def issue_info_add_multiple_watchers(request, issue_id):
-    issue = get_object_or_404(Issue, pk=issue_id)
+    issue = get_object_or_404(Issue.objects.only('pk'), pk=issue_id)
     if request.method == 'POST':
-        selected_profile_ids = request.POST.getlist('users') # users es el name del select en el html
-        for profile_id in selected_profile_ids:
-            profile = get_object_or_404(Profile, pk=profile_id)
-            issue.watchers.add(profile.user) # Añadimos el User asociado al Profile
+        selected_profile_ids = set(request.POST.getlist('users')) # users es el name del select en el html
+        # Usuarios de los perfiles elegidos con una sola consulta
+        user_ids = list(Profile.objects.filter(pk__in=selected_profile_ids).values_list('user_id', flat=True))
+        if len(user_ids) != len(selected_profile_ids):
+            raise Http404("Perfil no encontrado")
+        add_watchers([issue.pk], user_ids)
         return redirect('issue_detail', issue_id=issue_id)
     return redirect('issue_detail', issue_id=issue_id)
 
@@ -704,38 +751,35 @@ def issue_info_delete_issue(request, issue_id):
 def user_directory(request):
     # Obtener todos los usuarios con sus perfiles
     User = get_user_model()
-    users = User.objects.all()
+    # Los contadores vienen precalculados en UserStats: una sola consulta por página
+    users = User.objects.select_related('profile', 'stats').order_by('username', 'pk')
 
-    # Procesar la búsqueda si existe
+    # Procesar la búsqueda si existe (por los índices de trigramas, issues.trigrams)
     search_query = request.GET.get('search', '').strip()
     if search_query:
         users = users.filter(
-            Q(username__icontains=search_query) |
-            Q(profile__biography__icontains=search_query)
+            contains_filter(Trigram.USERNAME, search_query, using=users.db) |
+            contains_filter(Trigram.BIOGRAPHY, search_query, prefix='profile__', using=users.db)
         )
 
+    page = Paginator(users, settings.USER_DIRECTORY_PAGE_SIZE).get_page(request.GET.get('page'))
+
     # Lista para almacenar información de cada usuario
     user_data = []
 
-    for user in users:
-        # Contar issues asignados
-        assigned_issues_count = Issue.objects.filter(assigned_to=user).count()
-
-        # Contar issues observados
-        watched_issues_count = Issue.objects.filter(watchers=user).count()
-
-        # Contar comentarios
-        comments_count = Comment.objects.filter(user=user).count()
+    for user in page:
+        stats = getattr(user, 'stats', None)
 
         # Añadir toda la información a la lista
         user_data.append({
             'user': user,
-            'assigned_issues_count': assigned_issues_count,
-            'watched_issues_count': watched_issues_count,
-            'comments_count': comments_count
+            'assigned_issues_count': stats.assigned_issues_count if stats else 0,
+            'watched_issues_count': stats.watched_issues_count if stats else 0,
+            'comments_count': stats.comments_count if stats else 0
         })
 
     return render(request, 'issues/user_directory.html', {
         'user_data': user_data,
+        'page_obj': page,
         'search_query': search_query  # Pasar la consulta de búsqueda al template
     })
\ No newline at end of file
@@ -0,0 +1,99 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Issue
+from .user_stats import adjust as adjust_user_stats
+
+
+# Issues por consulta: acota el tamaño de los IN y de cada INSERT
+CHUNK_SIZE = 500
+
+Watcher = Issue.watchers.through
+
+
+def split_usernames(usernames):
+    """
+    Normaliza una lista de usernames: admite el formato de formulario con todos
+    en una sola cadena separada por comas, quita vacíos y duplicados.
+    """
+    if len(usernames) == 1 and isinstance(usernames[0], str) and ',' in usernames[0]:
+        usernames = usernames[0].split(',')
+    return list(dict.fromkeys(name.strip() for name in usernames if name and name.strip()))
+
+
+def resolve_usernames(usernames, using='default'):
+    """
+    Resuelve ``usernames`` con una sola consulta IN. Devuelve ({username: id},
+    [usernames que no existen]).
+    """
+    usernames = list(dict.fromkeys(usernames))
+    if not usernames:
+        return {}, []
+    found = dict(User.objects.using(using).filter(username__in=usernames).values_list('username', 'pk'))
+    return found, [name for name in usernames if name not in found]
+
+
+def add_watchers(issue_ids, user_ids, using='default'):
+    """
+    Añade todos los ``user_ids`` como watchers de todos los ``issue_ids`` (que
+    deben existir). Por bloque de issues, una consulta para saber qué pares ya
+    existen y un único INSERT (ignore_conflicts) de los que faltan; también
+    ajusta UserStats y updated_at, que m2m_changed no cubre en estas escrituras.
+    Devuelve el número de filas añadidas.
+    """
+    issue_ids = list(dict.fromkeys(issue_ids))
+    user_ids = list(dict.fromkeys(user_ids))
+    if not issue_ids or not user_ids:
+        return 0
+    added = []
+    with transaction.atomic(using=using):
+        for start in range(0, len(issue_ids), CHUNK_SIZE):
+            chunk = issue_ids[start:start + CHUNK_SIZE]
+            present = set(
+                Watcher.objects.using(using)
+                .filter(issue_id__in=chunk, user_id__in=user_ids)
+                .values_list('issue_id', 'user_id')
+            )
+            rows = [
+                Watcher(issue_id=issue_id, user_id=user_id)
+                for issue_id in chunk for user_id in user_ids
+                if (issue_id, user_id) not in present
+            ]
+            Watcher.objects.using(using).bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+            added.extend(rows)
+        _after_change(added, 1, using)
+    return len(added)
+
+
+def remove_watchers(issue_ids, user_ids, using='default'):
+    """
+    Quita los ``user_ids`` de los watchers de los ``issue_ids`` con un DELETE
+    por bloque. Devuelve el número de filas borradas.
+    """
+    issue_ids = list(dict.fromkeys(issue_ids))
+    user_ids = list(dict.fromkeys(user_ids))
+    if not issue_ids or not user_ids:
+        return 0
+    removed = []
+    with transaction.atomic(using=using):
+        for start in range(0, len(issue_ids), CHUNK_SIZE):
+            rows = Watcher.objects.using(using).filter(
+                issue_id__in=issue_ids[start:start + CHUNK_SIZE], user_id__in=user_ids
+            )
+            found = list(rows.values_list('issue_id', 'user_id'))
+            if found:
+                rows.delete()
+                removed.extend(Watcher(issue_id=issue_id, user_id=user_id) for issue_id, user_id in found)
+        _after_change(removed, -1, using)
+    return len(removed)
+
+
+def _after_change(rows, delta, using):
+    if not rows:
+        return
+    adjust_user_stats('watched_issues_count', [row.user_id for row in rows], delta, using=using)
+    issue_ids = list({row.issue_id for row in rows})
+    now = timezone.now()
+    for start in range(0, len(issue_ids), CHUNK_SIZE):
+        Issue.objects.using(using).filter(pk__in=issue_ids[start:start + CHUNK_SIZE]).update(updated_at=now)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 import environ
 
 from django.contrib import staticfiles
@@ -80,6 +81,65 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Paginación por cursor de los listados de la API (api/pagination.py)
+API_PAGE_SIZE = env.int('API_PAGE_SIZE', default=50)
+API_MAX_PAGE_SIZE = env.int('API_MAX_PAGE_SIZE', default=500)
+# Segundos que un cliente puede reutilizar /api/catalogs/ sin revalidar
+CATALOGS_MAX_AGE = env.int('CATALOGS_MAX_AGE', default=300)
+# Caché de autenticación por token (api.authentication.token_cache), por proceso
+API_TOKEN_CACHE_SIZE = env.int('API_TOKEN_CACHE_SIZE', default=1000)
+API_TOKEN_CACHE_TTL = env.int('API_TOKEN_CACHE_TTL', default=300)
+# Cada cuántos segundos se escribe por lotes el last_used_at de los tokens
+API_TOKEN_LAST_USED_FLUSH_INTERVAL = env.int('API_TOKEN_LAST_USED_FLUSH_INTERVAL', default=60)
+# Usuarios por página en el directorio web (/issues/users/)
+USER_DIRECTORY_PAGE_SIZE = env.int('USER_DIRECTORY_PAGE_SIZE', default=50)
+# Altas masivas de issues (issues.bulk): filas por bloque y máximo por petición
+ISSUE_BULK_CHUNK_SIZE = env.int('ISSUE_BULK_CHUNK_SIZE', default=1000)
+ISSUE_BULK_MAX_ITEMS = env.int('ISSUE_BULK_MAX_ITEMS', default=100000)
+# Borrado de catálogos (issues.catalog_deletion): issues por bloque y si los
+# borrados de más de un bloque se hacen en segundo plano
+CATALOG_DELETION_CHUNK_SIZE = env.int('CATALOG_DELETION_CHUNK_SIZE', default=1000)
+CATALOG_DELETION_BACKGROUND = env.bool('CATALOG_DELETION_BACKGROUND', default=True)
+# Adjuntos (issues.attachments): se guardan en ATTACHMENT_STAGING_DIR y un
+# grupo de ATTACHMENT_UPLOAD_WORKERS hilos los sube después al almacenamiento
+# (S3, o la clase de ATTACHMENT_STORAGE si se indica)
+ATTACHMENT_STORAGE = env('ATTACHMENT_STORAGE', default=None)
+ATTACHMENT_STAGING_DIR = env('ATTACHMENT_STAGING_DIR', default=str(BASE_DIR / 'staging'))
+ATTACHMENT_UPLOAD_BACKGROUND = env.bool('ATTACHMENT_UPLOAD_BACKGROUND', default=True)
+ATTACHMENT_UPLOAD_WORKERS = env.int('ATTACHMENT_UPLOAD_WORKERS', default=4)
+# Subidas directas al bucket con URL prefirmada (issues.direct_uploads): validez
+# de la URL en segundos y tamaño máximo admitido en bytes
+DIRECT_UPLOAD_EXPIRES = env.int('DIRECT_UPLOAD_EXPIRES', default=900)
+DIRECT_UPLOAD_MAX_SIZE = env.int('DIRECT_UPLOAD_MAX_SIZE', default=100 * 1024 * 1024)
+# Subidas por partes (issues.chunked_uploads): tamaño de parte por defecto y
+# máximo (cada parte se guarda en memoria hasta enviarla), tamaño máximo del
+# archivo y segundos sin recibir partes tras los que caduca una sesión
+CHUNKED_UPLOAD_CHUNK_SIZE = env.int('CHUNKED_UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024)
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = env.int('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', default=16 * 1024 * 1024)
+CHUNKED_UPLOAD_MAX_SIZE = env.int('CHUNKED_UPLOAD_MAX_SIZE', default=5 * 1024 * 1024 * 1024)
+CHUNKED_UPLOAD_EXPIRES = env.int('CHUNKED_UPLOAD_EXPIRES', default=24 * 3600)
+# Con S3, los archivos de los formularios de adjuntos y avatar se envían al
+# bucket según llegan (issues.upload_handlers), en partes de este tamaño
+STREAMING_UPLOAD_PART_SIZE = env.int('STREAMING_UPLOAD_PART_SIZE', default=8 * 1024 * 1024)
+# Miniaturas de imágenes de adjuntos y avatares (issues.variants): lado mayor
+# en px, formatos y calidad; las genera Pillow en IMAGE_VARIANT_PROCESSES
+# procesos (0: en el propio hilo) a partir de imágenes de hasta
+# IMAGE_VARIANT_MAX_SOURCE_SIZE bytes e IMAGE_VARIANT_MAX_PIXELS píxeles
+IMAGE_VARIANT_SIZES = tuple(env.list('IMAGE_VARIANT_SIZES', cast=int, default=[64, 256, 1024]))
+IMAGE_VARIANT_FORMATS = tuple(env.list('IMAGE_VARIANT_FORMATS', default=['webp', 'jpeg']))
+IMAGE_VARIANT_QUALITY = env.int('IMAGE_VARIANT_QUALITY', default=80)
+IMAGE_VARIANT_WORKERS = env.int('IMAGE_VARIANT_WORKERS', default=2)
+IMAGE_VARIANT_PROCESSES = env.int('IMAGE_VARIANT_PROCESSES', default=2)
+IMAGE_VARIANT_MAX_SOURCE_SIZE = env.int('IMAGE_VARIANT_MAX_SOURCE_SIZE', default=50 * 1024 * 1024)
+IMAGE_VARIANT_MAX_PIXELS = env.int('IMAGE_VARIANT_MAX_PIXELS', default=50_000_000)
+# Borrado de archivos de adjuntos y avatares que ya no se usan (issues.storage_gc):
+# se anotan al borrar la fila y se borran por lotes tras el commit, en segundo
+# plano si STORAGE_GC_BACKGROUND; sweep_storage recoge los huérfanos con más de
+# STORAGE_SWEEP_GRACE segundos
+STORAGE_GC_BACKGROUND = env.bool('STORAGE_GC_BACKGROUND', default=True)
+STORAGE_GC_MAX_ATTEMPTS = env.int('STORAGE_GC_MAX_ATTEMPTS', default=5)
+STORAGE_SWEEP_GRACE = env.int('STORAGE_SWEEP_GRACE', default=24 * 3600)
+
 MIDDLEWARE = [
     "allauth.account.middleware.AccountMiddleware",
 
@@ -156,6 +216,16 @@ DATABASES = {
     }
 }
 
+# 'shared' debe ser visible para todos los workers (archivo, redis, memcached...):
+# guarda marcas de versión como la del registro de catálogos (issues.catalogs)
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://'),
+    'shared': env.cache_url(
+        'SHARED_CACHE_URL',
+        default='filecache://' + os.path.join(tempfile.gettempdir(), 'sabanaback-shared-cache'),
+    ),
+}
+
 SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
     'SECURITY_DEFINITIONS': {
@@ -196,6 +266,10 @@ SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
     'SWAGGER_UI_DIST': 'SIDECAR',
     'SORT_OPERATION_PARAMETERS': False,
+    # Estados de DirectUpload y UploadSession (los mismos valores)
+    'ENUM_NAME_OVERRIDES': {
+        'UploadStateEnum': 'issues.models.UploadSession.STATE_CHOICES',
+    },
     # Configuración de seguridad para tu token personalizado
     'SECURITY': [
         {'ApiToken': []}
@@ -290,6 +364,8 @@ AWS_S3_REGION_NAME = env('AWS_S3_REGION_NAME')
 AWS_S3_SIGNATURE_VERSION = 's3v4'
 AWS_S3_FILE_OVERWRITE = False
 AWS_DEFAULT_ACL = 'public-read'
+# Endpoint S3 alternativo (MinIO, moto...) para desarrollo y pruebas
+AWS_S3_ENDPOINT_URL = env('AWS_S3_ENDPOINT_URL', default=None)
 
 
 